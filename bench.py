@@ -0,0 +1,434 @@
+"""Banc d'essai hors ligne de l'analyse de tokens.
+
+Un serveur local rejoue les réponses enregistrées dans bench_fixtures.json
+(explorateur txlist/getcontractcreation, JSON-RPC eth_getCode/eth_call,
+API des launchpads, subgraph Uniswap) avec une latence et un taux d'erreur
+configurables par service. N utilisateurs simulés lancent ensuite leurs
+analyses en parallèle, soit directement via TokenAnalyzer.analyze_token,
+soit via le handler Telegram (file d'attente, partage des analyses,
+éditions progressives).
+
+Exemples :
+    python bench.py --users 20 --requests 5
+    python bench.py --mode handler --users 50 --latency explorer=0.3 --errors launchpad=0.1
+    python bench.py --json result.json
+    python bench.py --baseline result.json --tolerance 0.2   # code retour 1 si régression
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import resource
+import tracemalloc
+import warnings
+from collections import Counter
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+# Configuration du bot avant son import : clés factices, cache et
+# services annexes désactivés
+os.environ.setdefault("BASESCAN_API_KEY", "bench")
+os.environ.setdefault("ETHERSCAN_API_KEY", "bench")
+os.environ.setdefault("CACHE_PATH", "")
+os.environ.setdefault("METRICS_PORT", "")
+os.environ.setdefault("INDEXER_ENABLED", "0")
+os.environ.setdefault("WATCH_ENABLED", "0")
+
+# Avertissements d'eth_utils à l'import, sans intérêt pour le banc
+warnings.simplefilter("ignore", UserWarning)
+
+import aiohttp
+from aiohttp import web
+from yarl import URL
+from eth_abi import decode, encode
+
+import bot
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures.json")
+
+# Latence (secondes) et taux d'erreur par défaut de chaque service rejoué
+DEFAULT_LATENCY = {"explorer": 0.15, "rpc": 0.05, "launchpad": 0.25, "subgraph": 0.2}
+DEFAULT_ERRORS = {"explorer": 0.0, "rpc": 0.0, "launchpad": 0.0, "subgraph": 0.0}
+
+# Hôtes des services externes -> service rejoué
+LAUNCHPAD_HOSTS = {
+    "www.clanker.world": "clanker",
+    "ape.store": "ape_store",
+    "klik.network": "klik",
+    "wow.xyz": "wow",
+}
+SUBGRAPH_HOST = "api.studio.thegraph.com"
+
+class ReplayServer:
+    """Serveur HTTP local qui imite les services externes à partir des fixtures.
+
+    Les requêtes arrivent sous la forme /<hôte d'origine>/<chemin> (voir
+    replay_request_class) ; chaque réponse est retardée selon la latence du
+    service et peut échouer selon son taux d'erreur.
+    """
+
+    def __init__(self, fixtures: Dict, latency: Dict[str, float], errors: Dict[str, float], seed: int = 0):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.errors = errors
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.rpc_hosts = {URL(url).host: chain for chain, urls in bot.PROVIDERS.items() for url in urls}
+        self.explorer_hosts = {URL(config["url"]).host: chain for chain, config in bot.EXPLORERS.items()}
+        self.selectors = {selector: field for field, selector in bot.ERC20_SELECTORS.items()}
+        self.runner = None
+        self.port = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route("*", "/{host}/{path:.*}", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    async def _delay(self, service: str) -> bool:
+        """Attend la latence simulée ; vrai si la réponse doit échouer"""
+        latency = self.latency.get(service, 0)
+        if latency:
+            await asyncio.sleep(latency * self.random.uniform(0.5, 1.5))
+        return self.random.random() < self.errors.get(service, 0)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        host = request.match_info["host"]
+        if host in self.rpc_hosts:
+            return await self._handle_rpc(request, self.rpc_hosts[host])
+        if host in self.explorer_hosts:
+            return await self._handle_explorer(request, self.explorer_hosts[host])
+        if host in LAUNCHPAD_HOSTS:
+            return await self._handle_launchpad(request, LAUNCHPAD_HOSTS[host])
+        if host == SUBGRAPH_HOST:
+            return await self._handle_subgraph(request)
+        self.calls[f"unknown:{host}"] += 1
+        return web.Response(status=404)
+
+    # Explorateur (API compatible Etherscan)
+
+    async def _handle_explorer(self, request: web.Request, chain: str) -> web.Response:
+        params = request.query
+        action = params.get("action", "")
+        self.calls[f"explorer:{action}"] += 1
+        if await self._delay("explorer"):
+            return web.json_response({"status": "0", "message": "NOTOK", "result": "Max rate limit reached"})
+
+        explorer = self.fixtures["explorer"] if chain == self.fixtures["chain"] else {}
+        if action == "getcontractcreation":
+            results = [
+                explorer.get("getcontractcreation", {}).get(address.lower())
+                for address in params.get("contractaddresses", "").split(",")
+            ]
+            results = [result for result in results if result]
+        elif action == "txlist":
+            results = list(explorer.get("txlist", {}).get(params.get("address", "").lower(), []))
+            results.sort(key=lambda tx: int(tx["timeStamp"]), reverse=params.get("sort") == "desc")
+            results = results[:int(params.get("offset", 10000))]
+        else:
+            results = []
+
+        if not results:
+            return web.json_response({"status": "0", "message": "No transactions found", "result": []})
+        return web.json_response({"status": "1", "message": "OK", "result": results})
+
+    # JSON-RPC
+
+    async def _handle_rpc(self, request: web.Request, chain: str) -> web.Response:
+        payload = await request.json()
+        calls = payload if isinstance(payload, list) else [payload]
+        for call in calls:
+            self.calls[f"rpc:{call.get('method')}"] += 1
+        if await self._delay("rpc"):
+            return web.Response(status=503, text="upstream unavailable")
+
+        responses = [self._rpc_response(call, chain) for call in calls]
+        return web.json_response(responses if isinstance(payload, list) else responses[0])
+
+    def _rpc_response(self, call: Dict, chain: str) -> Dict:
+        response = {"jsonrpc": "2.0", "id": call.get("id")}
+        method, params = call.get("method"), call.get("params", [])
+        tokens = self.fixtures["tokens"] if chain == self.fixtures["chain"] else {}
+
+        if method == "eth_chainId":
+            response["result"] = hex(bot.CHAIN_IDS[chain])
+        elif method == "eth_getCode":
+            response["result"] = "0x6080" if params[0].lower() in tokens else "0x"
+        elif method == "eth_call":
+            to, data = params[0]["to"].lower(), params[0]["data"]
+            if to == bot.MULTICALL3_ADDRESS.lower() and data.startswith(bot.AGGREGATE3_SELECTOR):
+                (subcalls,) = decode(["(address,bool,bytes)[]"], bytes.fromhex(data[10:]))
+                results = []
+                for target, _, calldata in subcalls:
+                    value = self._erc20_value(tokens, target.lower(), "0x" + bytes(calldata).hex())
+                    results.append((value is not None, value or b""))
+                response["result"] = "0x" + encode(["(bool,bytes)[]"], [results]).hex()
+            else:
+                value = self._erc20_value(tokens, to, data)
+                if value is None:
+                    response["error"] = {"code": -32000, "message": "execution reverted"}
+                else:
+                    response["result"] = "0x" + value.hex()
+        else:
+            response["error"] = {"code": -32601, "message": f"méthode non rejouée: {method}"}
+        return response
+
+    def _erc20_value(self, tokens: Dict, address: str, calldata: str) -> Optional[bytes]:
+        token = tokens.get(address)
+        field = self.selectors.get(calldata[:10])
+        if token is None or field is None:
+            return None
+        if field in ("name", "symbol"):
+            return encode(["string"], [token[field]])
+        return encode(["uint256"], [int(token[field])])
+
+    # Launchpads et subgraph
+
+    async def _handle_launchpad(self, request: web.Request, platform: str) -> web.Response:
+        self.calls[f"launchpad:{platform}"] += 1
+        if await self._delay("launchpad"):
+            return web.Response(status=502, text="bad gateway")
+        address = request.match_info["path"].rstrip("/").rsplit("/", 1)[-1].lower()
+        if address in self.fixtures["launchpads"].get(platform, []):
+            return web.json_response({"address": address, "platform": platform})
+        return web.json_response({"error": "not found"}, status=404)
+
+    async def _handle_subgraph(self, request: web.Request) -> web.Response:
+        self.calls["subgraph:query"] += 1
+        payload = await request.json() if request.can_read_body else {}
+        if await self._delay("subgraph"):
+            return web.json_response({"errors": [{"message": "indexer unavailable"}]}, status=500)
+        token = None
+        for address in self.fixtures["subgraph"]:
+            if f'"{address}"' in payload.get("query", ""):
+                token = {"id": address, "symbol": self.fixtures["tokens"][address]["symbol"]}
+        return web.json_response({"data": {"token": token}})
+
+def replay_request_class(port: int):
+    """Classe de requête aiohttp qui redirige toutes les URL vers le serveur local.
+
+    https://api.basescan.org/api?... devient http://127.0.0.1:<port>/api.basescan.org/api?...
+    Les TraceConfig de la session voient toujours l'URL d'origine.
+    """
+    class ReplayRequest(aiohttp.ClientRequest):
+        def __init__(self, method: str, url: URL, *args, **kwargs):
+            url = URL(f"http://127.0.0.1:{port}/{url.host}{url.raw_path_qs}", encoded=True)
+            super().__init__(method, url, *args, **kwargs)
+
+    return ReplayRequest
+
+def create_analyzer(port: int, shared_cache: bool) -> bot.TokenAnalyzer:
+    """Analyseur branché sur le serveur de rejeu.
+
+    Sans cache partagé, chaque analyse repart de zéro (cache désactivé) ;
+    sinon le cache mémoire est commun à toutes les analyses du banc.
+    """
+    cache = bot.TokenCache(path=None, max_entries=bot.CACHE_MEMORY_ENTRIES if shared_cache else 0)
+    analyzer = bot.TokenAnalyzer(cache=cache)
+    connector = aiohttp.TCPConnector(
+        limit=bot.HTTP_CONNECTION_LIMIT,
+        limit_per_host=bot.HTTP_CONNECTIONS_PER_HOST,
+        keepalive_timeout=bot.HTTP_KEEPALIVE_TIMEOUT,
+    )
+    analyzer.session = aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=30),
+        connector=connector,
+        trace_configs=[bot.create_http_trace_config()],
+        request_class=replay_request_class(port),
+    )
+    analyzer.explorer = bot.ExplorerClient(analyzer.session)
+    return analyzer
+
+# Faux objets Telegram pour le mode handler
+
+class FakeMessage:
+    def __init__(self, text: str = "", stats: Counter = None):
+        self.text = text
+        self.stats = stats
+
+    async def reply_text(self, text: str, **kwargs) -> "FakeMessage":
+        self.stats["telegram:reply"] += 1
+        return FakeMessage(text, self.stats)
+
+    async def edit_text(self, text: str, **kwargs) -> "FakeMessage":
+        self.stats["telegram:edit"] += 1
+        self.text = text
+        return self
+
+def fake_update(user_id: int, text: str, stats: Counter) -> SimpleNamespace:
+    return SimpleNamespace(
+        message=FakeMessage(text, stats),
+        effective_chat=SimpleNamespace(id=user_id),
+        effective_user=SimpleNamespace(id=user_id),
+    )
+
+# Exécution et rapport
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+async def run_benchmark(args) -> Dict:
+    with open(args.fixtures, encoding="utf-8") as f:
+        fixtures = json.load(f)
+
+    server = ReplayServer(fixtures, args.latency, args.errors, seed=args.seed)
+    await server.start()
+    analyzer = create_analyzer(server.port, args.shared_cache)
+    telegram_stats = Counter()
+    context = SimpleNamespace(application=SimpleNamespace(bot_data={
+        "analyzer": analyzer,
+        "analyses": bot.AnalysisRegistry(analyzer),
+        "scheduler": bot.AnalysisScheduler(),
+    }))
+
+    latencies, failures = [], Counter()
+    targets = fixtures["targets"]
+    picker = random.Random(args.seed)
+
+    async def user(user_id: int):
+        for _ in range(args.requests):
+            address = picker.choice(targets)
+            started_at = time.perf_counter()
+            try:
+                if args.mode == "handler":
+                    await bot.analyze_message(fake_update(user_id, f"check {address}", telegram_stats), context)
+                else:
+                    report, _ = await analyzer.analyze_token(address)
+                    if report.startswith("❌"):
+                        failures["report_error"] += 1
+            except Exception as e:
+                failures[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started_at)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    started_at = time.perf_counter()
+    try:
+        await asyncio.gather(*(user(user_id) for user_id in range(args.users)))
+    finally:
+        wall_time = time.perf_counter() - started_at
+        peak_traced = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+        tracemalloc.stop()
+        await analyzer.close_session()
+        await server.stop()
+
+    return {
+        "mode": args.mode,
+        "users": args.users,
+        "requests": len(latencies),
+        "wall_time": wall_time,
+        "throughput": len(latencies) / wall_time if wall_time else 0.0,
+        "latency": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies, default=0.0),
+        },
+        "failures": dict(failures),
+        "upstream_calls": dict(sorted(server.calls.items())),
+        "upstream_total": sum(server.calls.values()),
+        "telegram": dict(telegram_stats),
+        "memory": {
+            # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+            "traced_peak_mb": peak_traced / (1024 * 1024) if peak_traced is not None else None,
+        },
+    }
+
+def print_report(result: Dict):
+    latency = result["latency"]
+    print(f"\nMode {result['mode']} : {result['users']} utilisateurs, {result['requests']} analyses en {result['wall_time']:.2f}s "
+          f"({result['throughput']:.2f} analyses/s)")
+    print(f"Latence  p50 {latency['p50']:.3f}s  p95 {latency['p95']:.3f}s  p99 {latency['p99']:.3f}s  max {latency['max']:.3f}s")
+    if result["failures"]:
+        print("Échecs   " + ", ".join(f"{name}: {count}" for name, count in result["failures"].items()))
+    print(f"Appels externes ({result['upstream_total']}, {result['upstream_total'] / max(result['requests'], 1):.1f} par analyse)")
+    for name, count in result["upstream_calls"].items():
+        print(f"  {name:<32} {count}")
+    if result["telegram"]:
+        print("Telegram " + ", ".join(f"{name}: {count}" for name, count in sorted(result["telegram"].items())))
+    memory = result["memory"]
+    line = f"Mémoire  RSS max {memory['max_rss_mb']:.1f} Mo"
+    if memory["traced_peak_mb"] is not None:
+        line += f", pic Python {memory['traced_peak_mb']:.1f} Mo"
+    print(line)
+
+def check_regression(result: Dict, baseline_path: str, tolerance: float) -> List[str]:
+    """Compare au résultat de référence ; renvoie la liste des régressions"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for pct in ("p50", "p95", "p99"):
+        before, after = baseline["latency"][pct], result["latency"][pct]
+        if after > before * (1 + tolerance):
+            regressions.append(f"latence {pct}: {before:.3f}s -> {after:.3f}s")
+
+    before = baseline["upstream_total"] / max(baseline["requests"], 1)
+    after = result["upstream_total"] / max(result["requests"], 1)
+    if after > before * (1 + tolerance):
+        regressions.append(f"appels externes par analyse: {before:.1f} -> {after:.1f}")
+    return regressions
+
+def parse_rates(value: str) -> Dict[str, float]:
+    """Analyse "explorer=0.2,rpc=0.05" ; une valeur seule s'applique à tous les services"""
+    rates = {}
+    for item in value.split(","):
+        if "=" in item:
+            service, rate = item.split("=", 1)
+            rates[service.strip()] = float(rate)
+        elif item.strip():
+            rates.update({service: float(item) for service in DEFAULT_LATENCY})
+    return rates
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai hors ligne de l'analyse de tokens")
+    parser.add_argument("--mode", choices=["analyzer", "handler"], default="analyzer",
+                        help="analyze_token direct, ou handler Telegram (file d'attente, partage, éditions)")
+    parser.add_argument("--users", type=int, default=10, help="utilisateurs simultanés")
+    parser.add_argument("--requests", type=int, default=5, help="analyses successives par utilisateur")
+    parser.add_argument("--latency", type=parse_rates, default={}, help="latence par service, ex. explorer=0.3,rpc=0.05")
+    parser.add_argument("--errors", type=parse_rates, default={}, help="taux d'erreur par service, ex. launchpad=0.1")
+    parser.add_argument("--shared-cache", action="store_true", help="cache mémoire commun aux analyses (désactivé par défaut)")
+    parser.add_argument("--trace-memory", action="store_true", help="mesure le pic d'allocation Python (plus lent)")
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="écrit le résultat dans ce fichier")
+    parser.add_argument("--baseline", help="résultat de référence (--json d'un run précédent)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="dégradation tolérée par rapport à la référence")
+    args = parser.parse_args()
+    args.latency = {**DEFAULT_LATENCY, **args.latency}
+    args.errors = {**DEFAULT_ERRORS, **args.errors}
+
+    # Le bot journalise chaque échec simulé : seuls les avertissements importants restent
+    bot.logger.setLevel("ERROR")
+
+    result = asyncio.run(run_benchmark(args))
+    print_report(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        regressions = check_regression(result, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"⚠️ Régression {regression}")
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
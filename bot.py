@@ -1,10 +1,29 @@
+import io
 import os
 import re
+import csv
+import sys
+import json
+import time
+import signal
+import socket
+import html
+import hashlib
+import sqlite3
 import asyncio
+import threading
+import contextvars
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict, deque
+from types import SimpleNamespace
 from datetime import datetime
-from typing import List, Dict, Optional
+from urllib.parse import quote, urlsplit
+from typing import AsyncIterator, List, Dict, Optional
 import logging
 
+# Référence du démarrage à froid : durée des imports, disponibilité, premier message
+STARTED_AT = time.monotonic()
+
 # Configuration du logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -13,482 +32,3603 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 import aiohttp
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-from web3 import Web3
-from eth_utils import is_address
+from aiohttp import web
+from telegram import (
+    Update, InlineKeyboardButton, InlineKeyboardMarkup, InputFile,
+    InlineQueryResultArticle, InlineQueryResultsButton, InputTextMessageContent
+)
+from telegram.error import BadRequest, RetryAfter
+from telegram.ext import (
+    Application, BaseUpdateProcessor, CallbackQueryHandler, CommandHandler, InlineQueryHandler, MessageHandler, filters, ContextTypes
+)
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # backend Redis optionnel (REDIS_URL)
+    redis_asyncio = None
+
+# eth_abi et eth_utils coûtent ~250 ms d'import : ils sont chargés à la
+# première utilisation, ou en arrière-plan par warmup() dès le démarrage,
+# pour que /start réponde sans les attendre
+def _eth_abi():
+    import eth_abi
+    return eth_abi
+
+def is_address(value) -> bool:
+    from eth_utils import is_address as _is_address
+    return _is_address(value)
+
+def to_checksum_address(value) -> str:
+    from eth_utils import to_checksum_address as _to_checksum_address
+    return _to_checksum_address(value)
+
+def _load_eth_modules():
+    import eth_abi, eth_utils  # noqa: F401
+
+# Étapes du démarrage, en secondes depuis STARTED_AT (voir /stats et /metrics)
+STARTUP_TIMINGS = {"imports": time.monotonic() - STARTED_AT}
 
 # Configuration
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "8285852300:AAH0bsgjQhve6IhcX04T9xGZjaY_8nyCdGU")
 ETHERSCAN_API_KEY = os.getenv("ETHERSCAN_API_KEY", "GTDF3H4BDJIWGUMIW6CXDQWRH4Q9HAYEJ5")
 BASESCAN_API_KEY = os.getenv("BASESCAN_API_KEY", "GTDF3H4BDJIWGUMIW6CXDQWRH4Q9HAYEJ5")
+# Plusieurs clés possibles, séparées par des virgules, pour répartir la charge
+ETHERSCAN_API_KEYS = [key.strip() for key in ETHERSCAN_API_KEY.split(",") if key.strip()]
+BASESCAN_API_KEYS = [key.strip() for key in BASESCAN_API_KEY.split(",") if key.strip()]
 INFURA_KEY = os.getenv("INFURA_KEY", "703284f78ae24e16a723f8f837832fde")
 
-# Web3 providers
+# Endpoints RPC par chaîne, du préféré au moins préféré ; RPC_URLS_<CHAINE>
+# (ex. RPC_URLS_BASE, URLs séparées par des virgules) remplace la liste
 PROVIDERS = {
-    "ethereum": f"https://mainnet.infura.io/v3/{INFURA_KEY}",
-    "base": "https://mainnet.base.org",
-    "arbitrum": "https://arb1.arbitrum.io/rpc",
-    "optimism": "https://mainnet.optimism.io",
+    "ethereum": [
+        f"https://mainnet.infura.io/v3/{INFURA_KEY}",
+        "https://ethereum-rpc.publicnode.com",
+        "https://eth.llamarpc.com",
+    ],
+    "base": [
+        "https://mainnet.base.org",
+        "https://base-rpc.publicnode.com",
+        "https://base.llamarpc.com",
+    ],
+    "arbitrum": [
+        "https://arb1.arbitrum.io/rpc",
+        "https://arbitrum-one-rpc.publicnode.com",
+    ],
+    "optimism": [
+        "https://mainnet.optimism.io",
+        "https://optimism-rpc.publicnode.com",
+    ],
 }
+for _chain in PROVIDERS:
+    _urls = [url.strip() for url in os.getenv(f"RPC_URLS_{_chain.upper()}", "").split(",") if url.strip()]
+    if _urls:
+        PROVIDERS[_chain] = _urls
 
-class TokenAnalyzer:
-    def __init__(self):
-        self.session = None
-        
-    async def init_session(self):
-        if not self.session:
-            timeout = aiohttp.ClientTimeout(total=30)
-            self.session = aiohttp.ClientSession(timeout=timeout)
+# Explorateurs de blocs (API compatibles Etherscan)
+EXPLORERS = {
+    "base": {"url": "https://api.basescan.org/api", "keys": BASESCAN_API_KEYS},
+    "ethereum": {"url": "https://api.etherscan.io/api", "keys": ETHERSCAN_API_KEYS},
+}
+EXPLORER_RATE_LIMIT = float(os.getenv("EXPLORER_RATE_LIMIT", "5"))  # requêtes/s par clé
+EXPLORER_MAX_RETRIES = 3
+EXPLORER_BACKOFF = 0.5  # secondes, doublé à chaque nouvel essai
+
+# Durée (secondes) pendant laquelle une analyse terminée est réutilisée telle quelle
+ANALYSIS_FRESHNESS = int(os.getenv("ANALYSIS_FRESHNESS", "60"))
+
+# Intervalle minimum (secondes) entre deux éditions d'un même message Telegram
+TELEGRAM_EDIT_INTERVAL = float(os.getenv("TELEGRAM_EDIT_INTERVAL", "1.0"))
+
+# Ordonnancement des analyses : concurrence maximale, taille de la file
+# d'attente et nombre de demandes simultanées autorisées par utilisateur
+MAX_CONCURRENT_ANALYSES = int(os.getenv("MAX_CONCURRENT_ANALYSES", "8"))
+ANALYSIS_QUEUE_SIZE = int(os.getenv("ANALYSIS_QUEUE_SIZE", "50"))
+MAX_ANALYSES_PER_USER = int(os.getenv("MAX_ANALYSES_PER_USER", "2"))
+# Intervalle (secondes) de mise à jour de la position affichée aux demandes en attente
+QUEUE_UPDATE_INTERVAL = float(os.getenv("QUEUE_UPDATE_INTERVAL", "3"))
+
+# Analyse groupée (/batch et mode inline) : nombre maximum d'adresses par
+# demande et délai de réponse d'une requête inline (Telegram l'abandonne au-delà)
+BATCH_MAX_ADDRESSES = int(os.getenv("BATCH_MAX_ADDRESSES", "20"))
+INLINE_QUERY_TIMEOUT = float(os.getenv("INLINE_QUERY_TIMEOUT", "8"))
+# Lots inline distincts qui peuvent continuer en arrière-plan après le délai
+INLINE_MAX_BACKGROUND = int(os.getenv("INLINE_MAX_BACKGROUND", "10"))
+
+# Mode webhook : avec WEBHOOK_URL (URL publique du service), le bot reçoit les
+# mises à jour sur un serveur aiohttp et peut tourner en plusieurs réplicas
+# derrière un load balancer ; sans elle, il reste en polling
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").rstrip("/")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_PORT = int(os.getenv("PORT", "8080"))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+# Identique sur tous les réplicas : dérivé du token si non fourni
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or hashlib.sha256(TELEGRAM_BOT_TOKEN.encode()).hexdigest()[:32]
+
+# Backend partagé entre réplicas (cache et analyses en cours). Sans
+# REDIS_URL, un stand-in en mémoire limité au processus est utilisé.
+REDIS_URL = os.getenv("REDIS_URL")
+SHARED_BACKEND_PREFIX = os.getenv("SHARED_BACKEND_PREFIX", "tokenbot:")
+REPLICA_ID = os.getenv("RAILWAY_REPLICA_ID") or f"{socket.gethostname()}-{os.getpid()}"
+ANALYSIS_CLAIM_TTL = 120  # secondes ; un réplica arrêté en cours d'analyse est relayé après ce délai
+REMOTE_POLL_INTERVAL = 0.5  # secondes entre deux lectures d'une analyse d'un autre réplica
+
+# Les mises à jour d'un même chat sont traitées dans leur ordre d'arrivée ; un
+# handler encore en cours après ce délai (analyse longue) ne bloque plus les suivants
+CHAT_ORDER_TIMEOUT = float(os.getenv("CHAT_ORDER_TIMEOUT", "3"))
+
+# Pool de connexions HTTP partagé par toutes les analyses
+HTTP_CONNECTION_LIMIT = int(os.getenv("HTTP_CONNECTION_LIMIT", "100"))
+HTTP_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_CONNECTIONS_PER_HOST", "20"))
+HTTP_DNS_CACHE_TTL = 300
+HTTP_KEEPALIVE_TIMEOUT = 60
+
+# Préchauffage lancé en arrière-plan après le démarrage : imports eth_abi,
+# connexions ouvertes vers chaque service et vérification du chainId de
+# chaque PROVIDERS (une erreur est loguée si un noeud ne répond pas ou sert
+# une autre chaîne)
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") != "0"
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "10"))
+CHAIN_IDS = {"ethereum": 1, "base": 8453, "arbitrum": 42161, "optimism": 10}
+# Hôtes des API de plateformes interrogées à chaque analyse (voir _check_*)
+WARMUP_URLS = [
+    "https://www.clanker.world",
+    "https://ape.store",
+    "https://klik.network",
+    "https://wow.xyz",
+    "https://api.studio.thegraph.com",
+]
+
+# Cache persistant : sur Railway, pointer CACHE_PATH vers le volume monté
+CACHE_PATH = os.getenv(
+    "CACHE_PATH",
+    os.path.join(os.getenv("RAILWAY_VOLUME_MOUNT_PATH", "."), "token_cache.sqlite")
+)
+CACHE_MEMORY_ENTRIES = int(os.getenv("CACHE_MEMORY_ENTRIES", "5000"))
+# Nombre d'entrées récentes du cache disque chargées en mémoire au démarrage
+CACHE_PRELOAD = int(os.getenv("CACHE_PRELOAD", "0"))
+
+# Durée de vie (secondes) par type de donnée ; None = donnée on-chain immuable
+CACHE_TTLS = {
+    "token_meta": None,
+    "creation": None,
+    "funders": None,
+    "txlist": 600,
+    "platform": 3600,
+    "chains": 86400,
+    # Réponse négative d'une API de plateforme ("pas sur Clanker") : courte,
+    # un token récent peut y apparaître quelques minutes après son déploiement
+    "platform_miss": 300,
+    # Contrat qui ne répond pas comme un ERC20 (dans les listes de contrats
+    # d'un déployeur) : un proxy pas encore initialisé peut le devenir
+    "not_erc20": int(os.getenv("NOT_ERC20_CACHE_TTL", "3600")),
+    # Sections de rapport déjà rendues, par adresse et par section
+    "section": int(os.getenv("SECTION_CACHE_TTL", "600")),
+}
+
+# Parcours du graphe de financement : profondeur, financeurs suivis par
+# wallet et nombre total de wallets explorés
+FUNDING_MAX_DEPTH = int(os.getenv("FUNDING_MAX_DEPTH", "3"))
+FUNDING_MAX_FANOUT = int(os.getenv("FUNDING_MAX_FANOUT", "2"))
+FUNDING_MAX_WALLETS = int(os.getenv("FUNDING_MAX_WALLETS", "20"))
+
+# Étiquettes de wallets connus (CEX, bridges) où le parcours s'arrête
+WALLET_LABELS_PATH = os.getenv(
+    "WALLET_LABELS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "wallet_labels.json")
+)
+
+def load_wallet_labels(path: str) -> Dict[str, str]:
+    """Charge un fichier d'étiquettes {adresse: nom} ; adresses en minuscules"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {address.lower(): label for address, label in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.error(f"Fichier d'étiquettes illisible ({path}): {e}")
+        return {}
+
+WALLET_LABELS = load_wallet_labels(WALLET_LABELS_PATH)
+
+# Indexeur local des créations de contrats (optionnel). INDEXER_RPC_URL permet
+# de le pointer vers un noeud local (anvil/hardhat) pour les tests.
+# Un seul processus écrit dans INDEXER_PATH : par défaut le bot lui-même
+# (INDEXER_ENABLED=1). Avec INDEXER_READ_ONLY=1, le bot se contente de lire
+# le fichier tenu à jour par un processus séparé `python bot.py index`.
+INDEXER_ENABLED = os.getenv("INDEXER_ENABLED", "0") == "1"
+INDEXER_READ_ONLY = os.getenv("INDEXER_READ_ONLY", "0") == "1"
+INDEXER_CHAIN = os.getenv("INDEXER_CHAIN", "base")
+INDEXER_RPC_URL = os.getenv("INDEXER_RPC_URL")
+INDEXER_PATH = os.getenv(
+    "INDEXER_PATH",
+    os.path.join(os.getenv("RAILWAY_VOLUME_MOUNT_PATH", "."), "contract_index.sqlite")
+)
+INDEXER_START_BLOCK = os.getenv("INDEXER_START_BLOCK")  # vide = tête de chaîne au premier démarrage
+INDEXER_BATCH_BLOCKS = int(os.getenv("INDEXER_BATCH_BLOCKS", "20"))
+INDEXER_CONFIRMATIONS = int(os.getenv("INDEXER_CONFIRMATIONS", "3"))
+INDEXER_POLL_INTERVAL = float(os.getenv("INDEXER_POLL_INTERVAL", "2"))
+
+# Usines de launchpads connues {adresse: plateforme}, fichier optionnel
+LAUNCHPAD_FACTORIES_PATH = os.getenv(
+    "LAUNCHPAD_FACTORIES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "launchpad_factories.json")
+)
+LAUNCHPAD_FACTORIES = load_wallet_labels(LAUNCHPAD_FACTORIES_PATH)
+
+# Transfer(address,address,uint256) : un premier mint depuis 0x0 signale un nouveau token
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+ZERO_TOPIC = "0x" + "0" * 64
+
+# Surveillance des nouveaux tokens (/watch) : désactivée par défaut, elle
+# interroge la chaîne en continu et analyse chaque nouveau token
+WATCH_ENABLED = os.getenv("WATCH_ENABLED", "0") == "1"
+WATCH_CHAIN = os.getenv("WATCH_CHAIN", "base")
+WATCH_WS_URL = os.getenv("WATCH_WS_URL")  # optionnel : newHeads via websocket au lieu du polling seul
+WATCH_SUBSCRIPTIONS_PATH = os.getenv(
+    "WATCH_SUBSCRIPTIONS_PATH",
+    os.path.join(os.getenv("RAILWAY_VOLUME_MOUNT_PATH", "."), "watch_subscriptions.json")
+)
+WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "2"))
+WATCH_MAX_RANGE = int(os.getenv("WATCH_MAX_RANGE", "50"))
+WATCH_WORKERS = int(os.getenv("WATCH_WORKERS", "4"))
+WATCH_QUEUE_SIZE = int(os.getenv("WATCH_QUEUE_SIZE", "200"))
+WATCH_SEEN_TOKENS = 100000
+
+# Chaîne utilisée quand la détection est impossible (aucun RPC joignable)
+DEFAULT_CHAIN = "base"
+CHAIN_PROBE_TIMEOUT = 5
+
+# Liens par chaîne : explorateur de blocs et identifiant GMGN (None si non supporté)
+CHAIN_EXPLORERS = {
+    "ethereum": ("Etherscan", "https://etherscan.io"),
+    "base": ("Basescan", "https://basescan.org"),
+    "arbitrum": ("Arbiscan", "https://arbiscan.io"),
+    "optimism": ("Optimism Explorer", "https://optimistic.etherscan.io"),
+}
+GMGN_CHAINS = {
+    "ethereum": "eth",
+    "base": "base",
+}
+
+# Multicall3 est déployé à la même adresse sur toutes les chaînes supportées
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+AGGREGATE3_SELECTOR = "0x82ad56cb"
+
+# Nombre maximum de sous-appels par Multicall3 (limite de gas des eth_call)
+MULTICALL_BATCH_SIZE = 100
+
+# Sélecteurs ERC20 (4 premiers octets du keccak de la signature)
+ERC20_SELECTORS = {
+    "name": "0x06fdde03",
+    "symbol": "0x95d89b41",
+    "decimals": "0x313ce567",
+    "totalSupply": "0x18160ddd",
+}
+
+# Délai maximum (secondes) de chaque étape de l'analyse
+STAGE_TIMEOUTS = {
+    "token_info": 8,
+    "platform": 15,
+    "creation": 8,
+    "deployer_tokens": 15,
+    "funder": 8,
+    "funding_graph": 25,
+}
+
+# Sections du rapport, dans l'ordre d'affichage, avec leur titre
+SECTION_TITLES = {
+    "token": "📊 INFORMATIONS DU TOKEN",
+    "platform": "🌐 PLATEFORME DE CRÉATION",
+    "deployer": "👤 ANALYSE DU DÉPLOYEUR",
+    "funder": "💰 WALLET DE FINANCEMENT",
+    "cluster": "🕸️ CLUSTER DE FINANCEMENT",
+}
+SECTION_PENDING = "⏳ Recherche en cours..."
+
+# Format des rapports envoyés à Telegram : "HTML" ou "MarkdownV2"
+REPORT_PARSE_MODE = os.getenv("REPORT_PARSE_MODE", "HTML")
+
+# Taille maximale d'un message Telegram ; au-delà le rapport est paginé
+TELEGRAM_MESSAGE_LIMIT = 4096
+REPORT_PAGES_TTL = 86400  # secondes pendant lesquelles les boutons de pagination restent utilisables
+
+# Marqueur renvoyé par une étape qui a dépassé son délai
+TIMED_OUT = object()
+TIMED_OUT_MESSAGE = "Délai dépassé, données non disponibles"
+
+# Marqueur renvoyé par une recherche dont la source (explorateur) a échoué :
+# jamais mis en cache, et la section qui l'affiche reste incomplète
+FAILED = object()
+FAILED_MESSAGE = "Explorateur indisponible, données non disponibles"
+
+# Détecteurs de plateforme, par ordre de priorité. "check" est le nom de la
+# méthode de TokenAnalyzer à appeler ; les détecteurs "local" travaillent sur
+# les premières transactions du contrat, sans appel réseau supplémentaire.
+PLATFORM_DETECTORS = [
+    {"name": "Zora", "check": "_check_zora", "local": True, "url": "https://zora.co/collect/base:{address}"},
+    {"name": "Clanker", "check": "_check_clanker", "url": "https://www.clanker.world/clanker/{address}"},
+    {"name": "Ape.store", "check": "_check_ape_store", "url": "https://ape.store/base/{address}"},
+    {"name": "Klik", "check": "_check_klik", "url": "https://klik.network/token/{address}"},
+    {"name": "WOW", "check": "_check_wow", "url": "https://wow.xyz/token/base/{address}"},
+    # Uniswap en dernier : la plupart des tokens de launchpad y ont aussi une pool
+    {"name": "Uniswap", "check": "_check_uniswap", "url": "https://app.uniswap.org/explore/tokens/{chain}/{address}"},
+]
+
+# Disjoncteurs des API de plateformes : sur les BREAKER_WINDOW derniers appels,
+# le circuit s'ouvre quand la part d'échecs (erreurs ou appels plus lents que
+# BREAKER_SLOW_CALL secondes) atteint BREAKER_ERROR_RATE. Le service est alors
+# ignoré pendant BREAKER_COOLDOWN secondes, puis testé par un seul appel.
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "10"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "3"))
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_SLOW_CALL = float(os.getenv("BREAKER_SLOW_CALL", "3"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "60"))
+
+# Pool d'endpoints RPC par chaîne : chaque requête part vers le noeud au
+# meilleur score (latence glissante, taux d'échec, requêtes en cours). Sans
+# réponse au bout du p90 des latences observées, elle est doublée vers le
+# noeud suivant (hedging) et la première réponse l'emporte. Un noeud trop
+# souvent en échec ou lent est écarté RPC_EJECT_COOLDOWN secondes (disjoncteur).
+RPC_LATENCY_WINDOW = 200  # latences retenues par chaîne pour le p90
+RPC_HEDGE_MIN_SAMPLES = 20  # en dessous, RPC_HEDGE_DELAY sert de délai
+RPC_HEDGE_DELAY = float(os.getenv("RPC_HEDGE_DELAY", "1.0"))
+RPC_HEDGE_MIN_DELAY = 0.05
+RPC_MAX_HEDGES = int(os.getenv("RPC_MAX_HEDGES", "1"))  # requêtes doublées au plus par appel
+RPC_LATENCY_ALPHA = 0.3  # poids de la dernière mesure dans la latence glissante
+RPC_ERROR_PENALTY = 5.0  # secondes ajoutées au score pour 100 % d'échecs
+RPC_SLOW_CALL = float(os.getenv("RPC_SLOW_CALL", "5"))
+RPC_EJECT_COOLDOWN = float(os.getenv("RPC_EJECT_COOLDOWN", "60"))
+
+# Observabilité : serveur local /metrics (désactivé si METRICS_PORT est vide)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = os.getenv("METRICS_PORT", "9100")
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+TRACE_HISTORY = int(os.getenv("TRACE_HISTORY", "50"))
+# /debug montre toutes les traces aux administrateurs (ids Telegram séparés
+# par des virgules) ; les autres chats ne voient que leurs propres analyses
+ADMIN_USER_IDS = {int(user_id) for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id.strip()}
+
+class Trace:
+    """Spans d'une analyse : étapes, appels HTTP/RPC et accès au cache"""
     
-    async def close_session(self):
-        if self.session:
-            await self.session.close()
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = time.monotonic()
+        self.duration = None
+        self.spans = []
+        # Faux si une section du rapport manque (délai dépassé) : le rapport
+        # n'est alors pas réutilisé pour les demandes suivantes
+        self.complete = True
     
-    def detect_chain(self, address: str) -> str:
-        """Détecte la chaîne (pour l'instant on assume BASE)"""
-        return "base"
+    def add(self, kind: str, name: str, started_at: float, duration: float, **attrs):
+        self.spans.append({
+            "kind": kind,
+            "name": name,
+            "offset": started_at - self.started_at,
+            "duration": duration,
+            **attrs
+        })
     
-    async def get_token_info(self, address: str, chain: str) -> Dict:
-        """Récupère les informations basiques du token"""
+    def finish(self):
+        self.duration = time.monotonic() - self.started_at
+
+# Trace de l'analyse en cours ; les tâches créées pendant l'analyse en héritent
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+class Metrics:
+    """Histogrammes et compteurs exposés au format texte Prometheus"""
+    
+    HELP = {
+        "upstream_request_duration_seconds": "Durée des appels HTTP/RPC vers les services externes",
+        "analysis_stage_duration_seconds": "Durée des étapes de l'analyse",
+        "analysis_duration_seconds": "Durée totale d'une analyse",
+        "cache_requests_total": "Accès au cache par type et résultat",
+        "startup_seconds": "Étapes du démarrage, en secondes depuis le lancement du processus",
+        "rpc_provider_up": "Endpoints PROVIDERS joignables et sur la bonne chaîne au démarrage",
+        "circuit_breaker_transitions_total": "Changements d'état des disjoncteurs par service",
+        "rpc_hedged_requests_total": "Requêtes RPC doublées vers un second noeud faute de réponse au p90",
+        "rpc_failovers_total": "Requêtes RPC relancées sur un autre noeud après un échec",
+    }
+    
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self.counters = Counter()
+        self.gauges = {}
+    
+    @staticmethod
+    def _labels(labels: Dict) -> tuple:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+    
+    def observe(self, name: str, value: float, **labels):
+        key = (name, self._labels(labels))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+    
+    def inc(self, name: str, **labels):
+        self.counters[(name, self._labels(labels))] += 1
+    
+    def set(self, name: str, value: float, **labels):
+        self.gauges[(name, self._labels(labels))] = value
+    
+    @staticmethod
+    def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+        pairs = [f'{key}="{value}"' for key, value in labels + extra]
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+    
+    def render(self) -> str:
+        lines = []
+        for metric in sorted({name for name, _ in self.histograms}):
+            lines.append(f"# HELP {metric} {self.HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {metric} histogram")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name != metric:
+                    continue
+                for bound, count in zip(self.buckets, histogram["buckets"]):
+                    lines.append(f"{name}_bucket{self._format_labels(labels, (('le', str(bound)),))} {count}")
+                lines.append(f"{name}_bucket{self._format_labels(labels, (('le', '+Inf'),))} {histogram['count']}")
+                lines.append(f"{name}_sum{self._format_labels(labels)} {histogram['sum']:.6f}")
+                lines.append(f"{name}_count{self._format_labels(labels)} {histogram['count']}")
+        for metric in sorted({name for name, _ in self.counters}):
+            lines.append(f"# HELP {metric} {self.HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {metric} counter")
+            for (name, labels), value in sorted(self.counters.items()):
+                if name == metric:
+                    lines.append(f"{name}{self._format_labels(labels)} {value}")
+        for metric in sorted({name for name, _ in self.gauges}):
+            lines.append(f"# HELP {metric} {self.HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {metric} gauge")
+            for (name, labels), value in sorted(self.gauges.items()):
+                if name == metric:
+                    lines.append(f"{name}{self._format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+metrics.set("startup_seconds", STARTUP_TIMINGS["imports"], phase="imports")
+
+def record_startup(phase: str) -> float:
+    """Note le moment où une étape du démarrage est atteinte (secondes depuis STARTED_AT)"""
+    elapsed = STARTUP_TIMINGS[phase] = time.monotonic() - STARTED_AT
+    metrics.set("startup_seconds", elapsed, phase=phase)
+    return elapsed
+
+def record_span(kind: str, name: str, started_at: float, **attrs):
+    """Enregistre un span dans la trace courante (s'il y en a une)"""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(kind, name, started_at, time.monotonic() - started_at, **attrs)
+
+async def _on_request_start(session, trace_ctx, params):
+    trace_ctx.started_at = time.monotonic()
+
+async def _on_request_end(session, trace_ctx, params):
+    _record_request(trace_ctx, params.method, params.url, str(params.response.status))
+
+async def _on_request_exception(session, trace_ctx, params):
+    _record_request(trace_ctx, params.method, params.url, type(params.exception).__name__)
+
+def _request_label(trace_ctx, url) -> str:
+    """Nom d'un appel pour /debug : hôte et méthode JSON-RPC ou action d'explorateur.
+    
+    Jamais le chemin ni la query : la clé Infura est dans le chemin, les
+    clés d'explorateur dans la query.
+    """
+    label = getattr(trace_ctx.trace_request_ctx, "label", None) or url.query.get("action")
+    return f"{url.host} {label}" if label else url.host
+
+def _record_request(trace_ctx, method: str, url, status: str):
+    duration = time.monotonic() - trace_ctx.started_at
+    metrics.observe("upstream_request_duration_seconds", duration, host=url.host, status=status)
+    record_span("http", f"{method} {_request_label(trace_ctx, url)}", trace_ctx.started_at, host=url.host, status=status)
+
+def create_http_trace_config() -> aiohttp.TraceConfig:
+    """Mesure chaque appel HTTP/RPC de la session (hôte, statut, durée)"""
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_request_end.append(_on_request_end)
+    trace_config.on_request_exception.append(_on_request_exception)
+    return trace_config
+
+class RPCError(Exception):
+    """Erreur renvoyée par un noeud JSON-RPC"""
+
+def _decode_string(data: bytes) -> str:
+    """Décode un retour string ABI, avec repli sur bytes32 (tokens non standards type MKR)"""
+    if len(data) == 32:
+        return data.rstrip(b"\x00").decode("utf-8", errors="replace")
+    try:
+        return _eth_abi().decode(["string"], data)[0].rstrip("\x00")
+    except Exception:
+        if len(data) >= 32:
+            return data[:32].rstrip(b"\x00").decode("utf-8", errors="replace")
+        raise ValueError("Retour string invalide")
+
+def _decode_uint(data: bytes) -> int:
+    """Décode un retour uint256 ABI"""
+    if len(data) < 32:
+        raise ValueError("Retour uint invalide")
+    return int.from_bytes(data[:32], "big")
+
+def _decode_decimals(data: bytes) -> int:
+    """Décode decimals() (uint8 dans la norme ERC20) ; rejette les valeurs hors bornes"""
+    decimals = _decode_uint(data)
+    if decimals > 255:
+        raise ValueError(f"decimals invalide: {decimals}")
+    return decimals
+
+def _valid_token_meta(meta: Optional[Dict]) -> bool:
+    """Écarte les métadonnées en cache antérieures à la validation de decimals"""
+    return bool(meta) and isinstance(meta.get("decimals"), int) and 0 <= meta["decimals"] <= 255
+
+class RPCClient:
+    """Client JSON-RPC asynchrone qui réutilise la session aiohttp de l'analyseur.
+    
+    Les requêtes passent par le pool d'endpoints de la chaîne (voir RPCPool).
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, pool: "RPCPool"):
+        self.session = session
+        self.pool = pool
+        self._next_id = 0
+
+    def _payload(self, method: str, params: list) -> Dict:
+        self._next_id += 1
+        return {"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params}
+
+    async def call(self, method: str, params: list, min_block: Optional[int] = None):
+        """Envoie un appel JSON-RPC unique (min_block : voir RPCPool.post)"""
+        data = await self.pool.post(self.session, self._payload(method, params), min_block)
+        if not isinstance(data, dict):
+            raise RPCError(f"Réponse inattendue: {data!r}")
+        if data.get("error"):
+            raise RPCError(data["error"].get("message", str(data["error"])))
+        return data.get("result")
+
+    async def batch(self, calls: List[tuple], min_block: Optional[int] = None) -> List:
+        """Envoie plusieurs appels dans un seul tableau JSON-RPC.
+
+        Renvoie les résultats dans l'ordre des appels ; un appel en échec
+        est remplacé par une instance de RPCError.
+        """
+        payloads = [self._payload(method, params) for method, params in calls]
+        data = await self.pool.post(self.session, payloads, min_block)
+        if not isinstance(data, list):
+            raise RPCError(f"Batch JSON-RPC non supporté: {data!r}")
+
+        by_id = {item.get("id"): item for item in data if isinstance(item, dict)}
+        results = []
+        for payload in payloads:
+            item = by_id.get(payload["id"], {})
+            if item.get("error") or "result" not in item:
+                results.append(RPCError(str(item.get("error", "réponse manquante"))))
+            else:
+                results.append(item["result"])
+        return results
+
+    async def eth_call(self, to: str, data: str):
+        return await self.call("eth_call", [{"to": to, "data": data}, "latest"])
+
+    async def multicall(self, calls: List[tuple]) -> List[tuple]:
+        """Agrège plusieurs eth_call (cible, calldata) en un seul Multicall3.aggregate3.
+
+        Chaque appel est autorisé à échouer : renvoie une liste de (succès, données).
+        """
+        encoded = _eth_abi().encode(
+            ["(address,bool,bytes)[]"],
+            [[(to_checksum_address(to), True, bytes.fromhex(data[2:])) for to, data in calls]]
+        )
+        raw = await self.eth_call(MULTICALL3_ADDRESS, AGGREGATE3_SELECTOR + encoded.hex())
         try:
-            w3 = Web3(Web3.HTTPProvider(PROVIDERS[chain]))
-            
-            # ABI minimal pour ERC20
-            erc20_abi = [
-                {"constant": True, "inputs": [], "name": "name", "outputs": [{"name": "", "type": "string"}], "type": "function"},
-                {"constant": True, "inputs": [], "name": "symbol", "outputs": [{"name": "", "type": "string"}], "type": "function"},
-                {"constant": True, "inputs": [], "name": "decimals", "outputs": [{"name": "", "type": "uint8"}], "type": "function"},
-                {"constant": True, "inputs": [], "name": "totalSupply", "outputs": [{"name": "", "type": "uint256"}], "type": "function"},
-            ]
-            
-            contract = w3.eth.contract(address=Web3.to_checksum_address(address), abi=erc20_abi)
-            
-            name = contract.functions.name().call()
-            symbol = contract.functions.symbol().call()
-            decimals = contract.functions.decimals().call()
-            total_supply = contract.functions.totalSupply().call()
-            
-            # Formater le total supply
-            total_supply_formatted = total_supply / (10 ** decimals)
-            
-            return {
-                "name": name,
-                "symbol": symbol,
-                "decimals": decimals,
-                "total_supply": f"{total_supply_formatted:,.0f}",
-                "address": address,
-                "chain": chain
-            }
+            (results,) = _eth_abi().decode(["(bool,bytes)[]"], bytes.fromhex(raw[2:]))
         except Exception as e:
-            logger.error(f"Erreur get_token_info: {e}")
-            return {"error": str(e)}
+            # "0x" si Multicall3 n'est pas déployé sur la chaîne (ou le fork)
+            raise RPCError(f"Retour Multicall3 illisible ({raw!r}): {e}")
+        return [(success, bytes(data)) for success, data in results]
+
+class PlatformUnavailable(Exception):
+    """API de plateforme en erreur (5xx, rate limit, réponse illisible)"""
+
+class ExplorerError(Exception):
+    """Échec d'une requête vers un explorateur de blocs"""
+
+class TokenBucket:
+    """Limiteur de débit à seau de jetons"""
     
-    async def detect_creation_platform(self, address: str, chain: str) -> Optional[Dict]:
-        """Détecte la plateforme de création du token en analysant les transactions"""
-        try:
-            # Récupérer les premières transactions du contrat
-            if chain == "base":
-                url = f"https://api.basescan.org/api"
-                api_key = BASESCAN_API_KEY
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+    
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+    
+    def wait_time(self) -> float:
+        """Délai avant qu'un jeton soit disponible"""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+    
+    def drain(self):
+        """Vide le seau après une réponse "rate limit" de l'API"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+class CircuitBreaker:
+    """Disjoncteur d'un service externe.
+    
+    - fermé : les appels passent et leur issue est suivie sur une fenêtre glissante ;
+    - ouvert : trop d'échecs ou d'appels lents, les appels sont refusés
+      pendant le cooldown ;
+    - semi-ouvert : après le cooldown, un seul appel test passe ; son succès
+      referme le circuit, son échec le rouvre.
+    """
+    
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+    
+    def __init__(self, name: str, window: int = BREAKER_WINDOW, min_calls: int = BREAKER_MIN_CALLS,
+                 error_rate: float = BREAKER_ERROR_RATE, slow_call: float = BREAKER_SLOW_CALL,
+                 cooldown: float = BREAKER_COOLDOWN):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.cooldown = cooldown
+        self.results = deque(maxlen=window)
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self._probing = False
+    
+    def _transition(self, state: str):
+        if state != self.state:
+            logger.warning(f"Disjoncteur {self.name}: {self.state} -> {state}")
+            metrics.inc("circuit_breaker_transitions_total", service=self.name, state=state)
+            self.state = state
+    
+    def _open(self):
+        self.opened_at = time.monotonic()
+        self.results.clear()
+        self._transition(self.OPEN)
+    
+    def allow(self) -> bool:
+        """Vrai si un appel peut être tenté maintenant"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self._transition(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+    
+    def record(self, success: bool, duration: float):
+        """Enregistre l'issue d'un appel autorisé par allow()"""
+        healthy = success and duration <= self.slow_call
+        if self.state == self.HALF_OPEN:
+            self._probing = False
+            if healthy:
+                self._transition(self.CLOSED)
             else:
-                return None
-            
-            params = {
-                "module": "account",
-                "action": "txlist",
-                "address": address,
-                "startblock": 0,
-                "endblock": 99999999,
-                "page": 1,
-                "offset": 50,
-                "sort": "asc",
-                "apikey": api_key
-            }
-            
-            async with self.session.get(url, params=params) as resp:
-                data = await resp.json()
-                
-                if data.get("status") != "1":
-                    return None
-                
-                transactions = data.get("result", [])
-                if not transactions:
-                    return None
-                
-                # Analyser les premières transactions pour détecter la plateforme
-                for tx in transactions[:10]:  # Regarder les 10 premières tx
-                    tx_from = tx.get("from", "").lower()
-                    tx_input = tx.get("input", "")
-                    
-                    # Vérifier si c'est Clanker
-                    if await self._check_clanker(address):
-                        return {
-                            "name": "Clanker",
-                            "url": f"https://www.clanker.world/clanker/{address}"
-                        }
-                    
-                    # Vérifier si c'est Zora
-                    if "0x777777" in tx_from or "zora" in tx_input.lower():
-                        return {
-                            "name": "Zora",
-                            "url": f"https://zora.co/collect/base:{address}"
-                        }
-                    
-                    # Vérifier si c'est Ape.store
-                    if await self._check_ape_store(address):
-                        return {
-                            "name": "Ape.store",
-                            "url": f"https://ape.store/base/{address}"
-                        }
-                    
-                    # Vérifier si c'est Klik
-                    if await self._check_klik(address):
-                        return {
-                            "name": "Klik",
-                            "url": f"https://klik.network/token/{address}"
-                        }
-                    
-                    # Vérifier si c'est WOW
-                    if await self._check_wow(address):
-                        return {
-                            "name": "WOW",
-                            "url": f"https://wow.xyz/token/base/{address}"
-                        }
-                
-                # Si rien n'est détecté, vérifier Uniswap par défaut
-                if await self._check_uniswap(address, chain):
-                    return {
-                        "name": "Uniswap",
-                        "url": f"https://app.uniswap.org/explore/tokens/{chain}/{address}"
-                    }
+                self._open()
+            return
+        if self.state == self.OPEN:
+            return
+        
+        self.results.append(healthy)
+        failures = self.results.count(False)
+        if len(self.results) >= self.min_calls and failures / len(self.results) >= self.error_rate:
+            self._open()
+    
+    def cancel(self):
+        """Appel abandonné avant sa réponse : il ne compte pas"""
+        self._probing = False
+    
+    def trip(self):
+        """Ouvre le circuit sans attendre la fenêtre (service connu comme défaillant)"""
+        self._probing = False
+        self._open()
+
+# Erreurs JSON-RPC propres au noeud (un autre noeud peut répondre) : en
+# retard sur la chaîne, ou pas encore au bloc demandé
+LAGGING_NODE_ERRORS = ("header not found", "unknown block", "block not found")
+
+def _node_error(data) -> Optional[str]:
+    """Raison pour laquelle la réponse doit être redemandée à un autre noeud (rate limit, retard)"""
+    for item in data if isinstance(data, list) else [data]:
+        error = item.get("error") if isinstance(item, dict) else None
+        if not isinstance(error, dict):
+            continue
+        message = str(error.get("message", "")).lower()
+        if error.get("code") in (-32005, 429) or "rate limit" in message:
+            return "rate limit"
+        if any(pattern in message for pattern in LAGGING_NODE_ERRORS):
+            return f"noeud en retard ({message})"
+    return None
+
+def _rpc_trace_ctx(payload) -> SimpleNamespace:
+    """Méthode(s) JSON-RPC de la requête, pour nommer son span sans l'URL du noeud"""
+    if isinstance(payload, list):
+        methods = sorted({item["method"] for item in payload})
+        return SimpleNamespace(label=f"batch[{len(payload)}] {','.join(methods)}")
+    return SimpleNamespace(label=payload["method"])
+
+class RPCEndpoint:
+    """Un noeud RPC du pool et son état de santé"""
+    
+    def __init__(self, chain: str, url: str):
+        self.url = url
+        self.host = urlsplit(url).hostname
+        self.latency = None  # moyenne glissante (secondes), None tant qu'il n'a pas servi
+        self.in_flight = 0
+        self.used_at = 0.0
+        self.head = None  # dernier bloc connu du noeud (d'après ses réponses eth_blockNumber)
+        self.breaker = CircuitBreaker(
+            f"rpc:{chain}:{self.host}", slow_call=RPC_SLOW_CALL, cooldown=RPC_EJECT_COOLDOWN
+        )
+    
+    def observe(self, duration: float):
+        if self.latency is None:
+            self.latency = duration
+        else:
+            self.latency += RPC_LATENCY_ALPHA * (duration - self.latency)
+    
+    def observe_head(self, block: Optional[str]):
+        if isinstance(block, str):
+            self.head = max(self.head or 0, int(block, 16))
+    
+    def error_rate(self) -> float:
+        results = self.breaker.results
+        return results.count(False) / len(results) if results else 0.0
+    
+    def score(self) -> float:
+        """Coût estimé d'un appel (plus bas = meilleur).
+        
+        Un noeud jamais essayé, ou inutilisé depuis RPC_EJECT_COOLDOWN, passe
+        en premier : ses mesures sont périmées, il mérite un nouvel essai.
+        """
+        if time.monotonic() - self.used_at > RPC_EJECT_COOLDOWN:
+            return 0.0
+        return (self.latency or 0.0) * (1 + self.in_flight) + RPC_ERROR_PENALTY * self.error_rate()
+    
+    @property
+    def ejected(self) -> bool:
+        return self.breaker.state == CircuitBreaker.OPEN
+
+class RPCPool:
+    """Endpoints RPC d'une chaîne : routage vers le plus sain, hedging et éviction.
+    
+    Les appels JSON-RPC du bot sont des lectures, donc rejouables sans
+    risque vers un autre noeud. Un noeud qui échoue est relayé aussitôt par
+    le suivant ; si tous sont écartés, le meilleur est tout de même tenté.
+    """
+    
+    _shared = {}
+    
+    def __init__(self, chain: str, urls: List[str]):
+        self.chain = chain
+        self.endpoints = [RPCEndpoint(chain, url) for url in urls]
+        self.latencies = deque(maxlen=RPC_LATENCY_WINDOW)
+    
+    @classmethod
+    def shared(cls, chain: str) -> "RPCPool":
+        """Pool partagé par tous les clients du processus pour cette chaîne"""
+        if chain not in cls._shared:
+            cls._shared[chain] = cls(chain, PROVIDERS[chain])
+        return cls._shared[chain]
+    
+    def hedge_delay(self) -> float:
+        """p90 des latences récentes de la chaîne (RPC_HEDGE_DELAY faute de mesures)"""
+        if len(self.latencies) < RPC_HEDGE_MIN_SAMPLES:
+            return RPC_HEDGE_DELAY
+        ordered = sorted(self.latencies)
+        return max(RPC_HEDGE_MIN_DELAY, ordered[int(0.9 * (len(ordered) - 1))])
+    
+    def _pick(self, tried: set, fallback: bool, min_block: Optional[int] = None) -> Optional[RPCEndpoint]:
+        """Meilleur endpoint pas encore essayé pour cet appel.
+        
+        Avec min_block, seuls les noeuds qui ont déjà annoncé ce bloc sont
+        candidats : un noeud en retard répondrait [] à eth_getLogs sur une
+        plage au-delà de sa tête, et les blocs seraient perdus.
+        """
+        candidates = sorted(
+            (
+                endpoint for endpoint in self.endpoints
+                if endpoint not in tried
+                and (min_block is None or (endpoint.head is not None and endpoint.head >= min_block))
+            ),
+            key=RPCEndpoint.score
+        )
+        for endpoint in candidates:
+            if endpoint.breaker.allow():
+                return endpoint
+        # Tous écartés : mieux vaut tenter le meilleur que d'échouer sans essayer
+        if fallback and not tried and candidates:
+            return candidates[0]
+        return None
+    
+    async def send(self, session: aiohttp.ClientSession, endpoint: RPCEndpoint, payload):
+        """Envoie la requête à un endpoint donné et met à jour sa santé"""
+        endpoint.in_flight += 1
+        started_at = endpoint.used_at = time.monotonic()
+        try:
+            async with session.post(endpoint.url, json=payload, trace_request_ctx=_rpc_trace_ctx(payload)) as resp:
+                if resp.status == 429 or resp.status >= 500:
+                    raise RPCError(f"HTTP {resp.status}")
+                data = await resp.json(content_type=None)
+            error = _node_error(data)
+            if error:
+                raise RPCError(error)
+            if isinstance(payload, dict) and payload["method"] == "eth_blockNumber" and isinstance(data, dict):
+                endpoint.observe_head(data.get("result"))
+        except asyncio.CancelledError:
+            # Perdant d'un hedging (ou appel abandonné) : il a au moins mis ce temps
+            endpoint.observe(time.monotonic() - started_at)
+            endpoint.breaker.cancel()
+            raise
+        except Exception:
+            endpoint.breaker.record(False, time.monotonic() - started_at)
+            raise
+        else:
+            duration = time.monotonic() - started_at
+            endpoint.observe(duration)
+            endpoint.breaker.record(True, duration)
+            self.latencies.append(duration)
+            return data
+        finally:
+            endpoint.in_flight -= 1
+    
+    async def post(self, session: aiohttp.ClientSession, payload, min_block: Optional[int] = None):
+        """Envoie une requête JSON-RPC et renvoie la première réponse valide.
+        
+        min_block : plus haut bloc lu par la requête (plages eth_getLogs,
+        lectures à un bloc donné), voir _pick.
+        """
+        tried, pending, errors = set(), {}, []
+        hedges = 0
+        
+        def launch(endpoint: RPCEndpoint):
+            tried.add(endpoint)
+            pending[asyncio.ensure_future(self.send(session, endpoint, payload))] = endpoint
+        
+        try:
+            while True:
+                if not pending:
+                    endpoint = self._pick(tried, fallback=True, min_block=min_block)
+                    if endpoint is None:
+                        if not tried and min_block is not None:
+                            raise RPCError(f"Aucun RPC {self.chain} n'a atteint le bloc {min_block}")
+                        raise RPCError(f"Aucun RPC {self.chain} disponible ({'; '.join(errors) or 'tous écartés'})")
+                    if tried:
+                        metrics.inc("rpc_failovers_total", chain=self.chain)
+                    launch(endpoint)
                 
-                return None
+                can_hedge = hedges < RPC_MAX_HEDGES and len(tried) < len(self.endpoints)
+                done, _ = await asyncio.wait(
+                    pending, timeout=self.hedge_delay() if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    endpoint = self._pick(tried, fallback=False, min_block=min_block)
+                    hedges += 1
+                    if endpoint is not None:
+                        metrics.inc("rpc_hedged_requests_total", chain=self.chain)
+                        launch(endpoint)
+                    continue
                 
-        except Exception as e:
-            logger.error(f"Erreur detect_creation_platform: {e}")
-            return None
+                # Toutes les tâches terminées sont consommées, même après une réponse valide
+                answered = False
+                for task in done:
+                    endpoint = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if not answered:
+                            answered, result = True, task.result()
+                    else:
+                        errors.append(f"{endpoint.host}: {error or type(error).__name__}")
+                if answered:
+                    return result
+        finally:
+            for task in pending:
+                task.cancel()
+
+class ExplorerClient:
+    """Client centralisé pour les API Basescan/Etherscan.
     
-    async def _check_clanker(self, address: str) -> bool:
-        """Vérifie si le token est sur Clanker"""
+    - un seau de jetons par clé API, avec rotation entre les clés ;
+    - les requêtes identiques en cours sont fusionnées : les appelants
+      concurrents partagent la même réponse. Les appels HTTP sont tracés dans
+      l'analyse qui a lancé la requête ; chaque autre analyse en attente y
+      ajoute un span "shared" couvrant son attente ;
+    - nouvel essai avec backoff exponentiel sur les réponses "rate limit".
+    """
+    
+    def __init__(self, session: aiohttp.ClientSession, explorers: Dict = EXPLORERS, rate: float = EXPLORER_RATE_LIMIT):
+        self.session = session
+        self.explorers = explorers
+        self.buckets = {
+            chain: [(key, TokenBucket(rate)) for key in config["keys"]]
+            for chain, config in explorers.items()
+        }
+        self._next_key = {chain: 0 for chain in explorers}
+        self._in_flight = {}
+    
+    def supports(self, chain: str) -> bool:
+        return chain in self.explorers and bool(self.buckets[chain])
+    
+    async def _acquire_key(self, chain: str) -> tuple:
+        """Attend un jeton sur l'une des clés de la chaîne (tourniquet)"""
+        buckets = self.buckets[chain]
+        while True:
+            for _ in range(len(buckets)):
+                index = self._next_key[chain]
+                self._next_key[chain] = (index + 1) % len(buckets)
+                key, bucket = buckets[index]
+                if bucket.try_acquire():
+                    return key, bucket
+            await asyncio.sleep(min(bucket.wait_time() for _, bucket in buckets))
+    
+    @staticmethod
+    def _is_rate_limited(data: Dict) -> bool:
+        result = data.get("result")
+        return data.get("status") == "0" and isinstance(result, str) and "rate limit" in result.lower()
+    
+    async def _request(self, chain: str, params: Dict) -> Dict:
+        url = self.explorers[chain]["url"]
+        for attempt in range(EXPLORER_MAX_RETRIES + 1):
+            key, bucket = await self._acquire_key(chain)
+            async with self.session.get(url, params={**params, "apikey": key}) as resp:
+                if resp.status == 429:
+                    data = None
+                else:
+                    data = await resp.json(content_type=None)
+            
+            if data is not None and not self._is_rate_limited(data):
+                return data
+            
+            bucket.drain()
+            delay = EXPLORER_BACKOFF * (2 ** attempt)
+            logger.warning(f"Rate limit explorateur {chain} (essai {attempt + 1}), nouvel essai dans {delay}s")
+            await asyncio.sleep(delay)
+        
+        raise ExplorerError(f"Rate limit explorateur {chain} persistant")
+    
+    def _forget(self, request_key: tuple, task: asyncio.Task):
+        self._in_flight.pop(request_key, None)
+        # Évite l'avertissement "exception never retrieved" si tous les appelants sont partis
+        if not task.cancelled():
+            task.exception()
+    
+    async def get(self, chain: str, params: Dict) -> Dict:
+        """Exécute une requête explorateur (la clé API est ajoutée ici)"""
+        if not self.supports(chain):
+            raise ExplorerError(f"Aucun explorateur configuré pour {chain}")
+        
+        request_key = (chain, tuple(sorted((k, str(v)) for k, v in params.items())))
+        started_at = time.monotonic()
+        trace = current_trace.get()
+        task, traced = self._in_flight.get(request_key, (None, None))
+        # Le span "shared" n'est ajouté qu'une fois par trace en attente
+        shared = task is not None and trace is not None and trace not in traced
+        if task is None:
+            task, traced = asyncio.create_task(self._request(chain, params)), {trace}
+            self._in_flight[request_key] = (task, traced)
+            task.add_done_callback(lambda done: self._forget(request_key, done))
+        traced.add(trace)
         try:
-            url = f"https://www.clanker.world/api/tokens/{address}"
-            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    return bool(data)
-        except:
-            pass
-        return False
+            # shield : l'annulation d'un appelant n'annule pas les autres
+            return await asyncio.shield(task)
+        finally:
+            if shared:
+                host = urlsplit(self.explorers[chain]["url"]).hostname
+                record_span("http", f"GET {host} {params.get('action')}", started_at, host=host, status="shared")
+
+class LocalBackend:
+    """Stand-in en mémoire du backend partagé (un seul processus, tests).
+    
+    Même interface que RedisBackend : valeurs texte avec durée de vie
+    optionnelle, écriture conditionnelle pour les verrous et réservations.
+    """
+    
+    def __init__(self):
+        self._data = {}
+    
+    def _entry(self, key: str):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+    
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entry(key)
+        return entry[0] if entry else None
+    
+    async def set(self, key: str, value: str, ttl: Optional[float] = None):
+        self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+    
+    async def set_if_absent(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        if self._entry(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+    
+    async def release(self, key: str, value: str):
+        """Supprime la clé si elle porte encore cette valeur (verrou toujours détenu)"""
+        entry = self._entry(key)
+        if entry and entry[0] == value:
+            del self._data[key]
+    
+    async def close(self):
+        self._data.clear()
+
+class RedisBackend:
+    """Backend partagé entre réplicas, sur Redis"""
+    
+    # Suppression atomique d'un verrou seulement s'il nous appartient encore
+    RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+    
+    def __init__(self, url: str, prefix: str = SHARED_BACKEND_PREFIX):
+        if redis_asyncio is None:
+            raise RuntimeError("REDIS_URL est défini mais le paquet redis n'est pas installé")
+        self.client = redis_asyncio.from_url(url, decode_responses=True)
+        self.prefix = prefix
+    
+    @staticmethod
+    def _px(ttl: Optional[float]) -> Optional[int]:
+        return int(ttl * 1000) if ttl else None
+    
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(self.prefix + key)
+    
+    async def set(self, key: str, value: str, ttl: Optional[float] = None):
+        await self.client.set(self.prefix + key, value, px=self._px(ttl))
+    
+    async def set_if_absent(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return bool(await self.client.set(self.prefix + key, value, px=self._px(ttl), nx=True))
+    
+    async def release(self, key: str, value: str):
+        await self.client.eval(self.RELEASE_SCRIPT, 1, self.prefix + key, value)
+    
+    async def close(self):
+        await self.client.aclose()
+
+def create_shared_backend():
+    """Backend Redis si REDIS_URL est défini, sinon stand-in local"""
+    if REDIS_URL:
+        return RedisBackend(REDIS_URL)
+    return LocalBackend()
+
+class TokenCache:
+    """Cache à deux niveaux : LRU en mémoire + SQLite sur disque.
+    
+    Les entrées sont rangées par type ("token_meta", "txlist"...) et expirent
+    selon CACHE_TTLS. Les accès disque passent par un thread pour ne pas
+    bloquer la boucle asyncio.
+    """
+    
+    _shared = None
+    
+    def __init__(self, path: Optional[str] = CACHE_PATH, max_entries: int = CACHE_MEMORY_ENTRIES, backend=None):
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        # Troisième niveau optionnel, partagé entre réplicas (voir create_shared_backend)
+        self.backend = backend
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "shared_hits": 0, "misses": 0}
+        
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL, "
+                    "PRIMARY KEY (kind, key))"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Cache disque indisponible ({path}): {e}")
+                self._db = None
+    
+    @classmethod
+    def shared(cls) -> "TokenCache":
+        """Instance partagée par tous les analyseurs du processus"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+    
+    def purge_expired(self) -> int:
+        """Supprime les entrées expirées du disque (appelé par le préchauffage)"""
+        if self._db is None:
+            return 0
+        with self._lock:
+            deleted = self._db.execute(
+                "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+            ).rowcount
+            self._db.commit()
+        return deleted
+    
+    def preload(self, limit: int) -> int:
+        """Charge en mémoire les `limit` entrées valides les plus récemment écrites"""
+        if self._db is None or limit <= 0:
+            return 0
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT kind, key, value, expires_at FROM cache "
+                "WHERE expires_at IS NULL OR expires_at > ? ORDER BY rowid DESC LIMIT ?",
+                (time.time(), min(limit, self.max_entries))
+            ).fetchall()
+        # Les plus anciennes d'abord : les plus récentes finissent en tête du LRU
+        for kind, key, value, expires_at in reversed(rows):
+            self._remember((kind, key), json.loads(value), expires_at)
+        return len(rows)
+    
+    def _remember(self, memory_key: tuple, value, expires_at: Optional[float]):
+        self._memory[memory_key] = (value, expires_at)
+        self._memory.move_to_end(memory_key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def _disk_get(self, kind: str, key: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM cache WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        if not row:
+            return None
+        return json.loads(row[0]), row[1]
+    
+    def _disk_set(self, kind: str, key: str, value, expires_at: Optional[float]):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (kind, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (kind, key, json.dumps(value), expires_at)
+            )
+            self._db.commit()
+    
+    async def get(self, kind: str, key: str):
+        """Renvoie la valeur en cache, ou None si absente ou expirée"""
+        memory_key = (kind, key)
+        entry = self._memory.get(memory_key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > time.time():
+                self._memory.move_to_end(memory_key)
+                self.stats["memory_hits"] += 1
+                return value
+            del self._memory[memory_key]
+        
+        if self._db is not None:
+            try:
+                row = await asyncio.to_thread(self._disk_get, kind, key)
+            except (sqlite3.Error, ValueError) as e:
+                logger.error(f"Erreur lecture cache: {e}")
+                row = None
+            if row is not None:
+                value, expires_at = row
+                if expires_at is None or expires_at > time.time():
+                    self._remember(memory_key, value, expires_at)
+                    self.stats["disk_hits"] += 1
+                    return value
+        
+        if self.backend is not None:
+            try:
+                raw = await self.backend.get(f"cache:{kind}:{key}")
+            except Exception as e:
+                logger.warning(f"Erreur lecture cache partagé: {e}")
+                raw = None
+            if raw is not None:
+                # Entrée écrite par un autre réplica (ou une autre version) : illisible = absente
+                try:
+                    entry = json.loads(raw)
+                    value, expires_at = entry["value"], entry["expires_at"]
+                except (ValueError, TypeError, KeyError) as e:
+                    logger.warning(f"Entrée de cache partagé illisible ({kind}:{key}): {e}")
+                else:
+                    if expires_at is None or expires_at > time.time():
+                        self._remember(memory_key, value, expires_at)
+                        self.stats["shared_hits"] += 1
+                        return value
+        
+        self.stats["misses"] += 1
+        return None
+    
+    async def set(self, kind: str, key: str, value):
+        """Enregistre une valeur avec la durée de vie de son type"""
+        ttl = CACHE_TTLS.get(kind)
+        expires_at = time.time() + ttl if ttl is not None else None
+        self._remember((kind, key), value, expires_at)
+        
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(self._disk_set, kind, key, value, expires_at)
+            except (sqlite3.Error, TypeError) as e:
+                logger.error(f"Erreur écriture cache: {e}")
+        
+        if self.backend is not None:
+            try:
+                await self.backend.set(
+                    f"cache:{kind}:{key}", json.dumps({"value": value, "expires_at": expires_at}), ttl
+                )
+            except Exception as e:
+                logger.warning(f"Erreur écriture cache partagé: {e}")
+    
+    async def get_or_fetch(self, kind: str, key: str, fetch, cacheable=None):
+        """Renvoie la valeur en cache ou l'obtient via fetch().
+        
+        Les résultats vides, en erreur ou FAILED ne sont pas mis en cache, ni
+        ceux que cacheable(value) refuse.
+        """
+        started_at = time.monotonic()
+        value = await self.get(kind, key)
+        metrics.inc("cache_requests_total", kind=kind, result="hit" if value is not None else "miss")
+        if value is not None:
+            record_span("cache", kind, started_at, cache_hit=True)
+            return value
+        
+        value = await fetch()
+        record_span("cache", kind, started_at, cache_hit=False)
+        if (value and value is not FAILED and not (isinstance(value, dict) and "error" in value)
+                and (cacheable is None or cacheable(value))):
+            await self.set(kind, key, value)
+        return value
+    
+    def hit_ratio(self) -> float:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["shared_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+    
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+            self._db = None
+
+class ChainIndexer:
+    """Index local des contrats créés, par déployeur.
+    
+    Suit les blocs d'une chaîne via JSON-RPC (eth_getBlockReceipts) et
+    enregistre dans SQLite :
+    - les créations directes (transaction sans destinataire) ;
+    - les tokens créés par une usine (Clanker, Zora...), repérés par leur
+      premier mint Transfer(0x0 -> ...) d'un contrat qui n'existait pas au
+      bloc précédent. Le déployeur est alors l'expéditeur de la transaction
+      et l'usine son destinataire.
+    
+    La progression est enregistrée après chaque lot de blocs, l'indexation
+    reprend donc là où elle s'était arrêtée.
+    
+    En lecture seule (read_only=True), l'index est seulement consulté : il
+    est tenu à jour par un autre processus, seul à y écrire.
+    """
+    
+    def __init__(self, rpc: Optional[RPCClient], chain: str = INDEXER_CHAIN, path: str = INDEXER_PATH,
+                 start_block: Optional[int] = None, batch_blocks: int = INDEXER_BATCH_BLOCKS,
+                 confirmations: int = INDEXER_CONFIRMATIONS, read_only: bool = False):
+        self.rpc = rpc
+        self.chain = chain
+        self.start_block = start_block
+        self.batch_blocks = batch_blocks
+        self.confirmations = confirmations
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._stopped = asyncio.Event()
+        if read_only:
+            self._db = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True, check_same_thread=False)
+            # Échoue dès maintenant si le processus d'indexation n'a pas encore créé l'index
+            self._db.execute("SELECT 1 FROM contracts LIMIT 1")
+            return
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # WAL : un lecteur dans un autre processus ne bloque pas l'indexation
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS checkpoint (chain TEXT PRIMARY KEY, block INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS contracts ("
+            "chain TEXT NOT NULL, address TEXT NOT NULL, deployer TEXT NOT NULL, factory TEXT, "
+            "platform TEXT, block INTEGER NOT NULL, timestamp INTEGER NOT NULL, tx_hash TEXT, "
+            "PRIMARY KEY (chain, address));"
+            "CREATE INDEX IF NOT EXISTS contracts_by_deployer ON contracts (chain, deployer, block);"
+        )
+        self._db.commit()
+    
+    # Lectures (requêtes indexées, synchrones : depuis la boucle asyncio,
+    # les appeler via asyncio.to_thread comme les écritures)
+    
+    def checkpoint(self) -> Optional[int]:
+        """Dernier bloc indexé"""
+        with self._lock:
+            row = self._db.execute("SELECT block FROM checkpoint WHERE chain = ?", (self.chain,)).fetchone()
+        return row[0] if row else None
+    
+    def contract(self, address: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT address, deployer, factory, platform, block, timestamp, tx_hash "
+                "FROM contracts WHERE chain = ? AND address = ?",
+                (self.chain, address.lower())
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+    
+    def contracts_by_deployer(self, deployer: str, limit: int = 100) -> List[Dict]:
+        """Contrats créés par un wallet, du plus récent au plus ancien"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT address, deployer, factory, platform, block, timestamp, tx_hash "
+                "FROM contracts WHERE chain = ? AND deployer = ? ORDER BY block DESC LIMIT ?",
+                (self.chain, deployer.lower(), limit)
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+    
+    def known_contracts(self, addresses: List[str]) -> set:
+        """Adresses (en minuscules) déjà présentes dans l'index"""
+        addresses = [address.lower() for address in addresses]
+        known = set()
+        with self._lock:
+            for i in range(0, len(addresses), 500):
+                chunk = addresses[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT address FROM contracts WHERE chain = ? AND address IN ({', '.join('?' * len(chunk))})",
+                    (self.chain, *chunk)
+                ).fetchall()
+                known.update(row[0] for row in rows)
+        return known
+    
+    @staticmethod
+    def _row_to_dict(row: tuple) -> Dict:
+        keys = ("address", "deployer", "factory", "platform", "block", "timestamp", "tx_hash")
+        return dict(zip(keys, row))
+    
+    # Indexation
+    
+    @staticmethod
+    def _platform_for(factory: Optional[str], deployer: str) -> Optional[str]:
+        if factory and factory.lower() in LAUNCHPAD_FACTORIES:
+            return LAUNCHPAD_FACTORIES[factory.lower()]
+        if (factory or "").lower().startswith("0x777777") or deployer.lower().startswith("0x777777"):
+            return "Zora"
+        return None
+    
+    async def _block_receipts(self, numbers: List[int]) -> List[tuple]:
+        """Renvoie (timestamp, reçus) pour chaque bloc, en un seul batch JSON-RPC"""
+        calls = []
+        for number in numbers:
+            calls.append(("eth_getBlockByNumber", [hex(number), False]))
+            calls.append(("eth_getBlockReceipts", [hex(number)]))
+        results = await self.rpc.batch(calls, min_block=max(numbers))
+        
+        blocks = []
+        for i, number in enumerate(numbers):
+            header, receipts = results[2 * i], results[2 * i + 1]
+            if isinstance(header, RPCError) or header is None:
+                raise RPCError(f"Bloc {number} indisponible: {header}")
+            if isinstance(receipts, RPCError):
+                receipts = await self._receipts_fallback(number)
+            blocks.append((int(header["timestamp"], 16), receipts or []))
+        return blocks
+    
+    async def _receipts_fallback(self, number: int) -> List[Dict]:
+        """Reçus un par un, pour les noeuds sans eth_getBlockReceipts"""
+        block = await self.rpc.call("eth_getBlockByNumber", [hex(number), True], min_block=number)
+        hashes = [tx["hash"] for tx in block.get("transactions", [])]
+        if not hashes:
+            return []
+        receipts = await self.rpc.batch(
+            [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in hashes], min_block=number
+        )
+        for receipt in receipts:
+            if isinstance(receipt, RPCError):
+                raise receipt
+        return receipts
+    
+    async def index_range(self, first: int, last: int) -> int:
+        """Indexe les blocs [first, last] et avance le checkpoint ; renvoie le nombre de contrats trouvés"""
+        numbers = list(range(first, last + 1))
+        blocks = await self._block_receipts(numbers)
+        
+        rows = []
+        mint_candidates = {}
+        known = set()
+        for number, (timestamp, receipts) in zip(numbers, blocks):
+            for receipt in receipts:
+                if receipt.get("status") == "0x0":
+                    continue
+                deployer = receipt["from"].lower()
+                factory = (receipt.get("to") or "").lower() or None
+                
+                # Création directe
+                if receipt.get("contractAddress"):
+                    address = receipt["contractAddress"].lower()
+                    known.add(address)
+                    rows.append((self.chain, address, deployer, None, self._platform_for(None, deployer),
+                                 number, timestamp, receipt["transactionHash"]))
+                
+                # Premier mint d'un token ERC20 (3 topics : ERC721 en a 4)
+                for log in receipt.get("logs", []):
+                    topics = log.get("topics", [])
+                    if len(topics) == 3 and topics[0] == TRANSFER_TOPIC and topics[1] == ZERO_TOPIC:
+                        address = log["address"].lower()
+                        if address not in mint_candidates:
+                            mint_candidates[address] = (deployer, factory, number, timestamp, receipt["transactionHash"])
+        
+        # Seuls les contrats inconnus et absents au bloc précédent sont de nouveaux tokens
+        known |= await asyncio.to_thread(self.known_contracts, [a for a in mint_candidates if a not in known])
+        candidates = [(address, info) for address, info in mint_candidates.items() if address not in known]
+        if candidates:
+            codes = await self.rpc.batch([
+                ("eth_getCode", [address, hex(info[2] - 1)]) for address, info in candidates
+            ], min_block=last)
+            for (address, (deployer, factory, number, timestamp, tx_hash)), code in zip(candidates, codes):
+                if code == "0x":
+                    rows.append((self.chain, address, deployer, factory, self._platform_for(factory, deployer),
+                                 number, timestamp, tx_hash))
+        
+        await asyncio.to_thread(self._store, rows, last)
+        return len(rows)
+    
+    def _store(self, rows: List[tuple], last_block: int):
+        with self._lock:
+            self._db.executemany("INSERT OR IGNORE INTO contracts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoint (chain, block) VALUES (?, ?)", (self.chain, last_block)
+            )
+            self._db.commit()
+    
+    async def run(self, poll_interval: float = INDEXER_POLL_INTERVAL):
+        """Suit la chaîne jusqu'à l'appel de stop()"""
+        while not self._stopped.is_set():
+            try:
+                head = int(await self.rpc.call("eth_blockNumber", []), 16) - self.confirmations
+                checkpoint = await asyncio.to_thread(self.checkpoint)
+                if checkpoint is None:
+                    checkpoint = (self.start_block if self.start_block is not None else head) - 1
+                
+                if checkpoint < head:
+                    last = min(head, checkpoint + self.batch_blocks)
+                    found = await self.index_range(checkpoint + 1, last)
+                    if found:
+                        logger.info(f"Indexeur {self.chain}: blocs {checkpoint + 1}-{last}, {found} contrat(s)")
+                    if last < head:
+                        continue  # en retard : on enchaîne sans attendre
+            except Exception as e:
+                logger.error(f"Erreur indexeur {self.chain}: {e}")
+            
+            try:
+                await asyncio.wait_for(self._stopped.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    def stop(self):
+        self._stopped.set()
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class Bold(str):
+    """Fragment de rapport en gras"""
+
+class Code(str):
+    """Fragment de rapport en police fixe (adresses)"""
+
+class Link:
+    """Lien d'un rapport"""
+    
+    def __init__(self, label: str, url: str):
+        self.label = label
+        self.url = url
+
+class ReportSection:
+    """Section typée d'un rapport : un titre et des lignes de fragments.
+    
+    Un fragment est du texte brut (str), Bold, Code ou Link ; le texte n'est
+    échappé qu'au rendu, selon le format choisi. complete=False signale une
+    donnée manquante (délai dépassé, service indisponible) : la section
+    rendue n'est alors pas gardée en cache.
+    """
+    
+    def __init__(self, title: Optional[str] = None, complete: bool = True):
+        self.title = title
+        self.lines = []
+        self.complete = complete
+    
+    def line(self, *parts) -> "ReportSection":
+        self.lines.append(parts)
+        return self
+    
+    def blank(self) -> "ReportSection":
+        self.lines.append(())
+        return self
+
+class ReportRenderer(ABC):
+    """Rendu des sections pour un parse_mode Telegram"""
+    
+    parse_mode = None
+    # Découpage d'un texte rendu en fragments : balise, échappement, ou
+    # texte brut (groupe "plain", le seul qu'on peut couper n'importe où)
+    PART = None
+    
+    @abstractmethod
+    def escape(self, text: str) -> str:
+        ...
+    
+    @abstractmethod
+    def bold(self, text: str) -> str:
+        ...
+    
+    @abstractmethod
+    def code(self, text: str) -> str:
+        ...
+    
+    @abstractmethod
+    def link(self, label: str, url: str) -> str:
+        ...
+    
+    def part(self, part) -> str:
+        if isinstance(part, Bold):
+            return self.bold(part)
+        if isinstance(part, Code):
+            return self.code(part)
+        if isinstance(part, Link):
+            return self.link(part.label, part.url)
+        return self.escape(str(part))
+    
+    def section(self, section: ReportSection) -> str:
+        """Section rendue, une ligne par ligne du modèle ("" si elle est vide)"""
+        lines = [self.bold(section.title)] if section.title else []
+        lines += ["".join(self.part(part) for part in parts) for parts in section.lines]
+        return "\n".join(lines)
+    
+    def cut(self, text: str, limit: int) -> int:
+        """Position de coupure (0 < position <= limit) entre deux fragments rendus de text.
+        
+        Le texte brut se coupe n'importe où ; une balise ou un échappement
+        ne se coupe jamais, sauf s'il dépasse à lui seul limit.
+        """
+        position = 0
+        for match in self.PART.finditer(text):
+            if match.end() <= limit:
+                position = match.end()
+                continue
+            if match.lastgroup == "plain":
+                return limit
+            break
+        return position or limit
+
+class HTMLRenderer(ReportRenderer):
+    parse_mode = "HTML"
+    
+    PART = re.compile(r"(?P<plain>[^<&]+)|<(?P<tag>b|code|a)\b[^>]*>.*?</(?P=tag)>|&#?\w+;|.", re.S)
+    
+    def escape(self, text: str) -> str:
+        return html.escape(text, quote=False)
+    
+    def bold(self, text: str) -> str:
+        return f"<b>{self.escape(text)}</b>"
+    
+    def code(self, text: str) -> str:
+        return f"<code>{self.escape(text)}</code>"
+    
+    def link(self, label: str, url: str) -> str:
+        return f'<a href="{html.escape(url)}">{self.escape(label)}</a>'
+
+class MarkdownV2Renderer(ReportRenderer):
+    parse_mode = "MarkdownV2"
+    
+    SPECIAL = re.compile(r"([_*\[\]()~`>#+\-=|{}.!\\])")
+    PART = re.compile(
+        r"(?P<plain>[^*`\[\\]+)|\*(?:\\.|[^*\\])*\*|`(?:\\.|[^`\\])*`"
+        r"|\[(?:\\.|[^\]\\])*\]\((?:\\.|[^)\\])*\)|\\.|.",
+        re.S
+    )
+    
+    def escape(self, text: str) -> str:
+        return self.SPECIAL.sub(r"\\\1", text)
+    
+    def bold(self, text: str) -> str:
+        return f"*{self.escape(text)}*"
+    
+    def code(self, text: str) -> str:
+        return "`" + re.sub(r"([`\\])", r"\\\1", text) + "`"
+    
+    def link(self, label: str, url: str) -> str:
+        return f"[{self.escape(label)}](" + re.sub(r"([)\\])", r"\\\1", url) + ")"
+
+REPORT_RENDERER = {"HTML": HTMLRenderer, "MarkdownV2": MarkdownV2Renderer}[REPORT_PARSE_MODE]()
+
+class TokenAnalyzer:
+    def __init__(self, cache: Optional[TokenCache] = None):
+        self.session = None
+        self.explorer = None
+        self.indexer = None
+        self.cache = cache if cache is not None else TokenCache.shared()
+        # Un disjoncteur par API de plateforme, partagé par toutes les analyses
+        self.breakers = {
+            detector["name"]: CircuitBreaker(detector["name"])
+            for detector in PLATFORM_DETECTORS if not detector.get("local")
+        }
+        
+    async def init_session(self):
+        if not self.session:
+            timeout = aiohttp.ClientTimeout(total=30)
+            # Connexions gardées ouvertes et DNS en cache : une rafale de
+            # messages réutilise les connexions TLS déjà établies
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_CONNECTION_LIMIT,
+                limit_per_host=HTTP_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            )
+            self.session = aiohttp.ClientSession(
+                timeout=timeout, connector=connector, trace_configs=[create_http_trace_config()]
+            )
+            self.explorer = ExplorerClient(self.session)
+    
+    async def close_session(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+    
+    async def verify_provider(self, chain: str) -> Dict:
+        """Vérifie que chaque endpoint PROVIDERS de la chaîne répond et sert la bonne chaîne.
+        
+        Un endpoint en échec est écarté du pool dès le démarrage.
+        """
+        pool = RPCPool.shared(chain)
+        payload = {"jsonrpc": "2.0", "id": 1, "method": "eth_chainId", "params": []}
+        
+        async def check(endpoint: RPCEndpoint) -> Optional[str]:
+            try:
+                data = await asyncio.wait_for(pool.send(self.session, endpoint, payload), WARMUP_TIMEOUT)
+                chain_id = int(data["result"], 16)
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            else:
+                if chain_id == CHAIN_IDS.get(chain, chain_id):
+                    metrics.set("rpc_provider_up", 1, chain=chain, host=endpoint.host)
+                    return None
+                error = f"chainId {chain_id}"
+            logger.error(f"RPC {chain} {endpoint.host} écarté au démarrage: {error}")
+            metrics.set("rpc_provider_up", 0, chain=chain, host=endpoint.host)
+            endpoint.breaker.trip()
+            return error
+        
+        errors = await asyncio.gather(*(check(endpoint) for endpoint in pool.endpoints))
+        healthy = sum(1 for error in errors if error is None)
+        return {"ok": healthy > 0, "healthy": healthy, "total": len(errors)}
+    
+    async def _open_connection(self, url: str):
+        """Établit une connexion keep-alive vers l'hôte ; le statut de la réponse est ignoré"""
+        try:
+            async with self.session.head(
+                url, allow_redirects=False, timeout=aiohttp.ClientTimeout(total=WARMUP_TIMEOUT)
+            ):
+                pass
+        except Exception as e:
+            logger.warning(f"Préchauffage de {url} impossible: {e or type(e).__name__}")
+    
+    async def warmup_connections(self) -> Dict[str, Dict]:
+        """Vérifie chaque PROVIDERS et ouvre les connexions vers les explorateurs et plateformes.
+        
+        Les connexions TLS et les résolutions DNS restent dans le pool de la
+        session : la première analyse ne paie plus leur établissement.
+        """
+        await self.init_session()
+        chains = list(PROVIDERS)
+        urls = [explorer["url"] for explorer in EXPLORERS.values()] + WARMUP_URLS
+        results = await asyncio.gather(
+            *(self.verify_provider(chain) for chain in chains),
+            *(self._open_connection(url) for url in urls)
+        )
+        return dict(zip(chains, results))
+    
+    async def _has_code(self, address: str, chain: str) -> Optional[bool]:
+        """Vrai si un contrat existe à cette adresse sur la chaîne (None si le RPC ne répond pas)"""
+        try:
+            code = await asyncio.wait_for(
+                self.get_rpc(chain).call("eth_getCode", [address, "latest"]), CHAIN_PROBE_TIMEOUT
+            )
+            return bool(code) and code != "0x"
+        except Exception as e:
+            logger.warning(f"Sonde eth_getCode {chain} impossible: {e}")
+            return None
+    
+    async def detect_chains(self, address: str) -> List[str]:
+        """Détecte les chaînes où le contrat existe.
+        
+        Interroge eth_getCode sur tous les PROVIDERS en parallèle ; la réponse
+        n'est mémorisée par adresse que si chaque RPC a répondu. Sinon la
+        liste partielle est renvoyée sans cache (DEFAULT_CHAIN si aucune
+        chaîne n'a été trouvée), pour réessayer à la prochaine demande.
+        """
+        if not is_address(address):
+            return []
+        await self.init_session()
+        complete = True
+        
+        async def probe() -> List[str]:
+            nonlocal complete
+            chains = list(PROVIDERS)
+            results = await asyncio.gather(*(self._has_code(address, chain) for chain in chains))
+            # None : le RPC n'a pas répondu, on ne sait pas
+            complete = all(result is not None for result in results)
+            found = [chain for chain, result in zip(chains, results) if result]
+            if not found and not complete:
+                return [DEFAULT_CHAIN]
+            # La chaîne par défaut reste affichée en premier
+            return sorted(found, key=lambda chain: chain != DEFAULT_CHAIN)
+        
+        return await self.cache.get_or_fetch("chains", address.lower(), probe, cacheable=lambda _: complete)
+    
+    def get_rpc(self, chain: str) -> RPCClient:
+        """Client JSON-RPC pour la chaîne donnée, sur la session partagée"""
+        return RPCClient(self.session, RPCPool.shared(chain))
+    
+    async def _read_erc20_fields(self, rpc: RPCClient, addresses: List[str], fields: Optional[List[str]] = None) -> Dict[str, Dict[str, Optional[bytes]]]:
+        """Lit les champs ERC20 (name/symbol/decimals/totalSupply) de plusieurs contrats.
+        
+        Les appels sont regroupés dans des Multicall3 de MULTICALL_BATCH_SIZE
+        sous-appels, envoyés en parallèle, avec repli sur un batch JSON-RPC si
+        le contrat Multicall3 n'est pas disponible. Renvoie, par adresse, les
+        données brutes de chaque champ (None si l'appel a échoué).
+        """
+        fields = fields or list(ERC20_SELECTORS)
+        calls = [(address, field) for address in addresses for field in fields]
+        chunks = [calls[i:i + MULTICALL_BATCH_SIZE] for i in range(0, len(calls), MULTICALL_BATCH_SIZE)]
+        
+        async def read_chunk(chunk: List[tuple]) -> List[Optional[bytes]]:
+            targets = [(address, ERC20_SELECTORS[field]) for address, field in chunk]
+            try:
+                results = await rpc.multicall(targets)
+                return [data if success and data else None for success, data in results]
+            except (RPCError, ValueError) as e:
+                logger.debug(f"Multicall3 indisponible, repli sur batch JSON-RPC: {e}")
+            
+            results = await rpc.batch([("eth_call", [{"to": to, "data": data}, "latest"]) for to, data in targets])
+            for result in results:
+                # Erreur du noeud, pas revert du contrat : rien ne permet de conclure
+                if isinstance(result, RPCError) and "revert" not in str(result).lower():
+                    raise result
+            return [bytes.fromhex(result[2:]) if isinstance(result, str) and len(result) > 2 else None for result in results]
+        
+        chunk_results = await asyncio.gather(*(read_chunk(chunk) for chunk in chunks))
+        
+        raw = {address: {} for address in addresses}
+        for chunk, results in zip(chunks, chunk_results):
+            for (address, field), data in zip(chunk, results):
+                raw[address][field] = data
+        return raw
+    
+    async def get_tokens_metadata(self, addresses: List[str], chain: str) -> Dict[str, Optional[Dict]]:
+        """Récupère name/symbol/decimals de plusieurs contrats en quelques Multicall.
+        
+        Les contrats qui ne répondent pas comme un ERC20 sont renvoyés à None ;
+        cette réponse est gardée en cache CACHE_TTLS["not_erc20"] secondes.
+        """
+        keys = {address: f"{chain}:{address.lower()}" for address in addresses}
+        cached = await asyncio.gather(*(self.cache.get("token_meta", keys[address]) for address in addresses))
+        metadata = {address: meta for address, meta in zip(addresses, cached) if _valid_token_meta(meta)}
+        
+        unknown = [address for address in addresses if address not in metadata]
+        not_erc20 = await asyncio.gather(*(self.cache.get("not_erc20", keys[address]) for address in unknown))
+        missing = []
+        for address, known_not_erc20 in zip(unknown, not_erc20):
+            if known_not_erc20:
+                metadata[address] = None
+            else:
+                missing.append(address)
+        
+        if missing:
+            raw = await self._read_erc20_fields(self.get_rpc(chain), missing)
+            writes = []
+            for address in missing:
+                fields = raw[address]
+                meta = None
+                if all(data is not None for data in fields.values()):
+                    try:
+                        meta = {
+                            "name": _decode_string(fields["name"]),
+                            "symbol": _decode_string(fields["symbol"]),
+                            "decimals": _decode_decimals(fields["decimals"]),
+                        }
+                    except ValueError:
+                        meta = None
+                if meta:
+                    writes.append(self.cache.set("token_meta", keys[address], meta))
+                else:
+                    writes.append(self.cache.set("not_erc20", keys[address], True))
+                metadata[address] = meta
+            await asyncio.gather(*writes)
+        
+        return metadata
+    
+    async def get_token_info(self, address: str, chain: str) -> Dict:
+        """Récupère les informations basiques du token"""
+        try:
+            # name/symbol/decimals sont immuables : seul le totalSupply est relu
+            cache_key = f"{chain}:{address.lower()}"
+            meta = await self.cache.get("token_meta", cache_key)
+            if not _valid_token_meta(meta):
+                meta = None
+            fields = ["totalSupply"] if meta else None
+            raw = (await self._read_erc20_fields(self.get_rpc(chain), [address], fields))[address]
+            
+            missing = [field for field, data in raw.items() if data is None]
+            if missing:
+                raise ValueError(f"Contrat non ERC20 (échec: {', '.join(missing)})")
+            
+            if not meta:
+                meta = {
+                    "name": _decode_string(raw["name"]),
+                    "symbol": _decode_string(raw["symbol"]),
+                    "decimals": _decode_decimals(raw["decimals"]),
+                }
+                await self.cache.set("token_meta", cache_key, meta)
+            
+            name = meta["name"]
+            symbol = meta["symbol"]
+            decimals = meta["decimals"]
+            total_supply = _decode_uint(raw["totalSupply"])
+            
+            # Formater le total supply
+            total_supply_formatted = total_supply / (10 ** decimals)
+            
+            return {
+                "name": name,
+                "symbol": symbol,
+                "decimals": decimals,
+                "total_supply": f"{total_supply_formatted:,.0f}",
+                "address": address,
+                "chain": chain
+            }
+        except Exception as e:
+            logger.error(f"Erreur get_token_info: {e}")
+            return {"error": str(e)}
+    
+    async def _get_first_transactions(self, address: str, chain: str) -> List[Dict]:
+        """Récupère les premières transactions du contrat"""
+        if not self.explorer.supports(chain):
+            return []
+        
+        params = {
+            "module": "account",
+            "action": "txlist",
+            "address": address,
+            "startblock": 0,
+            "endblock": 99999999,
+            "page": 1,
+            "offset": 50,
+            "sort": "asc",
+        }
+        
+        try:
+            data = await self.explorer.get(chain, params)
+            if data.get("status") != "1":
+                return []
+            return data.get("result", [])
+        except Exception as e:
+            logger.error(f"Erreur _get_first_transactions: {e}")
+            return []
+    
+    async def detect_creation_platform(self, address: str, chain: str) -> Optional[Dict]:
+        """Détecte la plateforme de création du token (résultat mis en cache)"""
+        return await self.cache.get_or_fetch(
+            "platform", f"{chain}:{address.lower()}",
+            lambda: self._detect_creation_platform(address, chain)
+        )
+    
+    async def _detect_creation_platform(self, address: str, chain: str) -> Optional[Dict]:
+        """Détecte la plateforme de création du token.
+        
+        Les signaux locaux (calculés sur les premières transactions) sont
+        évalués d'abord : s'ils suffisent, aucune API de plateforme n'est
+        appelée. Sinon les vérifications distantes sont lancées une seule
+        fois, en parallèle ; on renvoie la première réponse positive par
+        ordre de priorité et on annule les vérifications restantes.
+        """
+        # Les launchpads supportés sont tous sur Base
+        if chain != "base":
+            return None
+        
+        # Plateforme déjà connue de l'indexeur local (usine de launchpad)
+        indexed = await self._indexed_contract(address, chain)
+        if indexed and indexed.get("platform"):
+            for detector in PLATFORM_DETECTORS:
+                if detector["name"] == indexed["platform"]:
+                    return self._platform_result(detector, address, chain)
+            explorer_name, explorer_url = CHAIN_EXPLORERS[chain]
+            return {"name": indexed["platform"], "url": f"{explorer_url}/address/{indexed['factory']}"}
+        
+        remote = [d for d in PLATFORM_DETECTORS if not d.get("local")]
+        local = [d for d in PLATFORM_DETECTORS if d.get("local")]
+        
+        transactions = (await self._get_first_transactions(address, chain))[:10]
+        for detector in local:
+            if getattr(self, detector["check"])(transactions):
+                return self._platform_result(detector, address, chain)
+        
+        tasks = [asyncio.create_task(self._run_platform_check(d, address, chain)) for d in remote]
+        try:
+            # Une plateforme prioritaire indisponible rend le résultat incertain :
+            # il est signalé et, via la clé "error", pas gardé en cache
+            unavailable = []
+            result = None
+            for detector, task in zip(remote, tasks):
+                found = await task
+                if found:
+                    result = self._platform_result(detector, address, chain)
+                    break
+                if found is None:
+                    unavailable.append(detector["name"])
+            
+            if unavailable:
+                result = result or {"name": None}
+                result.update({"unavailable": unavailable, "error": "vérification indisponible"})
+            return result
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _run_platform_check(self, detector: Dict, address: str, chain: str) -> Optional[bool]:
+        """Interroge l'API d'une plateforme derrière son disjoncteur.
+        
+        Renvoie True/False, ou None si le service est indisponible (erreur,
+        délai dépassé ou circuit ouvert). Les réponses négatives sont gardées
+        en cache peu de temps (CACHE_TTLS["platform_miss"]).
+        """
+        miss_key = f"{detector['name']}:{chain}:{address.lower()}"
+        if await self.cache.get("platform_miss", miss_key):
+            return False
+        
+        breaker = self.breakers[detector["name"]]
+        if not breaker.allow():
+            return None
+        
+        started_at = time.monotonic()
+        try:
+            found = await getattr(self, detector["check"])(address, chain)
+        except asyncio.CancelledError:
+            breaker.cancel()
+            raise
+        except Exception as e:
+            breaker.record(False, time.monotonic() - started_at)
+            logger.warning(f"API {detector['name']} indisponible ({type(e).__name__}): {e}")
+            return None
+        
+        breaker.record(True, time.monotonic() - started_at)
+        if not found:
+            await self.cache.set("platform_miss", miss_key, True)
+        return found
+    
+    def _platform_result(self, detector: Dict, address: str, chain: str) -> Dict:
+        return {
+            "name": detector["name"],
+            "url": detector["url"].format(address=address, chain=chain)
+        }
+    
+    def _check_zora(self, transactions: List[Dict]) -> bool:
+        """Vérifie si le token a été déployé via Zora (signal local)"""
+        for tx in transactions:
+            tx_from = tx.get("from", "").lower()
+            tx_input = tx.get("input", "")
+            if "0x777777" in tx_from or "zora" in tx_input.lower():
+                return True
+        return False
+    
+    @staticmethod
+    def _platform_status(resp: aiohttp.ClientResponse) -> bool:
+        """200 : token présent ; autre 4xx : absent ; 429/5xx : service indisponible"""
+        if resp.status == 200:
+            return True
+        if resp.status == 429 or resp.status >= 500:
+            raise PlatformUnavailable(f"HTTP {resp.status}")
+        return False
+    
+    async def _check_clanker(self, address: str, chain: str) -> bool:
+        """Vérifie si le token est sur Clanker"""
+        url = f"https://www.clanker.world/api/tokens/{address}"
+        async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
+            if self._platform_status(resp):
+                data = await resp.json()
+                return bool(data)
+        return False
+    
+    async def _check_ape_store(self, address: str, chain: str) -> bool:
+        """Vérifie si le token est sur Ape.store"""
+        url = f"https://ape.store/api/token/base/{address}"
+        async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
+            return self._platform_status(resp)
+    
+    async def _check_klik(self, address: str, chain: str) -> bool:
+        """Vérifie si le token est sur Klik"""
+        url = f"https://klik.network/api/token/{address}"
+        async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
+            return self._platform_status(resp)
+    
+    async def _check_wow(self, address: str, chain: str) -> bool:
+        """Vérifie si le token est sur WOW"""
+        url = f"https://wow.xyz/api/token/base/{address}"
+        async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
+            return self._platform_status(resp)
+    
+    async def _check_uniswap(self, address: str, chain: str) -> bool:
+        """Vérifie si le token a une pool Uniswap"""
+        # Utilise l'API Uniswap v3 subgraph pour Base
+        subgraph_url = "https://api.studio.thegraph.com/query/48211/uniswap-v3-base/version/latest"
+        
+        query = """
+        {
+          token(id: "%s") {
+            id
+            symbol
+            name
+          }
+        }
+        """ % address.lower()
+        
+        async with self.session.post(
+            subgraph_url,
+            json={"query": query},
+            timeout=aiohttp.ClientTimeout(total=10)
+        ) as resp:
+            if resp.status != 200:
+                raise PlatformUnavailable(f"HTTP {resp.status}")
+            data = await resp.json()
+        if data.get("errors"):
+            raise PlatformUnavailable(str(data["errors"])[:200])
+        return bool((data.get("data") or {}).get("token"))
+    
+    async def search_social_mentions(self, ticker: str) -> List[Link]:
+        """Recherche les mentions du ticker sur les réseaux sociaux"""
+        query = quote(f"${ticker}", safe="")
+        mentions = []
+        mentions.append(Link("Twitter/X", f"https://twitter.com/search?q={query}&f=live"))
+        mentions.append(Link("Farcaster", f"https://warpcast.com/~/search?q={query}"))
+        return mentions
+    
+    async def get_contract_creation_tx(self, token_address: str, chain: str) -> Optional[Dict]:
+        """Récupère la transaction de création du contrat (immuable, mise en cache).
+        
+        Renvoie FAILED si l'explorateur est en erreur.
+        """
+        return await self.cache.get_or_fetch(
+            "creation", f"{chain}:{token_address.lower()}",
+            lambda: self._fetch_contract_creation_tx(token_address, chain)
+        )
+    
+    async def _indexed_contract(self, address: str, chain: str) -> Optional[Dict]:
+        """Contrat connu de l'indexeur local, s'il est actif sur cette chaîne"""
+        if self.indexer is None or self.indexer.chain != chain:
+            return None
+        return await asyncio.to_thread(self.indexer.contract, address)
+    
+    async def _fetch_contract_creation_tx(self, token_address: str, chain: str) -> Optional[Dict]:
+        indexed = await self._indexed_contract(token_address, chain)
+        if indexed:
+            return {"deployer": indexed["deployer"], "tx_hash": indexed["tx_hash"]}
+        
+        try:
+            if not self.explorer.supports(chain):
+                return None
+            
+            params = {
+                "module": "contract",
+                "action": "getcontractcreation",
+                "contractaddresses": token_address,
+            }
+            
+            data = await self.explorer.get(chain, params)
+            if data.get("status") == "1" and data.get("result"):
+                result = data["result"][0]
+                return {
+                    "deployer": result.get("contractCreator"),
+                    "tx_hash": result.get("txHash")
+                }
+        except Exception as e:
+            logger.error(f"Erreur get_contract_creation_tx: {e}")
+            return FAILED
+        
+        return None
+    
+    async def get_deployer_tokens(self, deployer_address: str, current_token: str, chain: str, limit: int = 5) -> List[Dict]:
+        """Récupère les tokens créés par le déployeur (FAILED si l'explorateur est en erreur)"""
+        try:
+            # L'indexeur local connaît aussi les tokens créés via une usine,
+            # absents du txlist de l'explorateur
+            indexed = []
+            if self.indexer is not None and self.indexer.chain == chain:
+                indexed = [
+                    {"contractAddress": row["address"], "timeStamp": row["timestamp"]}
+                    for row in await asyncio.to_thread(self.indexer.contracts_by_deployer, deployer_address)
+                ]
+            
+            transactions = []
+            if self.explorer.supports(chain):
+                transactions = await self.cache.get_or_fetch(
+                    "txlist", f"{chain}:{deployer_address.lower()}",
+                    lambda: self._fetch_deployer_txlist(deployer_address, chain)
+                )
+            
+            created = indexed + [
+                tx for tx in transactions or []
+                # Transaction de création de contrat
+                if tx.get("to") == "" and tx.get("contractAddress")
+            ]
+            created.sort(key=lambda tx: int(tx["timeStamp"]), reverse=True)
+            
+            # Collecte des contrats créés (du plus récent au plus ancien)
+            candidates = []
+            seen_addresses = set()
+            for tx in created:
+                contract_addr = tx["contractAddress"]
+                
+                # Skip le token actuel et les doublons
+                if contract_addr.lower() == current_token.lower():
+                    continue
+                if contract_addr.lower() in seen_addresses:
+                    continue
+                
+                seen_addresses.add(contract_addr.lower())
+                candidates.append((contract_addr, tx))
+            
+            if not candidates:
+                return []
+            
+            # Métadonnées de tous les candidats en une passe ; les contrats non ERC20 sont écartés
+            metadata = await self.get_tokens_metadata([addr for addr, _ in candidates], chain)
+            
+            created_tokens = []
+            for contract_addr, tx in candidates:
+                meta = metadata.get(contract_addr)
+                if not meta:
+                    continue
+                created_tokens.append({
+                    "name": meta["name"],
+                    "symbol": meta["symbol"],
+                    "address": contract_addr,
+                    "timestamp": datetime.fromtimestamp(int(tx["timeStamp"])).strftime("%Y-%m-%d %H:%M")
+                })
+                if len(created_tokens) >= limit:
+                    break
+            
+            return created_tokens
+        except Exception as e:
+            logger.error(f"Erreur get_deployer_tokens: {e}")
+            return FAILED
+    
+    async def _fetch_deployer_txlist(self, deployer_address: str, chain: str) -> List[Dict]:
+        """Récupère les 100 dernières transactions d'un wallet"""
+        params = {
+            "module": "account",
+            "action": "txlist",
+            "address": deployer_address,
+            "startblock": 0,
+            "endblock": 99999999,
+            "page": 1,
+            "offset": 100,
+            "sort": "desc",
+        }
+        
+        data = await self.explorer.get(chain, params)
+        return self._txlist_result(chain, data)
+    
+    @staticmethod
+    def _txlist_result(chain: str, data: Dict) -> List[Dict]:
+        """Transactions d'une réponse txlist.
+        
+        L'API répond status "0" aussi bien pour un wallet sans transaction
+        que pour une erreur (clé invalide, "Query Timeout"...) : seul le
+        premier cas donne une liste vide, les autres lèvent ExplorerError
+        pour ne pas être mis en cache comme un wallet vide.
+        """
+        if data.get("status") != "1":
+            if data.get("message") == "No transactions found":
+                return []
+            raise ExplorerError(f"Explorateur {chain}: {data.get('message')} ({data.get('result')})")
+        return data.get("result", [])
+    
+    async def get_funding_address(self, deployer_address: str, chain: str) -> Optional[str]:
+        """Récupère l'adresse qui a financé le déployeur (première transaction entrante)"""
+        funders = await self.get_funders(deployer_address, chain)
+        if funders is FAILED:
+            return FAILED
+        return funders[0] if funders else None
+    
+    async def get_direct_funder(self, deployer_address: str, current_token: str, chain: str) -> Optional[Dict]:
+        """Financeur direct du déployeur (niveau 1 du graphe de financement) et ses tokens.
+        
+        Ne demande que les financeurs du déployeur, sans attendre le reste
+        du graphe. Les tokens ne sont pas cherchés pour un CEX ou un bridge.
+        """
+        funder = await self.get_funding_address(deployer_address, chain)
+        if funder is None or funder is FAILED:
+            return funder
+        label = WALLET_LABELS.get(funder.lower())
+        tokens = [] if label else await self.get_deployer_tokens(funder, current_token, chain, 5)
+        return {"address": funder, "label": label, "tokens": tokens}
+    
+    async def get_funders(self, wallet: str, chain: str) -> List[str]:
+        """Wallets ayant financé ce wallet, dans l'ordre de leur premier versement (immuable, mis en cache).
+        
+        Renvoie FAILED si l'explorateur est en erreur.
+        """
+        return await self.cache.get_or_fetch(
+            "funders", f"{chain}:{wallet.lower()}",
+            lambda: self._fetch_funders(wallet, chain)
+        )
+    
+    async def _fetch_funders(self, wallet: str, chain: str) -> List[str]:
+        funders = []
+        try:
+            if not self.explorer.supports(chain):
+                return []
+            
+            params = {
+                "module": "account",
+                "action": "txlist",
+                "address": wallet,
+                "startblock": 0,
+                "endblock": 99999999,
+                "page": 1,
+                "offset": 10,
+                "sort": "asc",
+            }
+            
+            data = await self.explorer.get(chain, params)
+            
+            # Transactions entrantes avec de la valeur, de la plus ancienne à la plus récente
+            for tx in self._txlist_result(chain, data):
+                if tx["to"].lower() == wallet.lower() and int(tx.get("value", 0)) > 0:
+                    if tx["from"].lower() not in [funder.lower() for funder in funders]:
+                        funders.append(tx["from"])
+        except Exception as e:
+            logger.error(f"Erreur get_funders: {e}")
+            return FAILED
+        
+        return funders
+    
+    async def explore_funding_graph(self, deployer: str, current_token: str, chain: str,
+                                    max_depth: int = FUNDING_MAX_DEPTH, max_fanout: int = FUNDING_MAX_FANOUT) -> Dict:
+        """Remonte les wallets de financement du déployeur en largeur d'abord.
+        
+        Chaque niveau est exploré en parallèle ; au plus max_fanout financeurs
+        sont suivis par wallet et FUNDING_MAX_WALLETS wallets au total. Le
+        parcours s'arrête sur les wallets étiquetés (CEX, bridges) de
+        WALLET_LABELS. Les financeurs et listes de contrats de chaque wallet
+        passent par le cache partagé, donc les graphes qui se recoupent entre
+        analyses réutilisent le travail déjà fait.
+        """
+        nodes = {deployer.lower(): {"address": deployer, "depth": 0, "funded_by": None, "label": None}}
+        frontier = [deployer]
+        complete = True
+        
+        for depth in range(1, max_depth + 1):
+            if not frontier:
+                break
+            funders_lists = await asyncio.gather(*(self.get_funders(wallet, chain) for wallet in frontier))
+            
+            next_frontier = []
+            for wallet, funders in zip(frontier, funders_lists):
+                if funders is FAILED:
+                    complete = False
+                    continue
+                for funder in funders[:max_fanout]:
+                    if funder.lower() in nodes or len(nodes) >= FUNDING_MAX_WALLETS:
+                        continue
+                    label = WALLET_LABELS.get(funder.lower())
+                    nodes[funder.lower()] = {"address": funder, "depth": depth, "funded_by": wallet, "label": label}
+                    # On ne remonte pas au-delà d'un CEX ou d'un bridge
+                    if not label:
+                        next_frontier.append(funder)
+            frontier = next_frontier
+        
+        wallets = [node for node in nodes.values() if not node["label"]]
+        token_lists = await asyncio.gather(
+            *(self.get_deployer_tokens(node["address"], current_token, chain, 5) for node in wallets)
+        )
+        for node, tokens in zip(wallets, token_lists):
+            node["tokens"] = tokens if tokens is not FAILED else []
+        
+        # Financeur direct : premier wallet du niveau 1, dans l'ordre des versements
+        funder = next((node for node in nodes.values() if node["depth"] == 1), None)
+        return {
+            "funder": funder,
+            "wallets": wallets,
+            "stops": [node for node in nodes.values() if node["label"]],
+            "depth": max(node["depth"] for node in nodes.values()),
+            "token_count": sum(len(node["tokens"]) for node in wallets),
+            # Faux si les financeurs ou les tokens d'un wallet n'ont pas pu être lus
+            "complete": complete and all(tokens is not FAILED for tokens in token_lists),
+        }
+    
+    def create_buttons(self, address: str, chain: str, show_chain: bool = False) -> InlineKeyboardMarkup:
+        """Crée les boutons pour les liens rapides"""
+        explorer_name, explorer_url = CHAIN_EXPLORERS[chain]
+        suffix = f" ({chain.upper()})" if show_chain else ""
+        first_row = [InlineKeyboardButton(f"📊 DEXScreener{suffix}", url=f"https://dexscreener.com/{chain}/{address}")]
+        if chain in GMGN_CHAINS:
+            first_row.append(InlineKeyboardButton(f"📈 GMGN{suffix}", url=f"https://gmgn.ai/{GMGN_CHAINS[chain]}/token/{address}"))
+        keyboard = [
+            first_row,
+            [
+                InlineKeyboardButton(f"🔍 {explorer_name}", url=f"{explorer_url}/token/{address}"),
+                InlineKeyboardButton(f"🦄 Uniswap{suffix}", url=f"https://app.uniswap.org/explore/tokens/{chain}/{address}")
+            ]
+        ]
+        return InlineKeyboardMarkup(keyboard)
+    
+    async def _run_stage(self, stage: str, coro):
+        """Exécute une étape de l'analyse avec son propre délai maximum"""
+        started_at = time.monotonic()
+        status = "ok"
+        try:
+            return await asyncio.wait_for(coro, STAGE_TIMEOUTS[stage])
+        except asyncio.TimeoutError:
+            logger.warning(f"Étape {stage} expirée après {STAGE_TIMEOUTS[stage]}s")
+            status = "timeout"
+            return TIMED_OUT
+        finally:
+            metrics.observe("analysis_stage_duration_seconds", time.monotonic() - started_at, stage=stage, status=status)
+            record_span("stage", stage, started_at, status=status)
+    
+    async def _deployer_branch(self, creation_task: asyncio.Task, address: str, chain: str):
+        """Tokens du déployeur, dès que la tx de création est connue"""
+        creation_info = await creation_task
+        if creation_info in (TIMED_OUT, FAILED) or not creation_info or not creation_info.get("deployer"):
+            return None
+        return await self._run_stage(
+            "deployer_tokens", self.get_deployer_tokens(creation_info["deployer"], address, chain, 5)
+        )
+    
+    async def _funder_branch(self, creation_task: asyncio.Task, address: str, chain: str):
+        """Financeur direct, dès que le déployeur est connu"""
+        creation_info = await creation_task
+        if creation_info in (TIMED_OUT, FAILED) or not creation_info or not creation_info.get("deployer"):
+            return None
+        return await self._run_stage(
+            "funder", self.get_direct_funder(creation_info["deployer"], address, chain)
+        )
+    
+    async def _cluster_branch(self, creation_task: asyncio.Task, address: str, chain: str):
+        """Graphe de financement, dès que le déployeur est connu"""
+        creation_info = await creation_task
+        if creation_info in (TIMED_OUT, FAILED) or not creation_info or not creation_info.get("deployer"):
+            return None
+        return await self._run_stage(
+            "funding_graph", self.explore_funding_graph(creation_info["deployer"], address, chain)
+        )
+    
+    def _add_token_list(self, section: ReportSection, tokens, empty_message: str):
+        """Ajoute à la section une liste de tokens créés par un wallet"""
+        if tokens is TIMED_OUT:
+            section.complete = False
+            section.line(f"  • {TIMED_OUT_MESSAGE}")
+        elif tokens is FAILED:
+            section.complete = False
+            section.line(f"  • {FAILED_MESSAGE}")
+        elif not tokens:
+            section.line(f"  • {empty_message}")
+        for token in tokens if tokens not in (TIMED_OUT, FAILED) else []:
+            section.line(f"  • {token['name']} (${token['symbol']}) - {token['timestamp']}")
+            section.line("    ", Code(token["address"]))
+    
+    async def _section_token(self, token_info_task: asyncio.Task) -> ReportSection:
+        """Infos du token et recherche sociale du ticker"""
+        token_info = await token_info_task
+        
+        section = ReportSection(SECTION_TITLES["token"])
+        if token_info is TIMED_OUT:
+            section.complete = False
+            section.line(f"⏱️ {TIMED_OUT_MESSAGE}")
+            ticker = "UNKNOWN"
+        elif "error" not in token_info:
+            section.line("• Nom: ", token_info["name"])
+            section.line("• Symbole: $", token_info["symbol"])
+            section.line("• Supply Total: ", token_info["total_supply"])
+            ticker = token_info["symbol"]
+        else:
+            section.complete = False
+            section.line("❌ Impossible de récupérer les infos du token")
+            ticker = "UNKNOWN"
+        
+        # Mentions sociales
+        section.blank()
+        section.line(Bold(f"💬 RECHERCHE SOCIALE (${ticker})"))
+        for mention in await self.search_social_mentions(ticker):
+            section.line("• 🔍 ", mention)
+        return section
+    
+    async def _section_platform(self, platform_task: asyncio.Task) -> ReportSection:
+        """Plateforme de création"""
+        platform = await platform_task
+        
+        section = ReportSection(SECTION_TITLES["platform"])
+        if platform is TIMED_OUT:
+            section.complete = False
+            section.line(f"• ⏱️ {TIMED_OUT_MESSAGE}")
+        elif platform:
+            if platform.get("name"):
+                section.line("• Créé sur: ", Link(platform["name"], platform["url"]))
+            else:
+                section.line("• Plateforme non détectée")
+            if platform.get("unavailable"):
+                section.complete = False
+                section.line(f"• ⚠️ Vérification indisponible: {', '.join(platform['unavailable'])}")
+        else:
+            section.line("• Plateforme non détectée (déploiement manuel ou plateforme inconnue)")
+        return section
+    
+    async def _section_deployer(self, address: str, chain: str, creation_task: asyncio.Task, deployer_task: asyncio.Task) -> ReportSection:
+        """Déployeur et ses tokens précédents"""
+        creation_info = await creation_task
+        explorer_name, explorer_url = CHAIN_EXPLORERS[chain]
+        
+        section = ReportSection(SECTION_TITLES["deployer"])
+        if creation_info in (TIMED_OUT, FAILED):
+            section.complete = False
+            section.line(f"• ⏱️ {TIMED_OUT_MESSAGE}" if creation_info is TIMED_OUT else f"• ⚠️ {FAILED_MESSAGE}")
+            section.line("• ", Link(f"Voir les détails sur {explorer_name}", f"{explorer_url}/token/{address}"))
+        elif creation_info and creation_info.get("deployer"):
+            deployer = creation_info["deployer"]
+            section.line("• Adresse: ", Code(deployer))
+            section.line("• ", Link(f"Voir sur {explorer_name}", f"{explorer_url}/address/{deployer}"))
+            section.blank()
+            
+            # Tokens précédents du déployeur
+            section.line(Bold("📋 Tokens créés par ce déployeur (max 5):"))
+            self._add_token_list(section, await deployer_task, "Aucun autre token trouvé récemment")
+        else:
+            # Si pas d'infos du déployeur, on met juste un lien vers Basescan
+            section.line("• ", Link(f"Voir les détails sur {explorer_name}", f"{explorer_url}/token/{address}"))
+        return section
+    
+    async def _section_funder(self, chain: str, creation_task: asyncio.Task, funder_task: asyncio.Task) -> ReportSection:
+        """Financeur direct du déployeur et ses tokens"""
+        explorer_name, explorer_url = CHAIN_EXPLORERS[chain]
+        creation_info = await creation_task
+        if creation_info in (TIMED_OUT, FAILED) or not creation_info or not creation_info.get("deployer"):
+            return ReportSection(complete=creation_info not in (TIMED_OUT, FAILED))
+        
+        funder = await funder_task
+        section = ReportSection(SECTION_TITLES["funder"])
+        if funder in (TIMED_OUT, FAILED):
+            section.complete = False
+            return section.line(f"• ⏱️ {TIMED_OUT_MESSAGE}" if funder is TIMED_OUT else f"• ⚠️ {FAILED_MESSAGE}")
+        if funder is None:
+            return section.line("• Wallet auto-financé ou données non disponibles")
+        section.line("• Adresse: ", Code(funder["address"]))
+        if funder["label"]:
+            # CEX ou bridge : le graphe ne remonte pas plus loin
+            return section.line(f"• Étiquette: {funder['label']}")
+        section.line("• ", Link(f"Voir sur {explorer_name}", f"{explorer_url}/address/{funder['address']}"))
+        section.blank()
+        section.line(Bold("📋 Tokens créés par le wallet de financement (max 5):"))
+        self._add_token_list(section, funder["tokens"], "Aucun token trouvé")
+        return section
+    
+    async def _section_cluster(self, creation_task: asyncio.Task, cluster_task: asyncio.Task) -> ReportSection:
+        """Résumé du cluster de wallets liés au déployeur par leur financement"""
+        creation_info = await creation_task
+        graph = await cluster_task
+        if graph is None:
+            return ReportSection(complete=creation_info not in (TIMED_OUT, FAILED))
+        
+        section = ReportSection(SECTION_TITLES["cluster"])
+        if graph is TIMED_OUT:
+            section.complete = False
+            return section.line(f"• ⏱️ {TIMED_OUT_MESSAGE}")
+        
+        if not graph["complete"]:
+            section.complete = False
+            section.line(f"• ⚠️ {FAILED_MESSAGE} pour certains wallets")
+        section.line(f"• Wallets explorés: {len(graph['wallets'])} (profondeur {graph['depth']})")
+        section.line(f"• Tokens déployés par le cluster: {graph['token_count']} (max 5 par wallet)")
+        
+        # Le financeur direct a déjà sa section
+        deployers = [node for node in graph["wallets"] if node["tokens"] and node is not graph["funder"]]
+        if deployers:
+            section.line("• Wallets déployeurs:")
+            for node in sorted(deployers, key=lambda node: -len(node["tokens"])):
+                section.line("  • ", Code(node["address"]), f" (niveau {node['depth']}): {len(node['tokens'])} token(s)")
+        for node in graph["stops"]:
+            if node is graph["funder"]:
+                continue
+            section.line(f"• Financé depuis: {node['label']} (niveau {node['depth']})")
+        return section
+    
+    @staticmethod
+    def _section_key(address: str, chain: str, name: str) -> str:
+        return f"{chain}:{address.lower()}:{name}:{REPORT_RENDERER.parse_mode}"
+    
+    async def _render_section(self, address: str, chain: str, name: str, build) -> str:
+        """Rend une section ; les sections complètes sont gardées en cache"""
+        section = await build
+        text = REPORT_RENDERER.section(section)
+        if section.complete:
+            await self.cache.set("section", self._section_key(address, chain, name), text)
+        elif current_trace.get() is not None:
+            current_trace.get().complete = False
+        return text
+    
+    def _render_sections(self, header: str, sections: Dict[str, asyncio.Future]) -> str:
+        """Assemble le rapport ; les sections encore en cours affichent leur titre"""
+        parts = [header]
+        for name, task in sections.items():
+            if task.done():
+                parts.append(task.result())
+            else:
+                parts.append(REPORT_RENDERER.section(ReportSection(SECTION_TITLES[name]).line(SECTION_PENDING)))
+        return "\n\n".join(part for part in parts if part)
+    
+    async def _stream_chain(self, address: str, chain: str) -> AsyncIterator[tuple]:
+        """Analyse d'un token sur une chaîne, produite section par section.
+        
+        Les branches indépendantes (infos du token, plateforme, création)
+        démarrent en même temps ; les étapes dépendantes (déployeur,
+        financement) s'enchaînent dès que leur entrée est disponible. Une
+        branche trop lente produit une section "délai dépassé" au lieu de
+        bloquer toute la réponse.
+        
+        Les sections déjà rendues et encore en cache sont reprises telles
+        quelles ; seules les branches nécessaires aux autres sont lancées.
+        """
+        header = REPORT_RENDERER.section(
+            ReportSection("🔍 ANALYSE DU TOKEN")
+            .blank()
+            .line(Bold("⛓️ Chaîne:"), f" {chain.upper()}")
+            .line(Bold("📝 Adresse:"), " ", Code(address))
+        )
+        
+        # Branches lancées à la demande, partagées entre les sections qui en dépendent
+        branches = {}
+        
+        def branch(name: str, start) -> asyncio.Task:
+            if name not in branches:
+                branches[name] = asyncio.create_task(start())
+            return branches[name]
+        
+        def creation() -> asyncio.Task:
+            return branch("creation", lambda: self._run_stage("creation", self.get_contract_creation_tx(address, chain)))
+        
+        def cluster() -> asyncio.Task:
+            return branch("cluster", lambda: self._cluster_branch(creation(), address, chain))
+        
+        builders = {
+            "token": lambda: self._section_token(
+                branch("token_info", lambda: self._run_stage("token_info", self.get_token_info(address, chain)))
+            ),
+            "platform": lambda: self._section_platform(
+                branch("platform", lambda: self._run_stage("platform", self.detect_creation_platform(address, chain)))
+            ),
+            "deployer": lambda: self._section_deployer(
+                address, chain, creation(), branch("deployer", lambda: self._deployer_branch(creation(), address, chain))
+            ),
+            # Le financeur direct (niveau 1) n'attend pas le graphe complet
+            "funder": lambda: self._section_funder(
+                chain, creation(), branch("funder", lambda: self._funder_branch(creation(), address, chain))
+            ),
+            "cluster": lambda: self._section_cluster(creation(), cluster()),
+        }
+        
+        sections = {}
+        for name, build in builders.items():
+            cached = await self.cache.get("section", self._section_key(address, chain, name))
+            if cached is not None:
+                sections[name] = asyncio.get_running_loop().create_future()
+                sections[name].set_result(cached)
+            else:
+                sections[name] = asyncio.create_task(self._render_section(address, chain, name, build()))
+        
+        try:
+            pending = {task for task in sections.values() if not task.done()}
+            if pending:
+                yield (self._render_sections(header, sections), None)
+            
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if pending:
+                    yield (self._render_sections(header, sections), None)
+            
+            # Créer les boutons
+            buttons = self.create_buttons(address, chain)
+            
+            yield (self._render_sections(header, sections), buttons)
+        finally:
+            for task in [*branches.values(), *sections.values()]:
+                task.cancel()
+    
+    async def stream_analysis(self, address: str, chains: Optional[List[str]] = None) -> AsyncIterator[tuple]:
+        """Analyse complète d'un token, produite section par section.
+        
+        Quand le contrat existe sur plusieurs chaînes, chacune est analysée
+        en parallèle et les rapports sont affichés l'un sous l'autre.
+        
+        Chaque élément produit est un couple (rapport, boutons) reflétant les
+        sections déjà terminées ; seul le dernier porte les boutons.
+        """
+        await self.init_session()
+        
+        # Validation de l'adresse
+        if not is_address(address):
+            yield ("❌ Adresse de contrat invalide", None)
+            return
+        
+        # Détection de la chaîne
+        if chains is None:
+            chains = await self.detect_chains(address)
+        if not chains:
+            yield ("❌ Aucun contrat trouvé à cette adresse sur les chaînes supportées", None)
+            return
+        if len(chains) == 1:
+            async for snapshot in self._stream_chain(address, chains[0]):
+                yield snapshot
+            return
+        
+        # Plusieurs chaînes : on fusionne les flux au fil de l'eau
+        latest = {chain: ("", None) for chain in chains}
+        updates = asyncio.Queue()
+        
+        async def follow(chain: str):
+            try:
+                async for snapshot in self._stream_chain(address, chain):
+                    await updates.put((chain, snapshot))
+            finally:
+                await updates.put((chain, None))
+        
+        tasks = [asyncio.create_task(follow(chain)) for chain in chains]
+        try:
+            running = len(chains)
+            while running:
+                chain, snapshot = await updates.get()
+                if snapshot is None:
+                    running -= 1
+                    continue
+                latest[chain] = snapshot
+                if running and not updates.qsize():
+                    yield ("\n\n➖➖➖➖➖\n\n".join(text for text, _ in latest.values() if text), None)
+            
+            for task in tasks:
+                task.result()
+            keyboard = []
+            for chain in chains:
+                keyboard.extend(self.create_buttons(address, chain, show_chain=True).inline_keyboard)
+            yield (
+                "\n\n➖➖➖➖➖\n\n".join(text for text, _ in latest.values() if text),
+                InlineKeyboardMarkup(keyboard)
+            )
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def analyze_token(self, address: str) -> tuple[str, InlineKeyboardMarkup]:
+        """Analyse complète d'un token (rapport final uniquement)"""
+        result = ("", None)
+        async for result in self.stream_analysis(address):
+            pass
+        return result
+    
+    async def analyze_batch(self, addresses: List[str]) -> List[Dict]:
+        """Analyse résumée de plusieurs tokens, classée par niveau de risque.
+        
+        Les recherches communes ne sont faites qu'une fois pour tout le lot :
+        métadonnées lues en un Multicall par chaîne, historique et financeur
+        de chaque déployeur distinct. Chaque ligne porte ses drapeaux de
+        risque et un score ; la liste est triée du plus risqué au moins risqué.
+        """
+        await self.init_session()
+        
+        unique = {}
+        for address in addresses:
+            if is_address(address):
+                unique.setdefault(address.lower(), to_checksum_address(address))
+        addresses = list(unique.values())
+        
+        chains = await asyncio.gather(*(self.detect_chains(address) for address in addresses))
+        rows = [
+            {"address": address, "chain": found[0] if found else None, "flags": [], "score": 0}
+            for address, found in zip(addresses, chains)
+        ]
+        rows_by_chain = {}
+        for row in rows:
+            if row["chain"]:
+                rows_by_chain.setdefault(row["chain"], []).append(row)
+        
+        async def read_metadata(chain: str, chain_rows: List[Dict]):
+            try:
+                metadata = await self._run_stage(
+                    "token_info", self.get_tokens_metadata([row["address"] for row in chain_rows], chain)
+                )
+            except Exception as e:
+                logger.error(f"Erreur métadonnées du lot ({chain}): {e}")
+                metadata = TIMED_OUT
+            for row in chain_rows:
+                row["meta"] = TIMED_OUT if metadata is TIMED_OUT else metadata.get(row["address"])
+        
+        async def read_token(row: Dict):
+            if not row["chain"]:
+                return
+            row["platform"], row["creation"] = await asyncio.gather(
+                self._run_stage("platform", self.detect_creation_platform(row["address"], row["chain"])),
+                self._run_stage("creation", self.get_contract_creation_tx(row["address"], row["chain"])),
+            )
+        
+        await asyncio.gather(
+            *(read_metadata(chain, chain_rows) for chain, chain_rows in rows_by_chain.items()),
+            *(read_token(row) for row in rows)
+        )
+        
+        # Une seule recherche par déployeur, même s'il a lancé plusieurs tokens du lot
+        deployers = {}
+        for row in rows:
+            creation = row.get("creation")
+            if creation and creation not in (TIMED_OUT, FAILED) and creation.get("deployer"):
+                row["deployer"] = creation["deployer"]
+                deployers[(row["chain"], creation["deployer"].lower())] = creation["deployer"]
+        
+        async def read_deployer(chain: str, deployer: str):
+            return await asyncio.gather(
+                self._run_stage("deployer_tokens", self.get_deployer_tokens(deployer, "", chain, 10)),
+                self._run_stage("funder", self.get_funding_address(deployer, chain)),
+            )
+        
+        deployer_info = dict(zip(
+            deployers,
+            await asyncio.gather(*(read_deployer(chain, deployer) for (chain, _), deployer in deployers.items()))
+        ))
+        
+        deployer_counts = Counter(
+            (row["chain"], row["deployer"].lower()) for row in rows if row.get("deployer")
+        )
+        funder_counts = Counter()
+        for (chain, _), (_, funder) in deployer_info.items():
+            if funder and funder not in (TIMED_OUT, FAILED) and not WALLET_LABELS.get(funder.lower()):
+                funder_counts[(chain, funder.lower())] += 1
+        
+        for row in rows:
+            self._flag_batch_row(row, deployer_info, deployer_counts, funder_counts)
+        
+        rows.sort(key=lambda row: row["score"], reverse=True)
+        return rows
+    
+    def _flag_batch_row(self, row: Dict, deployer_info: Dict, deployer_counts: Counter, funder_counts: Counter):
+        """Renseigne les drapeaux de risque et le score d'une ligne de /batch"""
+        def flag(label: str, weight: int):
+            row["flags"].append(label)
+            row["score"] += weight
+        
+        if not row["chain"]:
+            flag("aucun contrat trouvé", 0)
+            return
+        
+        meta = row.get("meta")
+        if meta is None:
+            flag("non ERC20", 3)
+        
+        deployer = row.get("deployer")
+        if not deployer:
+            if row.get("creation") not in (TIMED_OUT, FAILED):
+                flag("déployeur inconnu", 1)
+            return
+        
+        key = (row["chain"], deployer.lower())
+        previous, funder = deployer_info[key]
+        if previous not in (TIMED_OUT, FAILED):
+            previous = [token for token in previous or [] if token["address"].lower() != row["address"].lower()]
+            row["deployer_tokens"] = len(previous)
+            if len(previous) >= 3:
+                flag(f"déployeur en série ({len(previous)}{'+' if len(previous) >= 9 else ''} tokens)", 2)
+        if deployer_counts[key] > 1:
+            flag(f"même déployeur que {deployer_counts[key] - 1} autre(s) token(s) du lot", 2)
+        
+        if funder and funder not in (TIMED_OUT, FAILED):
+            row["funder"] = funder
+            row["funder_label"] = WALLET_LABELS.get(funder.lower())
+            if funder_counts[(row["chain"], funder.lower())] > 1:
+                flag("financeur commun avec d'autres déployeurs du lot", 1)
+
+class SharedAnalysis:
+    """Diffusion d'une analyse en cours à plusieurs abonnés.
+    
+    Un abonné lent ne voit que le dernier état publié : les mises à jour
+    intermédiaires sont regroupées.
+    """
+    
+    def __init__(self):
+        self.latest = None
+        self.finished = False
+        self.error = None
+        self._changed = asyncio.Event()
+    
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+    
+    def publish(self, snapshot: tuple):
+        self.latest = snapshot
+        self._notify()
+    
+    def finish(self, error: Optional[BaseException] = None):
+        self.finished = True
+        self.error = error
+        self._notify()
+    
+    async def follow(self) -> AsyncIterator[tuple]:
+        """Produit les états successifs de l'analyse ; le dernier est le rapport final"""
+        seen = None
+        while True:
+            changed = self._changed
+            if self.latest is not None and self.latest is not seen:
+                seen = self.latest
+                yield seen
+            if self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
+
+class AnalysisRegistry:
+    """Partage des analyses entre chats.
+    
+    Les demandes concurrentes pour une même adresse (et chaîne) suivent la
+    même analyse en cours, et un résultat terminé est réutilisé pendant
+    ANALYSIS_FRESHNESS secondes.
+    
+    Avec un backend partagé, le partage s'étend aux autres réplicas : le
+    premier qui réserve l'adresse produit l'analyse et publie ses états,
+    les autres les relisent au lieu de refaire les mêmes appels.
+    """
+    
+    def __init__(self, analyzer: TokenAnalyzer, freshness: float = ANALYSIS_FRESHNESS, backend=None):
+        self.analyzer = analyzer
+        self.freshness = freshness
+        self.backend = backend
+        self._in_flight = {}
+        self._recent = {}
+        self._tasks = set()
+        # Traces des dernières analyses, consultables avec /debug par les
+        # chats qui les ont demandées (voir allow_debug)
+        self.traces = OrderedDict()
+        self._trace_chats = OrderedDict()
+    
+    def _store(self, key: tuple, result: tuple):
+        now = time.monotonic()
+        for old_key in [k for k, (expires_at, _) in self._recent.items() if expires_at <= now]:
+            del self._recent[old_key]
+        self._recent[key] = (now + self.freshness, result)
+    
+    @staticmethod
+    def _backend_name(key: tuple) -> str:
+        return f"{key[0]}:{','.join(key[1])}"
+    
+    @staticmethod
+    def _encode(snapshot: tuple) -> str:
+        text, buttons = snapshot
+        return json.dumps({"text": text, "buttons": buttons.to_dict() if buttons else None})
+    
+    @staticmethod
+    def _decode(raw: str) -> tuple:
+        data = json.loads(raw)
+        buttons = InlineKeyboardMarkup.de_json(data["buttons"], None) if data["buttons"] else None
+        return data["text"], buttons
+    
+    async def _share(self, operation: str, *args):
+        """Opération sur le backend partagé ; une panne n'interrompt pas l'analyse locale"""
+        try:
+            return await getattr(self.backend, operation)(*args)
+        except Exception as e:
+            logger.warning(f"Backend partagé indisponible ({operation}): {e}")
+            return None
+    
+    async def _run(self, key: tuple, shared: SharedAnalysis, address: str, chains: List[str]):
+        """Produit l'analyse ici, ou suit celle déjà lancée par un autre réplica"""
+        try:
+            if self.backend is not None and await self._follow_remote(key, shared):
+                return
+            await self._produce(key, shared, address, chains)
+        finally:
+            self._in_flight.pop(key, None)
+    
+    async def _follow_remote(self, key: tuple, shared: SharedAnalysis) -> bool:
+        """Relit l'analyse d'un autre réplica jusqu'à son rapport final.
+        
+        Renvoie False dès que ce réplica obtient la réservation de l'adresse
+        (personne d'autre ne l'analyse, ou son propriétaire a disparu) : c'est
+        alors à lui de la produire.
+        """
+        name = self._backend_name(key)
+        last_raw = None
+        while True:
+            try:
+                done = await self.backend.get(f"analysis:done:{name}")
+                if done is not None:
+                    snapshot = self._decode(done)
+                    shared.publish(snapshot)
+                    shared.finish()
+                    self._store(key, snapshot)
+                    return True
+                if await self.backend.set_if_absent(f"analysis:owner:{name}", REPLICA_ID, ANALYSIS_CLAIM_TTL):
+                    return False
+                latest = await self.backend.get(f"analysis:latest:{name}")
+            except Exception as e:
+                logger.warning(f"Backend partagé indisponible, analyse locale: {e}")
+                return False
+            if latest is not None and latest != last_raw:
+                last_raw = latest
+                shared.publish(self._decode(latest))
+            await asyncio.sleep(REMOTE_POLL_INTERVAL)
+    
+    async def _produce(self, key: tuple, shared: SharedAnalysis, address: str, chains: List[str]):
+        trace = Trace(key[0])
+        current_trace.set(trace)
+        name = self._backend_name(key)
+        try:
+            async for snapshot in self.analyzer.stream_analysis(address, chains):
+                shared.publish(snapshot)
+                if self.backend is not None:
+                    await self._share("set", f"analysis:latest:{name}", self._encode(snapshot), ANALYSIS_CLAIM_TTL)
+        except asyncio.CancelledError:
+            shared.finish(RuntimeError("Analyse annulée"))
+            raise
+        except Exception as e:
+            shared.finish(e)
+        else:
+            shared.finish()
+            # Un rapport avec des sections en délai dépassé n'est pas réutilisé
+            if trace.complete:
+                self._store(key, shared.latest)
+                if self.backend is not None and shared.latest is not None and self.freshness > 0:
+                    await self._share("set", f"analysis:done:{name}", self._encode(shared.latest), self.freshness)
+        finally:
+            if self.backend is not None:
+                await self._share("release", f"analysis:owner:{name}", REPLICA_ID)
+            trace.finish()
+            metrics.observe("analysis_duration_seconds", trace.duration)
+            self.traces[trace.name] = trace
+            self.traces.move_to_end(trace.name)
+            while len(self.traces) > TRACE_HISTORY:
+                self.traces.popitem(last=False)
+    
+    def allow_debug(self, address: str, chat_id: int):
+        """Autorise le chat à consulter la trace de cette adresse avec /debug"""
+        address = address.lower()
+        self._trace_chats.setdefault(address, set()).add(chat_id)
+        self._trace_chats.move_to_end(address)
+        while len(self._trace_chats) > TRACE_HISTORY:
+            self._trace_chats.popitem(last=False)
+    
+    def can_debug(self, address: str, chat_id: int) -> bool:
+        return chat_id in self._trace_chats.get(address.lower(), ())
+    
+    async def _key(self, address: str) -> tuple:
+        return (address.lower(), tuple(await self.analyzer.detect_chains(address)))
+    
+    def is_shared(self, address: str) -> bool:
+        """Vrai si l'adresse a déjà une analyse en cours ou récente à suivre.
+        
+        Test sur l'adresse seule, sans détection des chaînes : aucun appel
+        RPC n'est fait avant qu'un créneau soit accordé à la demande.
+        """
+        address = address.lower()
+        now = time.monotonic()
+        return (
+            any(key[0] == address for key in self._in_flight)
+            or any(key[0] == address and expires_at > now for key, (expires_at, _) in self._recent.items())
+        )
+    
+    async def stream(self, address: str) -> AsyncIterator[tuple]:
+        """Suit l'analyse d'une adresse, en réutilisant une analyse en cours ou récente"""
+        key = await self._key(address)
+        
+        recent = self._recent.get(key)
+        if recent and recent[0] > time.monotonic():
+            yield recent[1]
+            return
+        
+        shared = self._in_flight.get(key)
+        if shared is None:
+            shared = SharedAnalysis()
+            self._in_flight[key] = shared
+            # Tâche indépendante : un chat qui abandonne n'annule pas l'analyse des autres
+            task = asyncio.create_task(self._run(key, shared, address, list(key[1])))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        
+        async for snapshot in shared.follow():
+            yield snapshot
+    
+    async def analyze(self, address: str) -> tuple[str, InlineKeyboardMarkup]:
+        """Analyse une adresse et renvoie le rapport final"""
+        result = ("", None)
+        async for result in self.stream(address):
+            pass
+        return result
+
+class SchedulerFull(Exception):
+    """La file d'attente des analyses est pleine"""
+
+class UserLimitReached(Exception):
+    """L'utilisateur a déjà trop d'analyses en cours ou en attente"""
+
+class AnalysisTicket:
+    """Place réservée dans l'ordonnanceur pour une analyse"""
+    
+    def __init__(self, scheduler: "AnalysisScheduler", chat_id: int, user_id: int):
+        self.scheduler = scheduler
+        self.chat_id = chat_id
+        self.user_id = user_id
+        self.granted = asyncio.get_running_loop().create_future()
+        self.released = False
+    
+    @property
+    def position(self) -> int:
+        """Position dans la file (0 si l'analyse peut démarrer)"""
+        return self.scheduler.position(self)
+    
+    async def wait(self):
+        """Attend qu'un créneau d'analyse se libère"""
+        try:
+            await self.granted
+        except asyncio.CancelledError:
+            self.release()
+            raise
+    
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.scheduler._release(self)
+
+class AnalysisScheduler:
+    """Limite le nombre d'analyses simultanées.
+    
+    Au-delà de max_concurrent, les demandes attendent dans une file bornée.
+    Les créneaux libérés sont attribués chat par chat à tour de rôle, pour
+    qu'un groupe très actif ne monopolise pas le bot, et chaque utilisateur
+    est limité à max_per_user demandes en cours ou en attente.
+    """
+    
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_ANALYSES, max_queued: int = ANALYSIS_QUEUE_SIZE,
+                 max_per_user: int = MAX_ANALYSES_PER_USER):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.max_per_user = max_per_user
+        self.running = 0
+        self._queues = OrderedDict()
+        self._per_user = Counter()
+    
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+    
+    def _waiting_order(self) -> List[AnalysisTicket]:
+        """Tickets en attente dans l'ordre où ils seront servis (tourniquet par chat)"""
+        queues = [list(queue) for queue in self._queues.values()]
+        order = []
+        depth = 0
+        while any(depth < len(queue) for queue in queues):
+            order.extend(queue[depth] for queue in queues if depth < len(queue))
+            depth += 1
+        return order
+    
+    def position(self, ticket: AnalysisTicket) -> int:
+        if ticket.granted.done():
+            return 0
+        try:
+            return self._waiting_order().index(ticket) + 1
+        except ValueError:
+            return 0
+    
+    def submit(self, chat_id: int, user_id: int) -> AnalysisTicket:
+        """Réserve une place ; lève SchedulerFull ou UserLimitReached si impossible"""
+        if self._per_user[user_id] >= self.max_per_user:
+            raise UserLimitReached()
+        
+        ticket = AnalysisTicket(self, chat_id, user_id)
+        if self.running < self.max_concurrent and not self._queues:
+            self.running += 1
+            ticket.granted.set_result(True)
+        elif self.queued >= self.max_queued:
+            raise SchedulerFull()
+        else:
+            self._queues.setdefault(chat_id, deque()).append(ticket)
+        
+        self._per_user[user_id] += 1
+        return ticket
+    
+    def _release(self, ticket: AnalysisTicket):
+        self._per_user[ticket.user_id] -= 1
+        if self._per_user[ticket.user_id] <= 0:
+            del self._per_user[ticket.user_id]
+        
+        if not ticket.granted.done():
+            # Abandon avant le démarrage : on retire simplement le ticket de la file
+            queue = self._queues.get(ticket.chat_id)
+            if queue and ticket in queue:
+                queue.remove(ticket)
+                if not queue:
+                    del self._queues[ticket.chat_id]
+            ticket.granted.cancel()
+            return
+        
+        self.running -= 1
+        self._grant_next()
+    
+    def _grant_next(self):
+        while self._queues and self.running < self.max_concurrent:
+            chat_id, queue = next(iter(self._queues.items()))
+            ticket = queue.popleft()
+            # Le chat passe en fin de tourniquet
+            del self._queues[chat_id]
+            if queue:
+                self._queues[chat_id] = queue
+            self.running += 1
+            ticket.granted.set_result(True)
+
+class InlineBatches:
+    """Analyses groupées du mode inline.
+    
+    Chaque lot passe par l'ordonnanceur (créneau et limite par utilisateur,
+    comme /batch). Les requêtes inline pour le même ensemble d'adresses
+    suivent le lot déjà lancé, et au plus max_tasks lots distincts peuvent
+    tourner, y compris ceux qui continuent après INLINE_QUERY_TIMEOUT.
+    """
+    
+    def __init__(self, analyzer: "TokenAnalyzer", scheduler: AnalysisScheduler,
+                 max_tasks: int = INLINE_MAX_BACKGROUND):
+        self.analyzer = analyzer
+        self.scheduler = scheduler
+        self.max_tasks = max_tasks
+        self._tasks = {}
+    
+    def start(self, user_id: int, addresses: List[str]) -> asyncio.Task:
+        """Lot en cours pour ces adresses, ou nouveau lot ; lève SchedulerFull
+        ou UserLimitReached si impossible"""
+        key = frozenset(address.lower() for address in addresses)
+        task = self._tasks.get(key)
+        if task is not None:
+            return task
+        if len(self._tasks) >= self.max_tasks:
+            raise SchedulerFull()
+        # Pas de chat en mode inline : l'utilisateur tient lieu de file
+        ticket = self.scheduler.submit(user_id, user_id)
+        task = asyncio.create_task(self._run(ticket, addresses))
+        self._tasks[key] = task
+        task.add_done_callback(lambda task: self._done(key, task))
+        return task
+    
+    async def _run(self, ticket: AnalysisTicket, addresses: List[str]) -> List[Dict]:
+        try:
+            await ticket.wait()
+            return await self.analyzer.analyze_batch(addresses)
+        finally:
+            ticket.release()
+    
+    def _done(self, key: frozenset, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled() and task.exception():
+            logger.error(f"Erreur inline: {task.exception()}")
+    
+    async def close(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+def paginate(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT,
+             renderer: Optional[ReportRenderer] = None) -> List[str]:
+    """Découpe un rapport en pages d'au plus limit caractères.
+    
+    Les coupures se font entre paragraphes, sinon entre lignes, et pour une
+    ligne trop longue entre deux fragments rendus (voir ReportRenderer.cut) :
+    aucune balise ni séquence d'échappement n'est coupée, les pages restent
+    valides.
+    """
+    renderer = renderer or REPORT_RENDERER
+    pages, current = [], ""
+    for block in text.split("\n\n"):
+        candidate = f"{current}\n\n{block}" if current else block
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            pages.append(current)
+        while len(block) > limit:
+            cut = block.rfind("\n", 0, limit + 1)
+            if cut <= 0:
+                cut = renderer.cut(block, limit)
+            pages.append(block[:cut])
+            block = block[cut:].lstrip("\n")
+        current = block
+    if current:
+        pages.append(current)
+    return pages or [""]
+
+class ReportPages:
+    """Pages des rapports trop longs pour un message.
+    
+    Les pages sont rangées dans le backend partagé : les boutons
+    "Suivant"/"Précédent" fonctionnent quel que soit le réplica qui reçoit
+    le clic.
+    """
+    
+    def __init__(self, backend, ttl: float = REPORT_PAGES_TTL):
+        self.backend = backend
+        self.ttl = ttl
+    
+    async def first_page(self, text: str, buttons: Optional[InlineKeyboardMarkup]) -> tuple:
+        """Première page du rapport et son clavier (le texte tel quel s'il tient en un message)"""
+        pages = paginate(text)
+        if len(pages) == 1:
+            return text, buttons
+        report_id = hashlib.sha1(text.encode()).hexdigest()[:16]
+        await self.backend.set(
+            f"pages:{report_id}",
+            json.dumps({"pages": pages, "buttons": buttons.to_dict() if buttons else None}),
+            self.ttl
+        )
+        return pages[0], self.keyboard(report_id, 0, len(pages), buttons)
+    
+    async def page(self, report_id: str, index: int) -> Optional[tuple]:
+        """Page demandée et son clavier, ou None si le rapport a expiré"""
+        raw = await self.backend.get(f"pages:{report_id}")
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        pages = data["pages"]
+        index = max(0, min(index, len(pages) - 1))
+        buttons = InlineKeyboardMarkup.de_json(data["buttons"], None) if data["buttons"] else None
+        return pages[index], self.keyboard(report_id, index, len(pages), buttons)
     
-    async def _check_ape_store(self, address: str) -> bool:
-        """Vérifie si le token est sur Ape.store"""
-        try:
-            url = f"https://ape.store/api/token/base/{address}"
-            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                return resp.status == 200
-        except:
-            pass
-        return False
+    @staticmethod
+    def keyboard(report_id: str, index: int, total: int, buttons: Optional[InlineKeyboardMarkup]) -> InlineKeyboardMarkup:
+        navigation = []
+        if index > 0:
+            navigation.append(InlineKeyboardButton("◀️ Précédent", callback_data=f"page:{report_id}:{index - 1}"))
+        navigation.append(InlineKeyboardButton(f"{index + 1}/{total}", callback_data=f"page:{report_id}:{index}"))
+        if index < total - 1:
+            navigation.append(InlineKeyboardButton("Suivant ▶️", callback_data=f"page:{report_id}:{index + 1}"))
+        return InlineKeyboardMarkup([navigation, *(buttons.inline_keyboard if buttons else [])])
+
+class ProgressiveMessage:
+    """Édite un message Telegram au fil de l'analyse.
     
-    async def _check_klik(self, address: str) -> bool:
-        """Vérifie si le token est sur Klik"""
-        try:
-            url = f"https://klik.network/api/token/{address}"
-            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                return resp.status == 200
-        except:
-            pass
-        return False
+    Les mises à jour rapprochées sont regroupées pour ne pas dépasser
+    TELEGRAM_EDIT_INTERVAL entre deux éditions ; seule la dernière version
+    en attente est envoyée.
+    """
     
-    async def _check_wow(self, address: str) -> bool:
-        """Vérifie si le token est sur WOW"""
-        try:
-            url = f"https://wow.xyz/api/token/base/{address}"
-            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                return resp.status == 200
-        except:
-            pass
-        return False
+    def __init__(self, message, interval: float = TELEGRAM_EDIT_INTERVAL, pages: Optional[ReportPages] = None):
+        self.message = message
+        self.interval = interval
+        self.pages = pages
+        self._last_edit = 0.0
+        self._last_text = None
+        self._pending = None
+        self._flush_task = None
     
-    async def _check_uniswap(self, address: str, chain: str) -> bool:
-        """Vérifie si le token a une pool Uniswap"""
-        try:
-            # Utilise l'API Uniswap v3 subgraph pour Base
-            subgraph_url = "https://api.studio.thegraph.com/query/48211/uniswap-v3-base/version/latest"
-            
-            query = """
-            {
-              token(id: "%s") {
-                id
-                symbol
-                name
-              }
-            }
-            """ % address.lower()
-            
-            async with self.session.post(
-                subgraph_url,
-                json={"query": query},
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as resp:
-                data = await resp.json()
-                return bool(data.get("data", {}).get("token"))
-        except:
-            pass
-        return False
+    def update(self, text: str):
+        """Programme l'affichage d'une version intermédiaire"""
+        self._pending = text
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
     
-    async def search_social_mentions(self, ticker: str) -> List[str]:
-        """Recherche les mentions du ticker sur les réseaux sociaux"""
-        mentions = []
-        mentions.append(f"🔍 [Twitter/X](https://twitter.com/search?q=%24{ticker}&f=live)")
-        mentions.append(f"🔍 [Farcaster](https://warpcast.com/~/search?q=%24{ticker})")
-        return mentions
+    async def _flush_later(self):
+        await asyncio.sleep(max(0.0, self._last_edit + self.interval - time.monotonic()))
+        text, self._pending = self._pending, None
+        if text is not None:
+            try:
+                # Version intermédiaire trop longue : seule la première page est affichée
+                await self._edit(paginate(text)[0])
+            except Exception as e:
+                logger.warning(f"Édition intermédiaire impossible: {e}")
     
-    async def get_contract_creation_tx(self, token_address: str, chain: str) -> Optional[Dict]:
-        """Récupère la transaction de création du contrat"""
-        try:
-            if chain == "base":
-                url = f"https://api.basescan.org/api"
-                params = {
-                    "module": "contract",
-                    "action": "getcontractcreation",
-                    "contractaddresses": token_address,
-                    "apikey": BASESCAN_API_KEY
-                }
-            elif chain == "ethereum":
-                url = f"https://api.etherscan.io/api"
-                params = {
-                    "module": "contract",
-                    "action": "getcontractcreation",
-                    "contractaddresses": token_address,
-                    "apikey": ETHERSCAN_API_KEY
-                }
+    async def cancel(self):
+        """Abandonne l'édition intermédiaire programmée"""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+    
+    async def finish(self, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None):
+        """Affiche la version finale (les erreurs sont propagées)"""
+        await self.cancel()
+        if len(text) > TELEGRAM_MESSAGE_LIMIT:
+            if self.pages is not None:
+                text, reply_markup = await self.pages.first_page(text, reply_markup)
             else:
-                return None
-            
-            async with self.session.get(url, params=params) as resp:
-                data = await resp.json()
-                if data.get("status") == "1" and data.get("result"):
-                    result = data["result"][0]
-                    return {
-                        "deployer": result.get("contractCreator"),
-                        "tx_hash": result.get("txHash")
-                    }
-        except Exception as e:
-            logger.error(f"Erreur get_contract_creation_tx: {e}")
-        
-        return None
+                text = paginate(text)[0]
+        await asyncio.sleep(max(0.0, self._last_edit + self.interval - time.monotonic()))
+        await self._edit(text, reply_markup)
     
-    async def get_deployer_tokens(self, deployer_address: str, current_token: str, chain: str, limit: int = 5) -> List[Dict]:
-        """Récupère les tokens créés par le déployeur"""
+    async def _edit(self, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None):
+        if text == self._last_text and reply_markup is None:
+            return
         try:
-            if chain == "base":
-                url = f"https://api.basescan.org/api"
-                api_key = BASESCAN_API_KEY
-            elif chain == "ethereum":
-                url = f"https://api.etherscan.io/api"
-                api_key = ETHERSCAN_API_KEY
-            else:
-                return []
-            
-            params = {
-                "module": "account",
-                "action": "txlist",
-                "address": deployer_address,
-                "startblock": 0,
-                "endblock": 99999999,
-                "page": 1,
-                "offset": 100,
-                "sort": "desc",
-                "apikey": api_key
-            }
-            
-            async with self.session.get(url, params=params) as resp:
-                data = await resp.json()
-                
-                if data.get("status") != "1":
-                    logger.warning(f"API returned status: {data.get('message')}")
-                    return []
-                
-                created_tokens = []
-                seen_addresses = set()
-                
-                for tx in data.get("result", []):
-                    # Transaction de création de contrat
-                    if tx.get("to") == "" and tx.get("contractAddress"):
-                        contract_addr = tx["contractAddress"]
-                        
-                        # Skip le token actuel et les doublons
-                        if contract_addr.lower() == current_token.lower():
-                            continue
-                        if contract_addr in seen_addresses:
-                            continue
-                        
-                        seen_addresses.add(contract_addr)
-                        
-                        try:
-                            # Essayer de récupérer les infos du token
-                            token_info = await self.get_token_info(contract_addr, chain)
-                            if "error" not in token_info:
-                                created_tokens.append({
-                                    "name": token_info["name"],
-                                    "symbol": token_info["symbol"],
-                                    "address": contract_addr,
-                                    "timestamp": datetime.fromtimestamp(int(tx["timeStamp"])).strftime("%Y-%m-%d %H:%M")
-                                })
-                                
-                                if len(created_tokens) >= limit:
-                                    break
-                        except Exception as e:
-                            logger.debug(f"Could not get token info for {contract_addr}: {e}")
-                            continue
-                
-                return created_tokens
-        except Exception as e:
-            logger.error(f"Erreur get_deployer_tokens: {e}")
-            return []
+            await self.message.edit_text(
+                text,
+                parse_mode=REPORT_RENDERER.parse_mode,
+                reply_markup=reply_markup,
+                disable_web_page_preview=True
+            )
+        except RetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+            await self.message.edit_text(
+                text,
+                parse_mode=REPORT_RENDERER.parse_mode,
+                reply_markup=reply_markup,
+                disable_web_page_preview=True
+            )
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
+        self._last_edit = time.monotonic()
+        self._last_text = text
+
+class WatchSubscriptions:
+    """Filtres /watch de chaque chat, sauvegardés dans un fichier JSON.
     
-    async def get_funding_address(self, deployer_address: str, chain: str) -> Optional[str]:
-        """Récupère l'adresse qui a financé le déployeur (première transaction entrante)"""
+    Un filtre est un dict {"type": ..., "value": ...} :
+    - "all" : tous les nouveaux tokens ;
+    - "platform" : plateforme de création (ex. "Clanker") ;
+    - "deployer" : déployeur ayant au moins N tokens précédents ;
+    - "funder" : déployeur financé par ce wallet.
+    """
+    
+    def __init__(self, path: Optional[str] = WATCH_SUBSCRIPTIONS_PATH):
+        self.path = path
+        self.chats = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.chats = {int(chat_id): filters for chat_id, filters in json.load(f).items()}
+            except (OSError, ValueError) as e:
+                logger.error(f"Abonnements /watch illisibles ({path}): {e}")
+    
+    def _save(self):
+        if not self.path:
+            return
         try:
-            if chain == "base":
-                url = f"https://api.basescan.org/api"
-                api_key = BASESCAN_API_KEY
-            elif chain == "ethereum":
-                url = f"https://api.etherscan.io/api"
-                api_key = ETHERSCAN_API_KEY
-            else:
-                return None
-            
-            params = {
-                "module": "account",
-                "action": "txlist",
-                "address": deployer_address,
-                "startblock": 0,
-                "endblock": 99999999,
-                "page": 1,
-                "offset": 10,
-                "sort": "asc",
-                "apikey": api_key
-            }
-            
-            async with self.session.get(url, params=params) as resp:
-                data = await resp.json()
-                
-                if data.get("status") == "1" and data.get("result"):
-                    # Cherche la première transaction entrante avec de la valeur
-                    for tx in data["result"]:
-                        if tx["to"].lower() == deployer_address.lower() and int(tx.get("value", 0)) > 0:
-                            return tx["from"]
-        except Exception as e:
-            logger.error(f"Erreur get_funding_address: {e}")
-        
-        return None
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.chats, f)
+        except OSError as e:
+            logger.error(f"Sauvegarde des abonnements /watch impossible: {e}")
     
-    def create_buttons(self, address: str, chain: str) -> InlineKeyboardMarkup:
-        """Crée les boutons pour les liens rapides"""
-        keyboard = [
-            [
-                InlineKeyboardButton("📊 DEXScreener", url=f"https://dexscreener.com/{chain}/{address}"),
-                InlineKeyboardButton("📈 GMGN", url=f"https://gmgn.ai/base/token/{address}")
-            ],
-            [
-                InlineKeyboardButton("🔍 Basescan", url=f"https://basescan.org/token/{address}"),
-                InlineKeyboardButton("🦄 Uniswap", url=f"https://app.uniswap.org/explore/tokens/{chain}/{address}")
-            ]
+    def add(self, chat_id: int, watch_filter: Dict):
+        filters_ = self.chats.setdefault(chat_id, [])
+        if watch_filter not in filters_:
+            filters_.append(watch_filter)
+            self._save()
+    
+    def clear(self, chat_id: int):
+        if self.chats.pop(chat_id, None) is not None:
+            self._save()
+    
+    def filter_types(self) -> set:
+        """Types de filtres actifs, tous chats confondus"""
+        return {f["type"] for filters_ in self.chats.values() for f in filters_}
+    
+    def min_prior_tokens(self) -> int:
+        """Plus grand seuil "deployer" demandé (pour savoir combien de tokens récupérer)"""
+        return max(
+            [f["value"] for filters_ in self.chats.values() for f in filters_ if f["type"] == "deployer"] or [0]
+        )
+    
+    @staticmethod
+    def matches(watch_filter: Dict, facts: Dict) -> bool:
+        kind, value = watch_filter["type"], watch_filter.get("value")
+        if kind == "all":
+            return True
+        if kind == "platform":
+            return bool(facts["platform"]) and facts["platform"].lower() == str(value).lower()
+        if kind == "deployer":
+            return len(facts["deployer_tokens"]) >= value
+        if kind == "funder":
+            return bool(facts["funder"]) and facts["funder"].lower() == str(value).lower()
+        return False
+    
+    def recipients(self, facts: Dict) -> List[int]:
+        """Chats dont au moins un filtre correspond au token"""
+        return [
+            chat_id for chat_id, filters_ in self.chats.items()
+            if any(self.matches(f, facts) for f in filters_)
         ]
-        return InlineKeyboardMarkup(keyboard)
+
+class TokenWatcher:
+    """Détecte les nouveaux tokens et pousse leur analyse aux chats abonnés.
     
-    async def analyze_token(self, address: str) -> tuple[str, InlineKeyboardMarkup]:
-        """Analyse complète d'un token"""
-        await self.init_session()
+    L'ingestion interroge eth_getLogs par plages de blocs (premiers mints
+    Transfer depuis 0x0 de contrats sans code au bloc précédent). Si
+    WATCH_WS_URL est défini, un abonnement newHeads réveille l'ingestion à
+    chaque bloc. Les analyses tournent dans un pool de WATCH_WORKERS tâches
+    alimenté par une file bornée : l'ingestion ne prend jamais de retard à
+    cause d'une analyse lente, et les tokens en excès sont abandonnés.
+    """
+    
+    def __init__(self, analyzer: TokenAnalyzer, subscriptions: WatchSubscriptions, notify,
+                 chain: str = WATCH_CHAIN, rpc: Optional[RPCClient] = None):
+        self.analyzer = analyzer
+        self.subscriptions = subscriptions
+        self.notify = notify
+        self.chain = chain
+        self.rpc = rpc or analyzer.get_rpc(chain)
+        self.queue = asyncio.Queue(maxsize=WATCH_QUEUE_SIZE)
+        self.next_block = None
+        self.lagging = False
+        self.dropped = 0
+        self._seen = OrderedDict()
+        self._new_head = asyncio.Event()
+        self._tasks = []
+    
+    def _remember(self, address: str) -> bool:
+        """Faux si le contrat a déjà été vu"""
+        if address in self._seen:
+            return False
+        self._seen[address] = True
+        if len(self._seen) > WATCH_SEEN_TOKENS:
+            self._seen.popitem(last=False)
+        return True
+    
+    async def poll_once(self) -> int:
+        """Ingère les blocs depuis le dernier passage ; renvoie le nombre de nouveaux tokens"""
+        head = int(await self.rpc.call("eth_blockNumber", []), 16)
+        self.lagging = False
+        if self.next_block is None or not self.subscriptions.chats:
+            # Pas d'historique à rattraper : on démarre (ou reprend) à la tête
+            self.next_block = head + 1
+            return 0
+        if self.next_block > head:
+            return 0
         
-        result = "🔍 **ANALYSE DU TOKEN**\n\n"
+        last = min(head, self.next_block + WATCH_MAX_RANGE - 1)
+        # Seul un noeud ayant atteint `last` peut répondre : sinon la plage
+        # serait vide et next_block avancerait au-delà de blocs non lus
+        logs = await self.rpc.call("eth_getLogs", [{
+            "fromBlock": hex(self.next_block),
+            "toBlock": hex(last),
+            "topics": [TRANSFER_TOPIC, ZERO_TOPIC],
+        }], min_block=last)
         
-        # Validation de l'adresse
-        if not is_address(address):
-            return ("❌ Adresse de contrat invalide", None)
+        candidates = {}
+        for log in logs or []:
+            # 3 topics : ERC20 (un ERC721 en a 4)
+            if len(log.get("topics", [])) != 3:
+                continue
+            address = log["address"].lower()
+            if address not in self._seen and address not in candidates:
+                candidates[address] = int(log["blockNumber"], 16)
         
-        # Détection de la chaîne
-        chain = self.detect_chain(address)
-        result += f"⛓️ **Chaîne:** {chain.upper()}\n"
-        result += f"📝 **Adresse:** `{address}`\n\n"
-        
-        # Informations du token
-        result += "📊 **INFORMATIONS DU TOKEN**\n"
-        token_info = await self.get_token_info(address, chain)
-        if "error" not in token_info:
-            result += f"• Nom: {token_info['name']}\n"
-            result += f"• Symbole: ${token_info['symbol']}\n"
-            result += f"• Supply Total: {token_info['total_supply']}\n\n"
-            ticker = token_info['symbol']
-        else:
-            result += f"❌ Impossible de récupérer les infos du token\n\n"
-            ticker = "UNKNOWN"
+        new_tokens = []
+        if candidates:
+            codes = await self.rpc.batch([
+                ("eth_getCode", [address, hex(block - 1)]) for address, block in candidates.items()
+            ], min_block=last)
+            # Un code illisible fait échouer tout le passage : next_block ne bouge
+            # pas et aucun contrat n'est marqué comme vu, la plage sera relue
+            for code in codes:
+                if isinstance(code, RPCError):
+                    raise code
+            new_tokens = [address for address, code in zip(candidates, codes) if code == "0x"]
+            for address in candidates:
+                self._remember(address)
         
-        # Détection de la plateforme de création
-        result += "🌐 **PLATEFORME DE CRÉATION**\n"
-        platform = await self.detect_creation_platform(address, chain)
-        if platform:
-            result += f"• Créé sur: [{platform['name']}]({platform['url']})\n\n"
-        else:
-            result += "• Plateforme non détectée (déploiement manuel ou plateforme inconnue)\n\n"
+        for address in new_tokens:
+            try:
+                self.queue.put_nowait(address)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                logger.warning(f"File /watch pleine, token ignoré: {address}")
         
-        # Mentions sociales
-        result += f"💬 **RECHERCHE SOCIALE (${ticker})**\n"
-        mentions = await self.search_social_mentions(ticker)
-        for mention in mentions:
-            result += f"• {mention}\n"
-        result += "\n"
+        self.next_block = last + 1
+        self.lagging = last < head
+        return len(new_tokens)
+    
+    async def collect_facts(self, address: str) -> Dict:
+        """Données utilisées par les filtres (toutes passent par le cache de l'analyseur).
         
-        # Analyse du déployeur
-        result += "👤 **ANALYSE DU DÉPLOYEUR**\n"
-        creation_info = await self.get_contract_creation_tx(address, chain)
+        Seules les données dont un filtre actif a besoin sont récupérées :
+        des abonnements "platform" seuls ne déclenchent aucune recherche de
+        déployeur ni de financeur.
+        """
+        types = self.subscriptions.filter_types()
+        facts = {"address": address, "platform": None, "deployer": None, "deployer_tokens": [], "funder": None}
         
-        if creation_info and creation_info.get("deployer"):
-            deployer = creation_info["deployer"]
-            result += f"• Adresse: `{deployer}`\n"
-            result += f"• [Voir sur Basescan](https://basescan.org/address/{deployer})\n\n"
-            
-            # Tokens précédents du déployeur
-            result += "📋 **Tokens créés par ce déployeur (max 5):**\n"
-            deployer_tokens = await self.get_deployer_tokens(deployer, address, chain, 5)
-            
-            if deployer_tokens:
-                for token in deployer_tokens:
-                    result += f"  • {token['name']} (${token['symbol']}) - {token['timestamp']}\n"
-                    result += f"    `{token['address']}`\n"
-            else:
-                result += "  • Aucun autre token trouvé récemment\n"
-            
-            # Analyse du wallet de financement
-            result += "\n💰 **WALLET DE FINANCEMENT**\n"
-            funder = await self.get_funding_address(deployer, chain)
+        platform_task = None
+        if "platform" in types:
+            platform_task = asyncio.create_task(self.analyzer.detect_creation_platform(address, self.chain))
+        try:
+            if types & {"deployer", "funder"}:
+                creation = await self.analyzer.get_contract_creation_tx(address, self.chain)
+                deployer = creation.get("deployer") if creation and creation is not FAILED else None
+                facts["deployer"] = deployer
+                lookups = {}
+                if deployer and "deployer" in types:
+                    limit = max(5, self.subscriptions.min_prior_tokens())
+                    lookups["deployer_tokens"] = self.analyzer.get_deployer_tokens(deployer, address, self.chain, limit)
+                if deployer and "funder" in types:
+                    lookups["funder"] = self.analyzer.get_funding_address(deployer, self.chain)
+                facts.update(zip(lookups, await asyncio.gather(*lookups.values())))
+                if facts["deployer_tokens"] is FAILED:
+                    facts["deployer_tokens"] = []
+                if facts["funder"] is FAILED:
+                    facts["funder"] = None
+            if platform_task is not None:
+                platform = await platform_task
+                facts["platform"] = platform.get("name") if platform else None
+        finally:
+            if platform_task is not None and not platform_task.done():
+                platform_task.cancel()
+        return facts
+    
+    async def _worker(self):
+        while True:
+            address = await self.queue.get()
+            try:
+                facts = await self.collect_facts(address)
+                chat_ids = self.subscriptions.recipients(facts)
+                if chat_ids:
+                    result, buttons = await self.analyzer.analyze_token(address)
+                    await self.notify(chat_ids, REPORT_RENDERER.bold("🆕 NOUVEAU TOKEN") + "\n\n" + result, buttons)
+            except Exception as e:
+                logger.error(f"Erreur analyse /watch {address}: {e}")
+            finally:
+                self.queue.task_done()
+    
+    async def _follow_heads(self):
+        """Réveille l'ingestion à chaque nouveau bloc (websocket eth_subscribe)"""
+        while True:
+            try:
+                async with self.analyzer.session.ws_connect(WATCH_WS_URL, heartbeat=30) as ws:
+                    await ws.send_json({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]})
+                    async for message in ws:
+                        if message.type == aiohttp.WSMsgType.TEXT and '"eth_subscription"' in message.data:
+                            self._new_head.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Websocket /watch interrompu: {e}")
+            await asyncio.sleep(5)
+    
+    async def _ingest(self):
+        while True:
+            try:
+                await self.poll_once()
+                # En retard sur la tête de chaîne : on enchaîne sans attendre
+                if self.lagging:
+                    continue
+            except Exception as e:
+                logger.error(f"Erreur ingestion /watch: {e}")
             
-            if funder and funder.lower() != deployer.lower():
-                result += f"• Adresse: `{funder}`\n"
-                result += f"• [Voir sur Basescan](https://basescan.org/address/{funder})\n\n"
-                
-                result += "📋 **Tokens créés par le wallet de financement (max 5):**\n"
-                funder_tokens = await self.get_deployer_tokens(funder, address, chain, 5)
-                
-                if funder_tokens:
-                    for token in funder_tokens:
-                        result += f"  • {token['name']} (${token['symbol']}) - {token['timestamp']}\n"
-                        result += f"    `{token['address']}`\n"
-                else:
-                    result += "  • Aucun token trouvé\n"
-            else:
-                result += "• Wallet auto-financé ou données non disponibles\n"
-        else:
-            # Si pas d'infos du déployeur, on met juste un lien vers Basescan
-            result += f"• [Voir les détails sur Basescan](https://basescan.org/token/{address})\n"
-        
-        # Créer les boutons
-        buttons = self.create_buttons(address, chain)
-        
-        return (result, buttons)
+            self._new_head.clear()
+            try:
+                await asyncio.wait_for(self._new_head.wait(), WATCH_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+    
+    def start(self):
+        self._tasks = [asyncio.create_task(self._ingest())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(WATCH_WORKERS)]
+        if WATCH_WS_URL:
+            self._tasks.append(asyncio.create_task(self._follow_heads()))
+    
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
 
 # Handlers Telegram
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -496,7 +3636,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     welcome_message = """
 🤖 **Bot d'Analyse de Tokens EVM**
 
-Envoyez-moi une adresse de contrat BASE et je vais analyser :
+Envoyez-moi une adresse de contrat (Base, Ethereum, Arbitrum, Optimism) et je vais analyser :
 
 ✅ Informations du token (nom, symbole, supply)
 ✅ Plateforme de création (Clanker, Zora, Ape.store, Klik, WOW, Uniswap...)
@@ -508,16 +3648,379 @@ Envoyez-moi une adresse de contrat BASE et je vais analyser :
 `0x4ed4e862860bed51a9570b96d89af5e1b0efefed`
 
 Envoyez simplement l'adresse et c'est parti ! 🚀
+
+👀 /watch pour recevoir les nouveaux tokens qui vous intéressent.
+📋 /batch (ou un message avec plusieurs adresses) pour analyser une liste d'un coup.
 """
     await update.message.reply_text(welcome_message, parse_mode="Markdown")
 
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Commande /stats : compteurs du cache, état des services et temps de démarrage"""
+    cache = TokenCache.shared()
+    message = (
+        "📦 Cache\n"
+        f"• Hits mémoire: {cache.stats['memory_hits']}\n"
+        f"• Hits disque: {cache.stats['disk_hits']}\n"
+        f"• Hits partagés: {cache.stats['shared_hits']}\n"
+        f"• Misses: {cache.stats['misses']}\n"
+        f"• Taux de hit: {cache.hit_ratio():.0%}"
+    )
+    analyzer = context.application.bot_data.get("analyzer")
+    if analyzer:
+        states = {CircuitBreaker.CLOSED: "✅", CircuitBreaker.HALF_OPEN: "🟡", CircuitBreaker.OPEN: "⛔"}
+        message += "\n\n🔌 API de plateformes\n" + "\n".join(
+            f"• {states[breaker.state]} {name}" for name, breaker in analyzer.breakers.items()
+        )
+        lines = []
+        for chain in PROVIDERS:
+            pool = RPCPool.shared(chain)
+            lines.append(f"• {chain} (hedging à {pool.hedge_delay() * 1000:.0f} ms)")
+            lines += [
+                f"  {states[endpoint.breaker.state]} {endpoint.host}"
+                + (f" {endpoint.latency * 1000:.0f} ms" if endpoint.latency is not None else "")
+                + (f", {endpoint.error_rate():.0%} d'échecs" if endpoint.error_rate() else "")
+                for endpoint in pool.endpoints
+            ]
+        message += "\n\n⛓ Noeuds RPC\n" + "\n".join(lines)
+    
+    labels = {
+        "imports": "Imports", "ready": "Prêt", "first_update": "1er message reçu",
+        "first_response": "1re réponse", "warmup": "Préchauffage terminé",
+    }
+    message += "\n\n🚀 Démarrage\n" + "\n".join(
+        f"• {label}: {STARTUP_TIMINGS[phase]:.2f}s" for phase, label in labels.items() if phase in STARTUP_TIMINGS
+    )
+    await update.message.reply_text(message)
+
+async def debug(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Commande /debug [adresse] : détail des temps de la dernière analyse.
+    
+    Réservée aux ADMIN_USER_IDS et aux chats qui ont demandé l'analyse.
+    """
+    analyses = context.application.bot_data["analyses"]
+    chat_id = update.effective_chat.id
+    is_admin = update.effective_user.id in ADMIN_USER_IDS
+    visible = [
+        name for name in analyses.traces if is_admin or analyses.can_debug(name, chat_id)
+    ]
+    if context.args:
+        name = context.args[0].lower()
+        trace = analyses.traces[name] if name in visible else None
+    else:
+        trace = analyses.traces[visible[-1]] if visible else None
+    if trace is None:
+        await update.message.reply_text("Aucune trace disponible pour cette analyse.")
+        return
+    
+    total = f"{trace.duration:.2f}s" if trace.duration is not None else "en cours"
+    lines = [f"🔍 Trace {trace.name}", f"Durée totale: {total}", "", "⏱ Étapes"]
+    for span in trace.spans:
+        if span["kind"] == "stage":
+            lines.append(f"• {span['name']}: {span['duration']:.2f}s ({span['status']})")
+    
+    calls = [span for span in trace.spans if span["kind"] == "http"]
+    cache = [span for span in trace.spans if span["kind"] == "cache"]
+    hits = sum(1 for span in cache if span["cache_hit"])
+    lines += ["", f"🌐 Appels externes: {len(calls)} • Cache: {hits}/{len(cache)} hits"]
+    for span in sorted(calls, key=lambda span: span["duration"], reverse=True)[:8]:
+        lines.append(f"• {span['duration']:.2f}s {span['status']} {span['name'][:60]}")
+    
+    await update.message.reply_text("\n".join(lines), disable_web_page_preview=True)
+
+WATCH_HELP = """👀 **Surveillance des nouveaux tokens**
+
+• `/watch all` : tous les nouveaux tokens
+• `/watch platform Clanker` : tokens créés sur une plateforme
+• `/watch deployer 3` : déployeurs ayant déjà créé au moins 3 tokens
+• `/watch funder 0x...` : déployeurs financés par ce wallet
+• `/unwatch` : arrêter la surveillance
+"""
+
+async def watch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Commande /watch : abonne le chat aux nouveaux tokens correspondant au filtre"""
+    subscriptions = context.application.bot_data["watch_subscriptions"]
+    chat_id = update.effective_chat.id
+    args = context.args or []
+    
+    if not WATCH_ENABLED:
+        await update.message.reply_text("🔕 La surveillance des nouveaux tokens n'est pas activée sur ce bot.")
+        return
+    
+    if not args:
+        current = subscriptions.chats.get(chat_id, [])
+        message = WATCH_HELP
+        if current:
+            message += "\n**Filtres actifs:**\n" + "\n".join(
+                f"• {f['type']} {f.get('value', '')}".rstrip() for f in current
+            )
+        await update.message.reply_text(message, parse_mode="Markdown")
+        return
+    
+    kind = args[0].lower()
+    value = " ".join(args[1:]).strip()
+    if kind == "all":
+        watch_filter = {"type": "all"}
+    elif kind == "platform" and value:
+        watch_filter = {"type": "platform", "value": value}
+    elif kind == "deployer" and value.isdigit():
+        watch_filter = {"type": "deployer", "value": int(value)}
+    elif kind == "funder" and is_address(value):
+        watch_filter = {"type": "funder", "value": value.lower()}
+    else:
+        await update.message.reply_text(WATCH_HELP, parse_mode="Markdown")
+        return
+    
+    subscriptions.add(chat_id, watch_filter)
+    await update.message.reply_text("✅ Surveillance activée. Les nouveaux tokens correspondants seront envoyés ici.")
+
+async def unwatch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Commande /unwatch : supprime les filtres du chat"""
+    context.application.bot_data["watch_subscriptions"].clear(update.effective_chat.id)
+    await update.message.reply_text("🔕 Surveillance désactivée pour ce chat.")
+
+BATCH_HELP = f"""📋 Analyse groupée
+
+Envoyez `/batch` suivi de jusqu'à {BATCH_MAX_ADDRESSES} adresses (ou en réponse à un message qui en contient).
+Ajoutez `csv` pour recevoir le tableau en fichier.
+"""
+
+def _risk_icon(score: int) -> str:
+    if score >= 4:
+        return "🔴"
+    if score >= 2:
+        return "🟠"
+    return "🟢"
+
+def _batch_row_fields(row: Dict) -> Dict:
+    """Valeurs affichables d'une ligne de /batch ("⏱" quand l'étape a expiré)"""
+    meta = row.get("meta")
+    platform = row.get("platform")
+    return {
+        "symbol": "⏱" if meta is TIMED_OUT else (meta["symbol"] if meta else "?"),
+        "name": "" if meta is TIMED_OUT or not meta else meta["name"],
+        "platform": "⏱" if platform is TIMED_OUT else (
+            (platform.get("name") or ("indisponible" if platform.get("unavailable") else "")) if platform else ""
+        ),
+    }
+
+def format_batch_table(rows: List[Dict]) -> str:
+    """Tableau compact des tokens d'un lot, du plus risqué au moins risqué"""
+    lines = [f"📋 ANALYSE GROUPÉE ({len(rows)} tokens)", ""]
+    for rank, row in enumerate(rows, 1):
+        fields = _batch_row_fields(row)
+        header = f"{rank}. {_risk_icon(row['score'])} ${fields['symbol']}"
+        if row["chain"]:
+            header += f" ({row['chain']})"
+        if fields["platform"]:
+            header += f" • {fields['platform']}"
+        lines.append(header)
+        lines.append(f"   {row['address']}")
+        
+        details = []
+        if "deployer_tokens" in row:
+            details.append(f"déployeur: {row['deployer_tokens']} autre(s) token(s)")
+        if row.get("funder"):
+            details.append(f"financé par {row.get('funder_label') or row['funder'][:10] + '…'}")
+        if details:
+            lines.append("   " + " • ".join(details))
+        if row["flags"]:
+            lines.append("   ⚠️ " + " • ".join(row["flags"]))
+    return "\n".join(lines)
+
+def batch_csv(rows: List[Dict]) -> bytes:
+    """Lot analysé au format CSV"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow([
+        "rank", "address", "chain", "symbol", "name", "platform", "deployer",
+        "deployer_tokens", "funder", "funder_label", "risk_score", "flags"
+    ])
+    for rank, row in enumerate(rows, 1):
+        fields = _batch_row_fields(row)
+        writer.writerow([
+            rank, row["address"], row["chain"] or "", fields["symbol"], fields["name"], fields["platform"],
+            row.get("deployer") or "", row.get("deployer_tokens", ""), row.get("funder") or "",
+            row.get("funder_label") or "", row["score"], "; ".join(row["flags"])
+        ])
+    return output.getvalue().encode("utf-8")
+
+def extract_addresses(text: str) -> List[str]:
+    """Adresses EVM distinctes d'un texte, dans leur ordre d'apparition"""
+    addresses = {}
+    for address in re.findall(r'0x[a-fA-F0-9]{40}', text or ""):
+        addresses.setdefault(address.lower(), address)
+    return list(addresses.values())
+
+async def batch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Commande /batch : analyse résumée de plusieurs adresses"""
+    args = context.args or []
+    as_csv = any(arg.lower() == "csv" for arg in args)
+    text = " ".join(args)
+    if update.message.reply_to_message:
+        text += " " + (update.message.reply_to_message.text or update.message.reply_to_message.caption or "")
+    addresses = extract_addresses(text)
+    
+    if not addresses:
+        await update.message.reply_text(BATCH_HELP, parse_mode="Markdown")
+        return
+    await run_batch(update, context, addresses, as_csv)
+
+async def run_batch(update: Update, context: ContextTypes.DEFAULT_TYPE, addresses: List[str], as_csv: bool = False):
+    """Analyse groupée et envoi du tableau (ou du CSV s'il est trop long)"""
+    notice = ""
+    if len(addresses) > BATCH_MAX_ADDRESSES:
+        notice = f"\n\n(seules les {BATCH_MAX_ADDRESSES} premières adresses sur {len(addresses)} ont été analysées)"
+        addresses = addresses[:BATCH_MAX_ADDRESSES]
+    
+    # Un lot occupe un seul créneau de l'ordonnanceur
+    scheduler = context.application.bot_data["scheduler"]
+    try:
+        ticket = scheduler.submit(update.effective_chat.id, update.effective_user.id)
+    except UserLimitReached:
+        await update.message.reply_text("⏳ Vous avez déjà des analyses en cours, patientez un instant.")
+        return
+    except SchedulerFull:
+        await update.message.reply_text("🚦 Le bot est surchargé, réessayez dans quelques instants.")
+        return
+    
+    try:
+        if ticket.position:
+            loading_msg = await update.message.reply_text(queue_message(ticket.position))
+            await wait_in_queue(ticket, loading_msg)
+            await loading_msg.edit_text(f"🔄 Analyse de {len(addresses)} adresses en cours...")
+        else:
+            loading_msg = await update.message.reply_text(f"🔄 Analyse de {len(addresses)} adresses en cours...")
+        analyzer = context.application.bot_data["analyzer"]
+        try:
+            rows = await analyzer.analyze_batch(addresses)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'analyse groupée: {e}", exc_info=True)
+            await loading_msg.edit_text(f"❌ Erreur lors de l'analyse: {str(e)}")
+            return
+        
+        table = format_batch_table(rows) + notice
+        if as_csv or len(table) > 4096:
+            await update.message.reply_document(
+                InputFile(io.BytesIO(batch_csv(rows)), filename="batch.csv"),
+                caption=f"📋 {len(rows)} tokens analysés, classés par risque{notice}"[:1024]
+            )
+            await loading_msg.delete()
+        else:
+            await loading_msg.edit_text(table, disable_web_page_preview=True)
+    finally:
+        ticket.release()
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Mode inline : `@bot 0x... 0x...` propose le résumé de chaque adresse.
+    
+    Telegram attend une réponse en quelques secondes : au-delà de
+    INLINE_QUERY_TIMEOUT, l'analyse continue en arrière-plan pour remplir
+    le cache et l'utilisateur est invité à réessayer ; sa nouvelle requête
+    suit le même lot (voir InlineBatches).
+    """
+    query = update.inline_query
+    addresses = extract_addresses(query.query)[:BATCH_MAX_ADDRESSES]
+    if not addresses:
+        return
+    
+    batches = context.application.bot_data["inline_batches"]
+    try:
+        task = batches.start(query.from_user.id, addresses)
+    except (SchedulerFull, UserLimitReached):
+        await query.answer([], cache_time=0, button=InlineQueryResultsButton(
+            "🚦 Trop d'analyses en cours, réessayez dans un instant", start_parameter="batch"
+        ))
+        return
+    try:
+        rows = await asyncio.wait_for(asyncio.shield(task), INLINE_QUERY_TIMEOUT)
+    except asyncio.TimeoutError:
+        await query.answer([], cache_time=0, button=InlineQueryResultsButton(
+            "⏳ Analyse en cours, réessayez dans un instant", start_parameter="batch"
+        ))
+        return
+    except Exception:
+        # Déjà journalisée par InlineBatches
+        return
+    
+    results = []
+    if len(rows) > 1:
+        table = format_batch_table(rows)[:4096]
+        results.append(InlineQueryResultArticle(
+            id="batch", title=f"📋 Tableau des {len(rows)} tokens",
+            description="Classés du plus risqué au moins risqué",
+            input_message_content=InputTextMessageContent(table, disable_web_page_preview=True)
+        ))
+    for row in rows:
+        fields = _batch_row_fields(row)
+        results.append(InlineQueryResultArticle(
+            id=row["address"].lower(),
+            title=f"{_risk_icon(row['score'])} ${fields['symbol']} {fields['name']}".strip(),
+            description=" • ".join(row["flags"]) or row["address"],
+            input_message_content=InputTextMessageContent(format_batch_table([row]), disable_web_page_preview=True)
+        ))
+    await query.answer(results[:50], cache_time=60)
+
+async def stream_analysis_to_message(loading_msg, analyses: AnalysisRegistry, address: str,
+                                     pages: Optional[ReportPages] = None):
+    """Suit l'analyse partagée d'une adresse et complète le message de chargement
+    au fur et à mesure que les sections arrivent"""
+    progress = ProgressiveMessage(loading_msg, pages=pages)
+    try:
+        result, buttons = None, None
+        async for result, buttons in analyses.stream(address):
+            if buttons is None:
+                progress.update(result)
+        await progress.finish(result, buttons)
+    except Exception as e:
+        logger.error(f"Erreur lors de l'analyse: {e}", exc_info=True)
+        await progress.cancel()
+        await loading_msg.edit_text(f"❌ Erreur lors de l'analyse: {str(e)}")
+
+async def report_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Boutons de pagination d'un rapport long"""
+    query = update.callback_query
+    _, report_id, index = query.data.split(":")
+    page = await context.application.bot_data["report_pages"].page(report_id, int(index))
+    if page is None:
+        await query.answer("Rapport expiré, renvoyez l'adresse pour relancer l'analyse.", show_alert=True)
+        return
+    
+    await query.answer()
+    text, keyboard = page
+    try:
+        await query.edit_message_text(
+            text, parse_mode=REPORT_RENDERER.parse_mode, reply_markup=keyboard, disable_web_page_preview=True
+        )
+    except BadRequest as e:
+        if "not modified" not in str(e).lower():
+            raise
+
+def queue_message(position: int) -> str:
+    return f"⏳ File d'attente : position {position}. L'analyse démarrera automatiquement."
+
+async def wait_in_queue(ticket: AnalysisTicket, message, interval: float = QUEUE_UPDATE_INTERVAL):
+    """Attend le créneau du ticket en tenant à jour la position affichée dans message"""
+    shown = ticket.position
+    waiting = asyncio.ensure_future(ticket.wait())
+    try:
+        while not (await asyncio.wait({waiting}, timeout=interval))[0]:
+            position = ticket.position
+            if position and position != shown:
+                shown = position
+                try:
+                    await message.edit_text(queue_message(position))
+                except Exception as e:
+                    logger.warning(f"Mise à jour de la position impossible: {e}")
+        waiting.result()
+    finally:
+        waiting.cancel()
+
 async def analyze_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Analyse un message contenant une adresse"""
     text = update.message.text.strip()
     
-    # Extrait l'adresse Ethereum du message
-    eth_address_pattern = r'0x[a-fA-F0-9]{40}'
-    matches = re.findall(eth_address_pattern, text)
+    # Extrait les adresses Ethereum du message
+    matches = extract_addresses(text)
     
     if not matches:
         await update.message.reply_text(
@@ -526,40 +4029,361 @@ async def analyze_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
+    # Une liste d'adresses (lancements du jour...) passe par l'analyse groupée
+    if len(matches) > 1:
+        await run_batch(update, context, matches)
+        return
+    
     address = matches[0]
+    analyses = context.application.bot_data["analyses"]
+    scheduler = context.application.bot_data["scheduler"]
     
-    # Message de chargement
-    loading_msg = await update.message.reply_text("🔄 Analyse en cours... Cela peut prendre 15-30 secondes.")
+    # Une analyse déjà en cours ou récente se suit sans prendre de créneau.
+    # Le test est synchrone : rien ne s'intercale entre lui et la demande de créneau
+    ticket = None
+    if not analyses.is_shared(address):
+        try:
+            ticket = scheduler.submit(update.effective_chat.id, update.effective_user.id)
+        except UserLimitReached:
+            await update.message.reply_text("⏳ Vous avez déjà des analyses en cours, patientez un instant.")
+            return
+        except SchedulerFull:
+            await update.message.reply_text("🚦 Le bot est surchargé, réessayez dans quelques instants.")
+            return
     
-    # Analyse
-    analyzer = TokenAnalyzer()
     try:
-        result, buttons = await analyzer.analyze_token(address)
-        await loading_msg.edit_text(
-            result, 
-            parse_mode="Markdown",
-            reply_markup=buttons,
-            disable_web_page_preview=True
-        )
-    except Exception as e:
-        logger.error(f"Erreur lors de l'analyse: {e}", exc_info=True)
-        await loading_msg.edit_text(f"❌ Erreur lors de l'analyse: {str(e)}")
+        # Message de chargement
+        if ticket and ticket.position:
+            loading_msg = await update.message.reply_text(queue_message(ticket.position))
+            await wait_in_queue(ticket, loading_msg)
+            await loading_msg.edit_text("🔄 Analyse en cours... Cela peut prendre 15-30 secondes.")
+        else:
+            loading_msg = await update.message.reply_text("🔄 Analyse en cours... Cela peut prendre 15-30 secondes.")
+        
+        analyses.allow_debug(address, update.effective_chat.id)
+        await stream_analysis_to_message(loading_msg, analyses, address, context.application.bot_data.get("report_pages"))
     finally:
+        if ticket:
+            ticket.release()
+
+def create_indexer(session: aiohttp.ClientSession, read_only: bool = False) -> ChainIndexer:
+    """Indexeur configuré par les variables INDEXER_*"""
+    if read_only:
+        return ChainIndexer(None, INDEXER_CHAIN, INDEXER_PATH, read_only=True)
+    pool = RPCPool(INDEXER_CHAIN, [INDEXER_RPC_URL]) if INDEXER_RPC_URL else RPCPool.shared(INDEXER_CHAIN)
+    rpc = RPCClient(session, pool)
+    start_block = int(INDEXER_START_BLOCK) if INDEXER_START_BLOCK else None
+    return ChainIndexer(rpc, INDEXER_CHAIN, INDEXER_PATH, start_block=start_block)
+
+async def run_indexer():
+    """Mode indexeur seul : `python bot.py index` (Ctrl+C pour arrêter).
+    
+    Seul processus à écrire dans INDEXER_PATH ; le bot le lit avec
+    INDEXER_ENABLED=1 et INDEXER_READ_ONLY=1.
+    """
+    async with aiohttp.ClientSession() as session:
+        indexer = create_indexer(session)
+        logger.info(f"Indexeur {INDEXER_CHAIN} démarré (checkpoint: {indexer.checkpoint()})")
+        try:
+            await indexer.run()
+        finally:
+            indexer.close()
+
+async def start_metrics_server() -> Optional[web.AppRunner]:
+    """Expose /metrics au format Prometheus sur METRICS_HOST:METRICS_PORT"""
+    if not METRICS_PORT:
+        return None
+    
+    async def handle_metrics(request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+    
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, METRICS_HOST, int(METRICS_PORT)).start()
+    except OSError as e:
+        logger.warning(f"Serveur /metrics indisponible sur {METRICS_HOST}:{METRICS_PORT}: {e}")
+        await runner.cleanup()
+        return None
+    logger.info(f"Métriques exposées sur http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+    return runner
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Traitement concurrent des mises à jour, dans l'ordre au sein d'un chat.
+    
+    Les mises à jour de chats différents sont traitées en parallèle. Celles
+    d'un même chat attendent que la précédente soit terminée, ou qu'elle ait
+    tourné CHAT_ORDER_TIMEOUT secondes : une analyse longue a alors déjà
+    envoyé son message de chargement et ne bloque plus le chat. Le verrou
+    local garantit l'ordre d'arrivée ; le verrou du backend partagé
+    empêche deux réplicas de traiter le même chat en même temps.
+    """
+    
+    def __init__(self, max_concurrent_updates: int, backend=None, order_timeout: float = CHAT_ORDER_TIMEOUT):
+        super().__init__(max_concurrent_updates)
+        self.backend = backend
+        self.order_timeout = order_timeout
+        self._chat_locks = {}
+        self._waiters = Counter()
+    
+    async def _acquire_shared(self, lock_key: str, token: str) -> bool:
+        """Attend le verrou du chat sur le backend (au plus deux fois le délai d'ordre)"""
+        deadline = time.monotonic() + 2 * self.order_timeout
+        while time.monotonic() < deadline:
+            try:
+                if await self.backend.set_if_absent(lock_key, token, self.order_timeout):
+                    return True
+            except Exception as e:
+                logger.warning(f"Verrou de chat indisponible: {e}")
+                return False
+            await asyncio.sleep(0.05)
+        return False
+    
+    @staticmethod
+    def _record_first_response(task: Optional[asyncio.Future] = None):
+        """Temps jusqu'à la première réponse après un démarrage à froid (mesuré une fois).
+        
+        Appelé quand le traitement de la mise à jour se termine (callback de sa tâche).
+        """
+        if "first_response" not in STARTUP_TIMINGS:
+            elapsed = record_startup("first_response")
+            logger.info(
+                f"Première réponse {elapsed:.2f}s après le démarrage "
+                f"(mise à jour reçue à {STARTUP_TIMINGS['first_update']:.2f}s)"
+            )
+    
+    async def do_process_update(self, update: object, coroutine):
+        if "first_update" not in STARTUP_TIMINGS:
+            record_startup("first_update")
+        chat = getattr(update, "effective_chat", None)
+        if chat is None:
+            task = asyncio.ensure_future(coroutine)
+            task.add_done_callback(self._record_first_response)
+            await task
+            return
+        
+        lock = self._chat_locks.setdefault(chat.id, asyncio.Lock())
+        self._waiters[chat.id] += 1
+        try:
+            async with lock:
+                lock_key, token = f"chat:{chat.id}", f"{REPLICA_ID}:{getattr(update, 'update_id', id(update))}"
+                shared = self.backend is not None and await self._acquire_shared(lock_key, token)
+                task = asyncio.ensure_future(coroutine)
+                task.add_done_callback(self._record_first_response)
+                await asyncio.wait({task}, timeout=self.order_timeout)
+                if shared:
+                    try:
+                        await self.backend.release(lock_key, token)
+                    except Exception as e:
+                        logger.warning(f"Libération du verrou de chat impossible: {e}")
+        finally:
+            self._waiters[chat.id] -= 1
+            if not self._waiters[chat.id]:
+                del self._waiters[chat.id]
+                self._chat_locks.pop(chat.id, None)
+        await task
+    
+    async def initialize(self):
+        pass
+    
+    async def shutdown(self):
+        pass
+
+async def post_init(application: Application):
+    """Crée l'analyseur et sa session HTTP une seule fois au démarrage"""
+    backend = application.bot_data["backend"]
+    analyzer = TokenAnalyzer(cache=TokenCache.shared())
+    analyzer.cache.backend = backend
+    await analyzer.init_session()
+    application.bot_data["analyzer"] = analyzer
+    application.bot_data["analyses"] = AnalysisRegistry(analyzer, backend=backend)
+    application.bot_data["report_pages"] = ReportPages(backend)
+    application.bot_data["scheduler"] = AnalysisScheduler()
+    application.bot_data["inline_batches"] = InlineBatches(analyzer, application.bot_data["scheduler"])
+    application.bot_data["metrics_runner"] = await start_metrics_server()
+    
+    subscriptions = WatchSubscriptions()
+    application.bot_data["watch_subscriptions"] = subscriptions
+    if WATCH_ENABLED:
+        async def notify(chat_ids: List[int], text: str, buttons: InlineKeyboardMarkup):
+            text, buttons = await application.bot_data["report_pages"].first_page(text, buttons)
+            for chat_id in chat_ids:
+                try:
+                    await application.bot.send_message(
+                        chat_id, text, parse_mode=REPORT_RENDERER.parse_mode, reply_markup=buttons,
+                        disable_web_page_preview=True
+                    )
+                except Exception as e:
+                    logger.warning(f"Envoi /watch impossible vers {chat_id}: {e}")
+        
+        watcher = TokenWatcher(analyzer, subscriptions, notify)
+        watcher.start()
+        application.bot_data["watcher"] = watcher
+    
+    if INDEXER_ENABLED and INDEXER_READ_ONLY:
+        # Index tenu par `python bot.py index` : le bot ne fait que le lire
+        try:
+            analyzer.indexer = create_indexer(analyzer.session, read_only=True)
+        except sqlite3.Error as e:
+            logger.warning(f"Index {INDEXER_PATH} illisible, analyses sans index local: {e}")
+    elif INDEXER_ENABLED:
+        analyzer.indexer = create_indexer(analyzer.session)
+        application.bot_data["indexer_task"] = asyncio.create_task(analyzer.indexer.run())
+    
+    if WARMUP_ENABLED:
+        application.bot_data["warmup_task"] = asyncio.create_task(warmup(analyzer))
+    logger.info(f"Prêt à recevoir les messages {record_startup('ready'):.2f}s après le démarrage")
+
+async def warmup(analyzer: TokenAnalyzer):
+    """Préchauffage en tâche de fond, lancé une fois le bot prêt.
+    
+    Rien ici ne retarde /start : chaque étape accélère seulement la
+    première analyse (imports eth_abi, cache disque, connexions ouvertes).
+    """
+    try:
+        await asyncio.to_thread(_load_eth_modules)
+        purged = await asyncio.to_thread(analyzer.cache.purge_expired)
+        preloaded = await asyncio.to_thread(analyzer.cache.preload, CACHE_PRELOAD)
+        status = await analyzer.warmup_connections()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Préchauffage interrompu: {e}")
+        return
+    
+    healthy = sum(chain_status["healthy"] for chain_status in status.values())
+    total = sum(chain_status["total"] for chain_status in status.values())
+    logger.info(
+        f"Préchauffage terminé {record_startup('warmup'):.2f}s après le démarrage : "
+        f"{healthy}/{total} noeuds RPC opérationnels, {preloaded} entrées de cache chargées, "
+        f"{purged} entrées expirées supprimées"
+    )
+
+async def post_shutdown(application: Application):
+    """Ferme la session HTTP et le cache à l'arrêt"""
+    warmup_task = application.bot_data.pop("warmup_task", None)
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+        await asyncio.gather(warmup_task, return_exceptions=True)
+    inline_batches = application.bot_data.pop("inline_batches", None)
+    if inline_batches:
+        await inline_batches.close()
+    analyzer = application.bot_data.pop("analyzer", None)
+    watcher = application.bot_data.pop("watcher", None)
+    if watcher:
+        await watcher.stop()
+    indexer_task = application.bot_data.pop("indexer_task", None)
+    if indexer_task:
+        analyzer.indexer.stop()
+        await indexer_task
+    if analyzer and analyzer.indexer:
+        analyzer.indexer.close()
+    if analyzer:
         await analyzer.close_session()
+        analyzer.cache.close()
+    metrics_runner = application.bot_data.pop("metrics_runner", None)
+    if metrics_runner:
+        await metrics_runner.cleanup()
+    backend = application.bot_data.pop("backend", None)
+    if backend:
+        await backend.close()
+
+async def run_webhook(application: Application):
+    """Mode webhook : serveur aiohttp qui reçoit les mises à jour de Telegram.
+    
+    Le réplica est sans état local indispensable (cache et analyses en cours
+    passent par le backend partagé) : plusieurs instances peuvent tourner
+    derrière le même load balancer. /healthz répond dès que le serveur écoute.
+    """
+    async def handle_update(request: web.Request) -> web.Response:
+        if request.headers.get("X-Telegram-Bot-Api-Secret-Token") != WEBHOOK_SECRET:
+            return web.Response(status=403)
+        try:
+            update = Update.de_json(await request.json(), application.bot)
+        except ValueError:
+            return web.Response(status=400)
+        await application.update_queue.put(update)
+        return web.Response()
+    
+    async def handle_health(request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+    
+    app = web.Application()
+    app.router.add_post(WEBHOOK_PATH, handle_update)
+    app.router.add_get("/healthz", handle_health)
+    runner = web.AppRunner(app, access_log=None)
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    
+    await application.initialize()
+    try:
+        await post_init(application)
+        await application.start()
+        await runner.setup()
+        await web.TCPSite(runner, "0.0.0.0", WEBHOOK_PORT).start()
+        # Idempotent : chaque réplica peut le refaire à son démarrage. Le
+        # webhook n'est pas supprimé à l'arrêt, les autres réplicas continuent.
+        await application.bot.set_webhook(
+            url=WEBHOOK_URL + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+        )
+        logger.info(f"🤖 Bot démarré en webhook sur le port {WEBHOOK_PORT} (réplica {REPLICA_ID})")
+        await stop.wait()
+    finally:
+        await runner.cleanup()
+        if application.running:
+            await application.stop()
+        await post_shutdown(application)
+        await application.shutdown()
 
 def main():
     """Point d'entrée principal"""
+    backend = create_shared_backend()
+    
     # Créer l'application
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    builder = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        # Les mises à jour sont traitées en parallèle ; la charge des analyses
+        # est bornée par AnalysisScheduler. La marge garde /start réactif même
+        # quand la file d'attente est pleine.
+        .concurrent_updates(ChatOrderedUpdateProcessor(
+            MAX_CONCURRENT_ANALYSES + ANALYSIS_QUEUE_SIZE + 32, backend if REDIS_URL else None
+        ))
+    )
+    if not WEBHOOK_URL:
+        builder = builder.post_init(post_init).post_shutdown(post_shutdown)
+    application = builder.build()
+    application.bot_data["backend"] = backend
     
     # Ajouter les handlers
     application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("stats", stats))
+    application.add_handler(CommandHandler("debug", debug))
+    application.add_handler(CommandHandler("batch", batch))
+    application.add_handler(InlineQueryHandler(inline_query))
+    application.add_handler(CallbackQueryHandler(report_page, pattern=r"^page:"))
+    application.add_handler(CommandHandler("watch", watch))
+    application.add_handler(CommandHandler("unwatch", unwatch))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, analyze_message))
     
     # Démarrer le bot
+    if WEBHOOK_URL:
+        asyncio.run(run_webhook(application))
+        return
     logger.info("🤖 Bot démarré!")
     application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:2] == ["index"]:
+        asyncio.run(run_indexer())
+    else:
+        main()
 
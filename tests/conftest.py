@@ -0,0 +1,22 @@
+"""Configuration commune des tests : bot importé sans services externes.
+
+Comme pour bench.py, les variables d'environnement sont fixées avant
+l'import du module : clés factices, cache disque, /metrics, indexeur et
+surveillance désactivés.
+"""
+
+import os
+import sys
+import warnings
+
+os.environ.setdefault("BASESCAN_API_KEY", "test")
+os.environ.setdefault("ETHERSCAN_API_KEY", "test")
+os.environ.setdefault("CACHE_PATH", "")
+os.environ.setdefault("METRICS_PORT", "")
+os.environ.setdefault("INDEXER_ENABLED", "0")
+os.environ.setdefault("WATCH_ENABLED", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Avertissements d'eth_utils à l'import
+warnings.simplefilter("ignore", UserWarning)
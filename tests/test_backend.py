@@ -0,0 +1,149 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import bot
+
+ADDRESS = "0x" + "ab" * 20
+NAME = f"{ADDRESS}:base"
+
+
+class FakeAnalyzer:
+    """Analyseur dont l'analyse produit deux versions du rapport"""
+
+    def __init__(self):
+        self.runs = 0
+
+    async def detect_chains(self, address):
+        return ["base"]
+
+    async def stream_analysis(self, address, chains):
+        self.runs += 1
+        yield ("local partiel", None)
+        yield ("local final", None)
+
+
+def _follow(backend, during=None):
+    registry = bot.AnalysisRegistry(FakeAnalyzer(), backend=backend)
+
+    async def scenario():
+        follower = asyncio.create_task(_collect(registry))
+        if during:
+            await during()
+        return await follower, registry.analyzer.runs
+
+    return asyncio.run(scenario())
+
+
+async def _collect(registry):
+    return [text async for text, _ in registry.stream(ADDRESS)]
+
+
+def test_cache_entries_are_shared_through_the_backend():
+    backend = bot.LocalBackend()
+    first = bot.TokenCache(path=None, backend=backend)
+    second = bot.TokenCache(path=None, backend=backend)
+
+    asyncio.run(first.set("token_meta", "base:0xabc", {"symbol": "ABC"}))
+    assert asyncio.run(second.get("token_meta", "base:0xabc")) == {"symbol": "ABC"}
+    assert second.stats["shared_hits"] == 1
+
+
+def test_unreadable_shared_entries_are_misses():
+    backend = bot.LocalBackend()
+    cache = bot.TokenCache(path=None, backend=backend)
+    for raw in ("{pas du json", '{"autre": 1}', "[1, 2]"):
+        asyncio.run(backend.set("cache:token_meta:base:0xabc", raw))
+        assert asyncio.run(cache.get("token_meta", "base:0xabc")) is None
+    assert cache.stats["misses"] == 3
+
+
+def test_follows_the_analysis_of_another_replica(monkeypatch):
+    monkeypatch.setattr(bot, "REMOTE_POLL_INTERVAL", 0.01)
+    backend = bot.LocalBackend()
+    encode = bot.AnalysisRegistry._encode
+
+    async def other_replica():
+        await backend.set(f"analysis:latest:{NAME}", encode(("distant partiel", None)))
+        await asyncio.sleep(0.05)
+        await backend.set(f"analysis:done:{NAME}", encode(("distant final", None)))
+
+    # La réservation est posée avant que le suiveur ne la demande
+    asyncio.run(backend.set(f"analysis:owner:{NAME}", "autre-réplica", 5))
+    texts, runs = _follow(backend, other_replica)
+    assert texts == ["distant partiel", "distant final"]
+    assert runs == 0
+
+
+def test_takes_over_when_the_owner_disappears(monkeypatch):
+    monkeypatch.setattr(bot, "REMOTE_POLL_INTERVAL", 0.01)
+    backend = bot.LocalBackend()
+    asyncio.run(backend.set(f"analysis:owner:{NAME}", "autre-réplica", 0.05))
+
+    texts, runs = _follow(backend)
+    assert texts[-1] == "local final"
+    assert runs == 1
+    # Rapport publié pour les autres réplicas, réservation libérée
+    assert asyncio.run(backend.get(f"analysis:owner:{NAME}")) is None
+    assert bot.AnalysisRegistry._decode(asyncio.run(backend.get(f"analysis:done:{NAME}")))[0] == "local final"
+
+
+def _update(update_id, chat_id=1):
+    return SimpleNamespace(update_id=update_id, effective_chat=SimpleNamespace(id=chat_id))
+
+
+def test_updates_of_a_chat_are_processed_in_order():
+    processed = []
+
+    async def handle(update_id, delay):
+        await asyncio.sleep(delay)
+        processed.append(update_id)
+
+    async def scenario():
+        processor = bot.ChatOrderedUpdateProcessor(8, backend=bot.LocalBackend(), order_timeout=1)
+        await asyncio.gather(
+            processor.do_process_update(_update(1), handle(1, 0.05)),
+            processor.do_process_update(_update(2), handle(2, 0)),
+            processor.do_process_update(_update(3, chat_id=2), handle(3, 0)),
+        )
+        return processor
+
+    processor = asyncio.run(scenario())
+    assert processed == [3, 1, 2]
+    assert not processor._chat_locks
+
+
+def test_chat_lock_held_by_another_replica_delays_the_update():
+    backend = bot.LocalBackend()
+    handled_at = []
+
+    async def handle():
+        handled_at.append(time.monotonic())
+
+    async def scenario():
+        await backend.set_if_absent("chat:1", "autre-réplica", 0.1)
+        processor = bot.ChatOrderedUpdateProcessor(8, backend=backend, order_timeout=1)
+        started_at = time.monotonic()
+        await processor.do_process_update(_update(1), handle())
+        return handled_at[0] - started_at, await backend.get("chat:1")
+
+    waited, lock = asyncio.run(scenario())
+    assert waited >= 0.1
+    assert lock is None
+
+
+def test_first_response_is_recorded_when_the_update_finishes(monkeypatch):
+    monkeypatch.setattr(bot, "STARTUP_TIMINGS", {})
+    finished_at = []
+
+    async def handle():
+        await asyncio.sleep(0.1)
+        finished_at.append(time.monotonic() - bot.STARTED_AT)
+
+    async def scenario():
+        # Délai d'ordre dépassé : le verrou du chat est rendu avant la fin du traitement
+        processor = bot.ChatOrderedUpdateProcessor(8, order_timeout=0.01)
+        await processor.do_process_update(_update(1), handle())
+
+    asyncio.run(scenario())
+    assert bot.STARTUP_TIMINGS["first_response"] >= finished_at[0]
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+import bot
+
+
+A = "0x" + "aa" * 20
+B = "0x" + "bb" * 20
+C = "0x" + "cc" * 20
+SERIAL = "0x" + "d1" * 20
+ONE_SHOT = "0x" + "d2" * 20
+
+
+def test_extract_addresses_keeps_first_occurrences_in_order():
+    mixed_case = "0x" + "BB" * 20
+    text = f"regarde {mixed_case} puis {A}, encore {B} et 0x123 ou {C}xyz"
+    assert bot.extract_addresses(text) == [mixed_case, A, C]
+    assert bot.extract_addresses(None) == []
+
+
+def _batch_analyzer():
+    analyzer = bot.TokenAnalyzer(cache=bot.TokenCache(path=None))
+    deployers = {A: SERIAL, B: SERIAL, C: ONE_SHOT}
+
+    async def init_session():
+        pass
+
+    async def detect_chains(address):
+        return ["base"]
+
+    async def get_tokens_metadata(addresses, chain):
+        return {address: {"symbol": address[2:5].upper(), "name": "Token"} for address in addresses}
+
+    async def detect_creation_platform(address, chain):
+        return None
+
+    async def get_contract_creation_tx(address, chain):
+        return {"deployer": deployers[address.lower()]}
+
+    async def get_deployer_tokens(deployer, current_token, chain, limit):
+        count = 4 if deployer == SERIAL else 0
+        return [{"address": f"0x{i:040x}"} for i in range(count)]
+
+    async def get_funding_address(deployer, chain):
+        return None
+
+    for function in (init_session, detect_chains, get_tokens_metadata, detect_creation_platform,
+                     get_contract_creation_tx, get_deployer_tokens, get_funding_address):
+        setattr(analyzer, function.__name__, function)
+    return analyzer
+
+
+def test_batch_ranks_rows_from_riskiest_to_safest():
+    rows = asyncio.run(_batch_analyzer().analyze_batch([C, A, B, "0x" + "AA" * 20]))
+
+    assert [row["address"].lower() for row in rows] == [A, B, C]
+    assert rows[0]["score"] == rows[1]["score"] == 4
+    assert any("déployeur en série" in flag for flag in rows[0]["flags"])
+    assert any("même déployeur" in flag for flag in rows[0]["flags"])
+    assert rows[2]["score"] == 0 and not rows[2]["flags"]
+    assert bot.format_batch_table(rows).splitlines()[0].startswith("📋")
+
+
+class SlowAnalyzer:
+    """Analyseur dont chaque lot attend `release` avant de répondre"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+
+    async def analyze_batch(self, addresses):
+        self.calls.append(addresses)
+        await self.release.wait()
+        return [{"address": address} for address in addresses]
+
+
+def test_inline_batches_coalesce_identical_address_sets():
+    async def scenario():
+        analyzer = SlowAnalyzer()
+        batches = bot.InlineBatches(analyzer, bot.AnalysisScheduler())
+        first = batches.start(1, ["0xAA", "0xBB"])
+        second = batches.start(2, ["0xbb", "0xaa"])
+        await asyncio.sleep(0)
+        analyzer.release.set()
+        return first is second, await first, analyzer.calls
+
+    same, rows, calls = asyncio.run(scenario())
+    assert same
+    assert len(rows) == 2
+    assert len(calls) == 1
+
+
+def test_inline_batches_are_capped_and_scheduled():
+    async def scenario():
+        analyzer = SlowAnalyzer()
+        scheduler = bot.AnalysisScheduler(max_concurrent=1, max_per_user=1)
+        batches = bot.InlineBatches(analyzer, scheduler, max_tasks=2)
+        first = batches.start(1, ["0xaa"])
+        with pytest.raises(bot.UserLimitReached):
+            batches.start(1, ["0xbb"])
+        second = batches.start(2, ["0xbb"])
+        with pytest.raises(bot.SchedulerFull):
+            batches.start(3, ["0xcc"])
+
+        # Un seul créneau : le second lot attend le premier
+        await asyncio.sleep(0)
+        assert analyzer.calls == [["0xaa"]]
+        analyzer.release.set()
+        await asyncio.gather(first, second)
+        await asyncio.sleep(0)
+        return analyzer.calls, scheduler.running, batches._tasks
+
+    calls, running, tasks = asyncio.run(scenario())
+    assert calls == [["0xaa"], ["0xbb"]]
+    assert running == 0
+    assert not tasks
@@ -0,0 +1,57 @@
+import bot
+
+
+def _breaker(**kwargs):
+    options = {"window": 4, "min_calls": 3, "error_rate": 0.5, "slow_call": 1.0, "cooldown": 10.0}
+    options.update(kwargs)
+    return bot.CircuitBreaker("test", **options)
+
+
+def _record(breaker, *outcomes):
+    for success, duration in outcomes:
+        assert breaker.allow()
+        breaker.record(success, duration)
+
+
+def test_stays_closed_until_min_calls():
+    breaker = _breaker()
+    _record(breaker, (False, 0.1), (False, 0.1))
+    assert breaker.state == breaker.CLOSED
+    _record(breaker, (True, 0.1))
+    assert breaker.state == breaker.OPEN
+    assert not breaker.allow()
+
+
+def test_slow_calls_count_as_failures():
+    breaker = _breaker()
+    _record(breaker, (True, 0.1), (True, 2.0), (True, 2.0))
+    assert breaker.state == breaker.OPEN
+
+
+def test_old_results_leave_the_window():
+    breaker = _breaker()
+    _record(breaker, (False, 0.1), (True, 0.1), (True, 0.1), (True, 0.1), (True, 0.1), (False, 0.1))
+    assert breaker.state == breaker.CLOSED
+    assert list(breaker.results) == [True, True, True, False]
+
+
+def test_single_probe_after_cooldown(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(bot.time, "monotonic", lambda: now[0])
+    breaker = _breaker()
+    _record(breaker, (False, 0.1), (False, 0.1), (False, 0.1))
+    assert breaker.state == breaker.OPEN
+
+    now[0] += 11
+    assert breaker.allow()
+    assert breaker.state == breaker.HALF_OPEN
+    assert not breaker.allow()  # un seul appel test à la fois
+    breaker.record(False, 0.1)
+    assert breaker.state == breaker.OPEN
+
+    now[0] += 11
+    assert breaker.allow()
+    breaker.cancel()  # appel test abandonné : un autre peut le remplacer
+    assert breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == breaker.CLOSED
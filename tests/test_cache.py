@@ -0,0 +1,61 @@
+import asyncio
+
+import bot
+
+
+def test_memory_tier_evicts_the_least_recently_used_entry():
+    cache = bot.TokenCache(path=None, max_entries=2)
+
+    async def scenario():
+        await cache.set("token_meta", "a", 1)
+        await cache.set("token_meta", "b", 2)
+        await cache.get("token_meta", "a")
+        await cache.set("token_meta", "c", 3)
+        return [await cache.get("token_meta", key) for key in ("a", "b", "c")]
+
+    assert asyncio.run(scenario()) == [1, None, 3]
+
+
+def test_entries_expire_with_the_ttl_of_their_kind(monkeypatch):
+    cache = bot.TokenCache(path=None)
+    now = [1_000_000.0]
+    monkeypatch.setattr(bot.time, "time", lambda: now[0])
+
+    asyncio.run(cache.set("txlist", "base:0xabc", [{"hash": "0x1"}]))
+    asyncio.run(cache.set("creation", "base:0xabc", {"deployer": "0xd"}))
+    now[0] += bot.CACHE_TTLS["txlist"] + 1
+    assert asyncio.run(cache.get("txlist", "base:0xabc")) is None
+    # Données immuables : sans expiration
+    assert asyncio.run(cache.get("creation", "base:0xabc")) == {"deployer": "0xd"}
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = bot.TokenCache(path=path)
+    asyncio.run(first.set("token_meta", "base:0xabc", {"symbol": "ABC"}))
+    first.close()
+
+    second = bot.TokenCache(path=path)
+    assert asyncio.run(second.get("token_meta", "base:0xabc")) == {"symbol": "ABC"}
+    assert second.stats["disk_hits"] == 1
+    assert second.preload(10) == 1
+    second.close()
+
+
+def test_get_or_fetch_does_not_cache_empty_or_failed_results():
+    cache = bot.TokenCache(path=None)
+    calls = []
+
+    def fetcher(value):
+        async def fetch():
+            calls.append(value)
+            return value
+        return fetch
+
+    async def scenario():
+        for value in ([], {"error": "boom"}, {"symbol": "ABC"}, {"symbol": "XYZ"}):
+            result = await cache.get_or_fetch("token_meta", "base:0xabc", fetcher(value))
+        return result
+
+    assert asyncio.run(scenario()) == {"symbol": "ABC"}
+    assert len(calls) == 3
@@ -0,0 +1,41 @@
+import asyncio
+
+import bot
+
+ADDRESS = "0x" + "44" * 20
+
+
+def _analyzer_with_probes(probes):
+    """Analyseur dont eth_getCode renvoie, par chaîne, True/False/None (RPC muet)"""
+    analyzer = bot.TokenAnalyzer(cache=bot.TokenCache(path=None))
+
+    async def has_code(address, chain):
+        return probes.get(chain)
+
+    analyzer._has_code = has_code
+    return analyzer
+
+
+def test_detect_chains_is_cached_only_when_every_probe_answered():
+    probes = {chain: False for chain in bot.PROVIDERS}
+    probes[bot.DEFAULT_CHAIN] = True
+    analyzer = _analyzer_with_probes(probes)
+
+    assert asyncio.run(analyzer.detect_chains(ADDRESS)) == [bot.DEFAULT_CHAIN]
+    assert asyncio.run(analyzer.cache.get("chains", ADDRESS)) == [bot.DEFAULT_CHAIN]
+
+
+def test_detect_chains_with_a_silent_rpc_is_not_cached():
+    other = next(chain for chain in bot.PROVIDERS if chain != bot.DEFAULT_CHAIN)
+    probes = {chain: False for chain in bot.PROVIDERS}
+    probes[other] = True
+    probes[bot.DEFAULT_CHAIN] = None
+    analyzer = _analyzer_with_probes(probes)
+
+    assert asyncio.run(analyzer.detect_chains(ADDRESS)) == [other]
+    assert asyncio.run(analyzer.cache.get("chains", ADDRESS)) is None
+
+    # Aucun RPC ne répond : chaîne par défaut, sans cache
+    analyzer = _analyzer_with_probes({})
+    assert asyncio.run(analyzer.detect_chains(ADDRESS)) == [bot.DEFAULT_CHAIN]
+    assert asyncio.run(analyzer.cache.get("chains", ADDRESS)) is None
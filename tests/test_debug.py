@@ -0,0 +1,68 @@
+import asyncio
+from types import SimpleNamespace
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import bot
+
+
+def test_http_spans_never_contain_the_request_path():
+    async def handle(request):
+        payload = await request.json()
+        return web.json_response({"jsonrpc": "2.0", "id": payload["id"], "result": "0x2105"})
+
+    async def explorer(request):
+        return web.json_response({"status": "1", "result": []})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/v3/{key}", handle)
+        app.router.add_get("/api", explorer)
+        async with TestServer(app) as server:
+            trace = bot.Trace("0xtoken")
+            bot.current_trace.set(trace)
+            async with aiohttp.ClientSession(trace_configs=[bot.create_http_trace_config()]) as session:
+                pool = bot.RPCPool("base", [str(server.make_url("/v3/secret-infura-key"))])
+                await bot.RPCClient(session, pool).call("eth_chainId", [])
+                async with session.get(server.make_url("/api").with_query(action="txlist", apikey="secret")):
+                    pass
+            return [span["name"] for span in trace.spans if span["kind"] == "http"]
+
+    names = asyncio.run(scenario())
+    assert names == ["POST 127.0.0.1 eth_chainId", "GET 127.0.0.1 txlist"]
+    assert not any("secret" in name for name in names)
+
+
+class FakeMessage:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+def _debug(analyses, user_id, chat_id, args=()):
+    message = FakeMessage()
+    update = SimpleNamespace(
+        message=message, effective_chat=SimpleNamespace(id=chat_id), effective_user=SimpleNamespace(id=user_id)
+    )
+    context = SimpleNamespace(args=list(args), application=SimpleNamespace(bot_data={"analyses": analyses}))
+    asyncio.run(bot.debug(update, context))
+    return message.replies[0]
+
+
+def test_debug_only_shows_traces_of_the_requesting_chat(monkeypatch):
+    analyses = bot.AnalysisRegistry(bot.TokenAnalyzer(cache=bot.TokenCache(path=None)))
+    for address in ("0xaaa", "0xbbb"):
+        trace = bot.Trace(address)
+        trace.finish()
+        analyses.traces[address] = trace
+    analyses.allow_debug("0xAAA", chat_id=1)
+    monkeypatch.setattr(bot, "ADMIN_USER_IDS", {99})
+
+    assert _debug(analyses, user_id=1, chat_id=1).startswith("🔍 Trace 0xaaa")
+    assert _debug(analyses, user_id=1, chat_id=1, args=["0xbbb"]).startswith("Aucune trace")
+    assert _debug(analyses, user_id=2, chat_id=2).startswith("Aucune trace")
+    assert _debug(analyses, user_id=99, chat_id=2).startswith("🔍 Trace 0xbbb")
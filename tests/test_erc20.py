@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+from eth_abi import encode
+
+import bot
+
+
+class FakePool:
+    """Pool RPC qui renvoie un résultat fixe, distinct pour les batchs"""
+
+    def __init__(self, result: str, batch_result: str = None):
+        self.result = result
+        self.batch_result = batch_result
+        self.payloads = []
+
+    async def post(self, session, payload, min_block=None):
+        self.payloads.append(payload)
+        if isinstance(payload, list):
+            return [{"jsonrpc": "2.0", "id": item["id"], "result": self.batch_result} for item in payload]
+        return {"jsonrpc": "2.0", "id": payload["id"], "result": self.result}
+
+
+def test_decode_decimals_rejects_out_of_range_values():
+    assert bot._decode_decimals(encode(["uint256"], [18])) == 18
+    with pytest.raises(ValueError):
+        bot._decode_decimals(encode(["uint256"], [256]))
+    with pytest.raises(ValueError):
+        bot._decode_decimals(encode(["uint256"], [2 ** 255]))
+
+
+def test_multicall_without_contract_raises_rpc_error():
+    rpc = bot.RPCClient(None, FakePool("0x"))
+    with pytest.raises(bot.RPCError):
+        asyncio.run(rpc.multicall([("0x" + "11" * 20, bot.ERC20_SELECTORS["name"])]))
+
+
+def test_read_erc20_fields_falls_back_to_batch_when_multicall_is_missing():
+    value = "0x" + encode(["uint256"], [6]).hex()
+    # Multicall3 absent : l'eth_call renvoie "0x", le batch JSON-RPC répond
+    pool = FakePool("0x", batch_result=value)
+    analyzer = bot.TokenAnalyzer(cache=bot.TokenCache(path=None))
+
+    rpc = bot.RPCClient(None, pool)
+    raw = asyncio.run(analyzer._read_erc20_fields(rpc, ["0x" + "22" * 20], ["decimals"]))
+    assert raw["0x" + "22" * 20]["decimals"] == bytes.fromhex(value[2:])
+    assert isinstance(pool.payloads[-1], list)
+
+
+def test_huge_decimals_is_neither_cached_nor_exponentiated():
+    address = "0x" + "33" * 20
+    cache = bot.TokenCache(path=None)
+    analyzer = bot.TokenAnalyzer(cache=cache)
+
+    async def read_fields(rpc, addresses, fields=None):
+        return {address: {
+            "name": encode(["string"], ["Evil"]),
+            "symbol": encode(["string"], ["EVIL"]),
+            "decimals": encode(["uint256"], [2 ** 200]),
+            "totalSupply": encode(["uint256"], [10 ** 18]),
+        }}
+
+    analyzer._read_erc20_fields = read_fields
+    analyzer.get_rpc = lambda chain: None
+
+    info = asyncio.run(analyzer.get_token_info(address, "base"))
+    assert "error" in info
+    assert asyncio.run(cache.get("token_meta", f"base:{address}")) is None
+
+
+def test_tokens_metadata_caches_erc20_and_non_erc20_answers():
+    token, other = "0x" + "44" * 20, "0x" + "55" * 20
+    cache = bot.TokenCache(path=None)
+    analyzer = bot.TokenAnalyzer(cache=cache)
+    reads = []
+
+    async def read_fields(rpc, addresses, fields=None):
+        reads.append(list(addresses))
+        meta = {"name": encode(["string"], ["Tok"]), "symbol": encode(["string"], ["TOK"]),
+                "decimals": encode(["uint256"], [18])}
+        # `other` n'a pas de fonction symbol() : ce n'est pas un ERC20
+        return {address: {**meta, "symbol": None} if address == other else meta for address in addresses}
+
+    analyzer._read_erc20_fields = read_fields
+    analyzer.get_rpc = lambda chain: None
+
+    first = asyncio.run(analyzer.get_tokens_metadata([token, other], "base"))
+    second = asyncio.run(analyzer.get_tokens_metadata([token, other], "base"))
+    assert first == second == {token: {"name": "Tok", "symbol": "TOK", "decimals": 18}, other: None}
+    assert reads == [[token, other]]
+    assert asyncio.run(cache.get("not_erc20", f"base:{other}")) is True
+
+
+def test_batch_fallback_node_errors_are_not_taken_for_non_erc20_contracts():
+    class ErrorPool(FakePool):
+        async def post(self, session, payload, min_block=None):
+            if isinstance(payload, list):
+                return [{"jsonrpc": "2.0", "id": item["id"], "error": {"code": -32000, "message": "header not found"}}
+                        for item in payload]
+            return await super().post(session, payload, min_block)
+
+    analyzer = bot.TokenAnalyzer(cache=bot.TokenCache(path=None))
+    with pytest.raises(bot.RPCError):
+        asyncio.run(analyzer._read_erc20_fields(bot.RPCClient(None, ErrorPool("0x")), ["0x" + "66" * 20]))
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from collections import Counter
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import bot
+
+RATE_LIMITED = {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"}
+
+
+class Explorer:
+    """API Etherscan locale : note les clés reçues ; `answers` fixe les premières réponses (429 ou JSON)"""
+
+    def __init__(self, answers=(), delay=0.0):
+        self.answers = list(answers)
+        self.delay = delay
+        self.keys = []
+        self.calls = Counter()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.keys.append(request.query["apikey"])
+        self.calls[request.query["address"]] += 1
+        await asyncio.sleep(self.delay)
+        answer = self.answers.pop(0) if self.answers else {"status": "1", "result": [request.query["address"]]}
+        if answer == 429:
+            return web.Response(status=429)
+        return web.json_response(answer)
+
+
+def run_explorer(explorer: Explorer, scenario, keys=("k1",), rate=100.0):
+    """Lance scenario(client) contre un ExplorerClient branché sur l'API locale"""
+    async def main():
+        app = web.Application()
+        app.router.add_get("/api", explorer.handle)
+        async with TestServer(app) as server:
+            explorers = {"base": {"url": str(server.make_url("/api")), "keys": list(keys)}}
+            async with aiohttp.ClientSession(trace_configs=[bot.create_http_trace_config()]) as session:
+                return await scenario(bot.ExplorerClient(session, explorers, rate=rate))
+
+    return asyncio.run(main())
+
+
+def _params(address: str) -> dict:
+    return {"module": "account", "action": "txlist", "address": address}
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(bot, "EXPLORER_BACKOFF", 0.01)
+
+
+def test_requests_are_paced_by_the_token_bucket():
+    async def scenario(client):
+        started_at = time.monotonic()
+        await asyncio.gather(*(client.get("base", _params(f"0x{i}")) for i in range(15)))
+        return time.monotonic() - started_at
+
+    # Seau de 10 jetons à 10/s : les 5 requêtes en excès attendent ~0,5s
+    elapsed = run_explorer(Explorer(), scenario, rate=10.0)
+    assert 0.4 <= elapsed < 2
+
+
+def test_api_keys_are_used_in_turn():
+    async def scenario(client):
+        for i in range(6):
+            await client.get("base", _params(f"0x{i}"))
+
+    explorer = Explorer()
+    run_explorer(explorer, scenario, keys=("k1", "k2", "k3"))
+    assert explorer.keys == ["k1", "k2", "k3", "k1", "k2", "k3"]
+
+
+def test_identical_in_flight_requests_are_coalesced_and_traced_once_per_analysis():
+    async def scenario(client):
+        traces = [bot.Trace("first"), bot.Trace("second")]
+
+        async def analysis(trace):
+            bot.current_trace.set(trace)
+            return await asyncio.gather(*(client.get("base", _params("0xabc")) for _ in range(2)))
+
+        results = await asyncio.gather(*(analysis(trace) for trace in traces))
+        return results, traces
+
+    explorer = Explorer(delay=0.1)
+    results, traces = run_explorer(explorer, scenario)
+    assert explorer.calls == {"0xabc": 1}
+    assert all(result == {"status": "1", "result": ["0xabc"]} for pair in results for result in pair)
+
+    first, second = ([span["status"] for span in trace.spans if span["kind"] == "http"] for trace in traces)
+    assert first == ["200"]
+    assert second == ["shared"]
+
+
+def test_rate_limited_answers_are_retried_with_backoff():
+    async def scenario(client):
+        return await client.get("base", _params("0xabc"))
+
+    explorer = Explorer(answers=[429, RATE_LIMITED])
+    assert run_explorer(explorer, scenario) == {"status": "1", "result": ["0xabc"]}
+    assert explorer.calls == {"0xabc": 3}
+
+
+def test_persistent_rate_limit_raises_explorer_error():
+    async def scenario(client):
+        with pytest.raises(bot.ExplorerError):
+            await client.get("base", _params("0xabc"))
+        return client._in_flight
+
+    explorer = Explorer(answers=[429, RATE_LIMITED] * bot.EXPLORER_MAX_RETRIES)
+    assert run_explorer(explorer, scenario) == {}
+    assert explorer.calls == {"0xabc": bot.EXPLORER_MAX_RETRIES + 1}
+
+
+class TxlistExplorer:
+    """Explorateur qui répond toujours `answer` à txlist"""
+
+    def __init__(self, answer):
+        self.answer = answer
+
+    def supports(self, chain):
+        return True
+
+    async def get(self, chain, params):
+        return self.answer
+
+
+@pytest.mark.parametrize("result", ["Invalid API Key", "Query Timeout occured"])
+def test_txlist_errors_are_not_cached_as_empty_wallets(result):
+    analyzer = bot.TokenAnalyzer(cache=bot.TokenCache(path=None))
+    analyzer.explorer = TxlistExplorer({"status": "0", "message": "NOTOK", "result": result})
+
+    with pytest.raises(bot.ExplorerError):
+        asyncio.run(analyzer._fetch_deployer_txlist("0xabc", "base"))
+    assert asyncio.run(analyzer.get_deployer_tokens("0xabc", "0xdef", "base")) is bot.FAILED
+    assert asyncio.run(analyzer.get_funders("0xabc", "base")) is bot.FAILED
+    assert asyncio.run(analyzer.cache.get("txlist", "base:0xabc")) is None
+
+
+def test_wallet_without_transactions_has_an_empty_txlist():
+    analyzer = bot.TokenAnalyzer(cache=bot.TokenCache(path=None))
+    analyzer.explorer = TxlistExplorer({"status": "0", "message": "No transactions found", "result": []})
+
+    assert asyncio.run(analyzer._fetch_deployer_txlist("0xabc", "base")) == []
+    assert asyncio.run(analyzer.get_deployer_tokens("0xabc", "0xdef", "base")) == []
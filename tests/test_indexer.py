@@ -0,0 +1,107 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+import bot
+
+DEPLOYER = "0x" + "d0" * 20
+FACTORY = "0x" + "fa" * 20
+DIRECT = "0x" + "01" * 20
+MINTED = "0x" + "02" * 20
+EXISTING = "0x" + "03" * 20
+
+
+def _mint(token: str) -> dict:
+    return {"address": token, "topics": [bot.TRANSFER_TOPIC, bot.ZERO_TOPIC, "0x" + "00" * 12 + "ab" * 20]}
+
+
+class FakeRPC:
+    """Noeud JSON-RPC en mémoire : un bloc par numéro, eth_getCode "0x" sauf pour EXISTING"""
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.calls = []
+
+    async def call(self, method, params, min_block=None):
+        self.calls.append((method, min_block))
+        if method == "eth_blockNumber":
+            return hex(max(self.blocks))
+        raise bot.RPCError(f"{method} non simulé")
+
+    async def batch(self, calls, min_block=None):
+        self.calls.append(("batch", min_block))
+        results = []
+        for method, params in calls:
+            if method == "eth_getBlockByNumber":
+                results.append({"timestamp": hex(1_700_000_000 + int(params[0], 16))})
+            elif method == "eth_getBlockReceipts":
+                results.append(self.blocks[int(params[0], 16)])
+            elif method == "eth_getCode":
+                results.append("0x6080" if params[0] == EXISTING else "0x")
+        return results
+
+
+def test_index_range_records_direct_and_factory_tokens():
+    rpc = FakeRPC({
+        10: [{"from": DEPLOYER, "to": None, "status": "0x1", "contractAddress": DIRECT,
+              "transactionHash": "0xaa", "logs": []}],
+        11: [{"from": DEPLOYER, "to": FACTORY, "status": "0x1", "contractAddress": None,
+              "transactionHash": "0xbb", "logs": [_mint(MINTED), _mint(EXISTING)]}],
+    })
+    indexer = bot.ChainIndexer(rpc, "base", ":memory:", batch_blocks=10)
+
+    found = asyncio.run(indexer.index_range(10, 11))
+
+    assert found == 2
+    assert indexer.checkpoint() == 11
+    assert [row["address"] for row in indexer.contracts_by_deployer(DEPLOYER)] == [MINTED, DIRECT]
+    assert indexer.contract(MINTED)["factory"] == FACTORY
+    assert indexer.known_contracts([DIRECT.upper(), EXISTING]) == {DIRECT}
+    # Lectures de plages uniquement sur un noeud ayant atteint le dernier bloc
+    assert ("batch", 11) in rpc.calls
+
+    # Un contrat déjà indexé n'est pas revérifié
+    rpc.blocks[12] = [{"from": DEPLOYER, "to": FACTORY, "status": "0x1", "contractAddress": None,
+                       "transactionHash": "0xcc", "logs": [_mint(MINTED)]}]
+    assert asyncio.run(indexer.index_range(12, 12)) == 0
+    indexer.close()
+
+
+def test_analyzer_reads_the_index_off_the_event_loop():
+    indexer = bot.ChainIndexer(FakeRPC({}), "base", ":memory:")
+    indexer._store([("base", DIRECT, DEPLOYER, None, None, 10, 1_700_000_010, "0xaa")], 10)
+    threads = []
+    contract = indexer.contract
+
+    def tracking_contract(address):
+        threads.append(threading.current_thread())
+        return contract(address)
+
+    indexer.contract = tracking_contract
+    analyzer = bot.TokenAnalyzer(cache=bot.TokenCache(path=None))
+    analyzer.indexer = indexer
+
+    creation = asyncio.run(analyzer._fetch_contract_creation_tx(DIRECT, "base"))
+
+    assert creation == {"deployer": DEPLOYER, "tx_hash": "0xaa"}
+    assert threads and threads[0] is not threading.main_thread()
+    indexer.close()
+
+
+def test_read_only_index_sees_the_writer_process_rows(tmp_path):
+    path = str(tmp_path / "index.sqlite")
+    with pytest.raises(sqlite3.Error):
+        bot.ChainIndexer(None, "base", path, read_only=True)
+
+    writer = bot.ChainIndexer(FakeRPC({}), "base", path)
+    reader = bot.ChainIndexer(None, "base", path, read_only=True)
+    writer._store([("base", DIRECT, DEPLOYER, None, None, 10, 1_700_000_010, "0xaa")], 10)
+
+    assert reader.contract(DIRECT)["deployer"] == DEPLOYER
+    assert reader.checkpoint() == 10
+    with pytest.raises(sqlite3.OperationalError):
+        reader._store([("base", MINTED, DEPLOYER, None, None, 11, 1_700_000_011, "0xbb")], 11)
+    reader.close()
+    writer.close()
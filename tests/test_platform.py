@@ -0,0 +1,36 @@
+import asyncio
+
+import bot
+
+ADDRESS = "0x" + "70" * 20
+
+
+def _analyzer(transactions):
+    """Analyseur dont l'explorateur renvoie `transactions` ; les API de plateformes sont notées"""
+    analyzer = bot.TokenAnalyzer(cache=bot.TokenCache(path=None))
+    checks = []
+
+    async def get_first_transactions(address, chain):
+        return transactions
+
+    async def run_platform_check(detector, address, chain):
+        checks.append(detector["name"])
+        return detector["name"] == "Clanker"
+
+    analyzer._get_first_transactions = get_first_transactions
+    analyzer._run_platform_check = run_platform_check
+    return analyzer, checks
+
+
+def test_local_zora_signal_skips_the_platform_apis():
+    analyzer, checks = _analyzer([{"from": "0x777777" + "00" * 17, "input": "0x"}])
+    platform = asyncio.run(analyzer._detect_creation_platform(ADDRESS, "base"))
+    assert platform["name"] == "Zora"
+    assert checks == []
+
+
+def test_platform_apis_are_checked_without_a_local_signal():
+    analyzer, checks = _analyzer([{"from": "0x" + "11" * 20, "input": "0x"}])
+    platform = asyncio.run(analyzer._detect_creation_platform(ADDRESS, "base"))
+    assert platform["name"] == "Clanker"
+    assert "Clanker" in checks
@@ -0,0 +1,76 @@
+import re
+
+import pytest
+
+import bot
+
+
+def _section():
+    return (
+        bot.ReportSection("Titre <1>")
+        .blank()
+        .line(bot.Bold("Nom:"), " a_b*c [x] 1.5 & <i>")
+        .line(bot.Code("0xAb`c"), " ", bot.Link("scan (1)", "https://scan.io/a?b=1&c=(2)"))
+    )
+
+
+def test_report_renderer_is_abstract():
+    with pytest.raises(TypeError):
+        bot.ReportRenderer()
+
+
+def test_html_renderer_escapes_text_and_attributes():
+    text = bot.HTMLRenderer().section(_section())
+    assert text.split("\n") == [
+        "<b>Titre &lt;1&gt;</b>",
+        "",
+        "<b>Nom:</b> a_b*c [x] 1.5 &amp; &lt;i&gt;",
+        '<code>0xAb`c</code> <a href="https://scan.io/a?b=1&amp;c=(2)">scan (1)</a>',
+    ]
+
+
+def test_markdown_v2_renderer_escapes_special_characters():
+    text = bot.MarkdownV2Renderer().section(_section())
+    assert text.split("\n") == [
+        "*Titre <1\\>*",
+        "",
+        "*Nom:* a\\_b\\*c \\[x\\] 1\\.5 & <i\\>",
+        "`0xAb\\`c` [scan \\(1\\)](https://scan.io/a?b=1&c=(2\\))",
+    ]
+
+
+def test_paginate_prefers_paragraphs_then_lines():
+    text = "\n\n".join(["a" * 40, "b" * 40, "c\n" * 30])
+    pages = bot.paginate(text, limit=50, renderer=bot.HTMLRenderer())
+    assert pages[:2] == ["a" * 40, "b" * 40]
+    assert all(len(page) <= 50 for page in pages)
+    assert "".join(pages[2:]).count("c") == 30
+
+
+@pytest.mark.parametrize("renderer", [bot.HTMLRenderer(), bot.MarkdownV2Renderer()])
+def test_paginate_never_cuts_inside_a_rendered_part(renderer):
+    parts = []
+    for i in range(60):
+        parts += [bot.Code(f"0x{i:040x}"), " ", bot.Link(f"scan.{i}", f"https://scan.io/{i}"), " & (x) "]
+    line = renderer.section(bot.ReportSection().line(*parts))
+    pages = bot.paginate(line, limit=200, renderer=renderer)
+
+    assert len(pages) > 1
+    assert "".join(pages) == line
+    for page in pages:
+        assert len(page) <= 200
+        # Chaque page se relit entièrement en fragments complets
+        assert "".join(match.group() for match in renderer.PART.finditer(page)) == page
+        if isinstance(renderer, bot.HTMLRenderer):
+            assert page.count("<code>") == page.count("</code>")
+            assert page.count("<a ") == page.count("</a>")
+            assert not re.search(r"&[#\w]*$", page)
+        else:
+            assert not page.endswith("\\")
+            assert page.count("`") % 2 == 0
+
+
+def test_paginate_cuts_long_plain_text_anywhere():
+    renderer = bot.HTMLRenderer()
+    pages = bot.paginate("x" * 120, limit=50, renderer=renderer)
+    assert pages == ["x" * 50, "x" * 50, "x" * 20]
@@ -0,0 +1,112 @@
+import asyncio
+
+import bot
+
+DEPLOYER = "0x" + "d0" * 20
+FUNDER = "0x" + "f1" * 20
+GRANDPARENT = "0x" + "f2" * 20
+CEX = "0x" + "ce" * 20
+
+
+def _graph(funder_label=None):
+    deployer = {"address": DEPLOYER, "depth": 0, "funded_by": None, "label": None, "tokens": []}
+    funder = {"address": FUNDER, "depth": 1, "funded_by": DEPLOYER, "label": funder_label}
+    grandparent = {"address": GRANDPARENT, "depth": 2, "funded_by": FUNDER, "label": None,
+                   "tokens": [{"name": "Old", "symbol": "OLD", "timestamp": "2024-01-01", "address": "0x" + "0a" * 20}]}
+    if funder_label:
+        return {"funder": funder, "wallets": [deployer], "stops": [funder], "depth": 1, "token_count": 0, "complete": True}
+    funder["tokens"] = [{"name": "Rug", "symbol": "RUG", "timestamp": "2024-02-01", "address": "0x" + "0b" * 20}]
+    return {"funder": funder, "wallets": [deployer, funder, grandparent], "depth": 2, "token_count": 2, "complete": True,
+            "stops": [{"address": CEX, "depth": 3, "funded_by": GRANDPARENT, "label": "Coinbase"}]}
+
+
+def _sections(graph):
+    analyzer = bot.TokenAnalyzer(cache=bot.TokenCache(path=None))
+    renderer = bot.HTMLRenderer()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        creation, funder, cluster = loop.create_future(), loop.create_future(), loop.create_future()
+        creation.set_result({"deployer": DEPLOYER})
+        node = graph["funder"]
+        funder.set_result({"address": node["address"], "label": node["label"], "tokens": node.get("tokens", [])})
+        cluster.set_result(graph)
+        section = await analyzer._section_funder("base", creation, funder)
+        return renderer.section(section), renderer.section(await analyzer._section_cluster(creation, cluster))
+
+    return asyncio.run(scenario())
+
+
+def test_funder_is_not_repeated_in_the_cluster_section():
+    funder, cluster = _sections(_graph())
+    assert FUNDER in funder and "RUG" in funder
+    assert FUNDER not in cluster
+    assert GRANDPARENT in cluster and "Coinbase" in cluster
+
+
+def test_labelled_funder_is_shown_once_with_its_label():
+    funder, cluster = _sections(_graph(funder_label="Binance"))
+    assert "Étiquette: Binance" in funder
+    assert "Binance" not in cluster
+
+
+class FundingExplorer:
+    """Explorateur en mémoire : DEPLOYER financé par FUNDER, lui-même financé par GRANDPARENT"""
+
+    def __init__(self):
+        self.addresses = []
+
+    def supports(self, chain):
+        return True
+
+    async def get(self, chain, params):
+        wallet = params["address"]
+        self.addresses.append((wallet, params["sort"]))
+        funded_by = {DEPLOYER: FUNDER, FUNDER: GRANDPARENT}.get(wallet)
+        if params["sort"] == "desc" or funded_by is None:
+            return {"status": "0", "message": "No transactions found", "result": []}
+        return {"status": "1", "result": [{"from": funded_by, "to": wallet, "value": "1"}]}
+
+
+def test_direct_funder_only_reads_the_deployer_funding_level():
+    analyzer = bot.TokenAnalyzer(cache=bot.TokenCache(path=None))
+    analyzer.explorer = FundingExplorer()
+
+    funder = asyncio.run(analyzer.get_direct_funder(DEPLOYER, "0x" + "77" * 20, "base"))
+
+    assert funder == {"address": FUNDER, "label": None, "tokens": []}
+    # Financeurs du déployeur puis txlist du financeur, jamais le niveau 2
+    assert analyzer.explorer.addresses == [(DEPLOYER, "asc"), (FUNDER, "desc")]
+
+
+class BrokenExplorer:
+    """Explorateur dont chaque appel échoue"""
+
+    def supports(self, chain):
+        return True
+
+    async def get(self, chain, params):
+        raise bot.ExplorerError("NOTOK")
+
+
+def test_explorer_failure_leaves_the_deployer_section_uncached():
+    analyzer = bot.TokenAnalyzer(cache=bot.TokenCache(path=None))
+    analyzer.explorer = BrokenExplorer()
+    token = "0x" + "77" * 20
+
+    async def scenario():
+        creation = asyncio.create_task(analyzer._run_stage("creation", analyzer.get_contract_creation_tx(token, "base")))
+        deployer = asyncio.create_task(analyzer._deployer_branch(creation, token, "base"))
+        text = await analyzer._render_section(
+            token, "base", "deployer", analyzer._section_deployer(token, "base", creation, deployer)
+        )
+        cached = await analyzer.cache.get("section", analyzer._section_key(token, "base", "deployer"))
+        return text, cached, await analyzer.cache.get("creation", f"base:{token}")
+
+    text, cached, creation = asyncio.run(scenario())
+    assert bot.FAILED_MESSAGE in text
+    assert cached is None and creation is None
+
+    section = bot.ReportSection()
+    analyzer._add_token_list(section, bot.FAILED, "Aucun token trouvé")
+    assert not section.complete
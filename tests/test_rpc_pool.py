@@ -0,0 +1,178 @@
+import asyncio
+import gc
+import time
+from collections import Counter
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import bot
+
+
+class Nodes:
+    """Noeuds JSON-RPC locaux au comportement réglable : latence, statut HTTP, erreur, tête"""
+
+    def __init__(self, **behaviours):
+        self.behaviours = behaviours
+        self.calls = Counter()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        name = request.match_info["name"]
+        behaviour = self.behaviours[name]
+        self.calls[name] += 1
+        payload = await request.json()
+        await asyncio.sleep(behaviour.get("delay", 0))
+        if "status" in behaviour:
+            return web.Response(status=behaviour["status"])
+        if "error" in behaviour:
+            return web.json_response({"jsonrpc": "2.0", "id": payload["id"], "error": behaviour["error"]})
+        result = hex(behaviour["head"]) if payload["method"] == "eth_blockNumber" else name
+        return web.json_response({"jsonrpc": "2.0", "id": payload["id"], "result": result})
+
+
+def run_pool(nodes: Nodes, names, scenario, prepare=None):
+    """Lance scenario(rpc, pool) contre un pool dont les endpoints sont les noeuds `names`"""
+    async def main():
+        app = web.Application()
+        app.router.add_post("/{name}", nodes.handle)
+        async with TestServer(app) as server:
+            pool = bot.RPCPool("base", [str(server.make_url(f"/{name}")) for name in names])
+            if prepare:
+                prepare(pool)
+            async with aiohttp.ClientSession() as session:
+                return await scenario(bot.RPCClient(session, pool), pool)
+
+    return asyncio.run(main())
+
+
+def test_hedge_delay_is_the_p90_of_recent_latencies():
+    pool = bot.RPCPool("base", ["http://a", "http://b"])
+    assert pool.hedge_delay() == bot.RPC_HEDGE_DELAY
+    pool.latencies.extend(i / 100 for i in range(1, 101))
+    assert pool.hedge_delay() == pytest.approx(0.90)
+
+
+def test_hedged_request_fires_at_p90_and_first_answer_wins():
+    nodes = Nodes(slow={"delay": 2}, fast={"delay": 0})
+
+    def prepare(pool):
+        pool.latencies.extend([0.05] * 50)
+        pool.endpoints[0].observe(0.01)  # le noeud lent est classé premier
+        pool.endpoints[0].used_at = pool.endpoints[1].used_at = time.monotonic()
+        pool.endpoints[1].observe(0.02)
+
+    async def scenario(rpc, pool):
+        started_at = time.monotonic()
+        result = await rpc.call("eth_chainId", [])
+        return result, time.monotonic() - started_at, pool
+
+    result, elapsed, pool = run_pool(nodes, ["slow", "fast"], scenario, prepare)
+    assert result == "fast"
+    assert elapsed < 1
+    assert nodes.calls == {"slow": 1, "fast": 1}
+    # Le perdant annulé garde une latence au moins égale au délai de hedging
+    assert pool.endpoints[0].latency > 0.01
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_failover_on_throttling_and_server_errors(status):
+    nodes = Nodes(bad={"status": status}, good={})
+
+    async def scenario(rpc, pool):
+        return await rpc.call("eth_chainId", []), pool
+
+    result, pool = run_pool(nodes, ["bad", "good"], scenario)
+    assert result == "good"
+    assert list(pool.endpoints[0].breaker.results) == [False]
+
+
+def test_failover_on_lagging_node_error():
+    nodes = Nodes(behind={"error": {"code": -32000, "message": "header not found"}}, good={})
+
+    async def scenario(rpc, pool):
+        return await rpc.call("eth_getCode", ["0x" + "00" * 20, "0x10"])
+
+    assert run_pool(nodes, ["behind", "good"], scenario) == "good"
+
+
+def test_failing_node_is_ejected_then_probed_after_cooldown():
+    nodes = Nodes(bad={"status": 502}, good={})
+
+    def prepare(pool):
+        pool.endpoints[0].breaker.cooldown = 0.2
+
+    async def scenario(rpc, pool):
+        for _ in range(bot.BREAKER_MIN_CALLS):
+            pool.endpoints[0].used_at = 0.0  # le noeud en échec reste prioritaire
+            await rpc.call("eth_chainId", [])
+        assert pool.endpoints[0].ejected
+        calls_when_ejected = nodes.calls["bad"]
+
+        pool.endpoints[0].used_at = 0.0
+        await rpc.call("eth_chainId", [])
+        assert nodes.calls["bad"] == calls_when_ejected
+
+        await asyncio.sleep(0.25)
+        pool.endpoints[0].used_at = 0.0
+        assert await rpc.call("eth_chainId", []) == "good"
+        return calls_when_ejected
+
+    calls_when_ejected = run_pool(nodes, ["bad", "good"], scenario, prepare)
+    assert calls_when_ejected == bot.BREAKER_MIN_CALLS
+    assert nodes.calls["bad"] == calls_when_ejected + 1
+
+
+def test_all_ejected_falls_back_to_the_best_node():
+    nodes = Nodes(a={}, b={})
+
+    def prepare(pool):
+        for endpoint in pool.endpoints:
+            endpoint.breaker.trip()
+
+    async def scenario(rpc, pool):
+        return await rpc.call("eth_chainId", [])
+
+    assert run_pool(nodes, ["a", "b"], scenario, prepare) in ("a", "b")
+    assert sum(nodes.calls.values()) == 1
+
+
+def test_range_queries_only_go_to_nodes_at_the_requested_block():
+    nodes = Nodes(ahead={"head": 100, "delay": 0.05}, behind={"head": 90})
+
+    async def scenario(rpc, pool):
+        for endpoint in pool.endpoints:
+            await pool.send(rpc.session, endpoint, {"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []})
+        nodes.calls.clear()
+        # "behind" répond plus vite, mais n'a pas encore le bloc 95
+        logs = await rpc.call("eth_getLogs", [{"fromBlock": "0x5a", "toBlock": "0x5f"}], min_block=95)
+        with pytest.raises(bot.RPCError):
+            await rpc.call("eth_getLogs", [{"fromBlock": "0x64", "toBlock": "0x6e"}], min_block=110)
+        return logs, [endpoint.head for endpoint in pool.endpoints]
+
+    logs, heads = run_pool(nodes, ["ahead", "behind"], scenario)
+    assert logs == "ahead"
+    assert heads == [100, 90]
+    assert nodes.calls == {"ahead": 1}
+
+
+def test_every_finished_task_is_consumed():
+    nodes = Nodes(bad={"status": 500, "delay": 0.1}, good={"delay": 0.1})
+    unretrieved = []
+
+    def prepare(pool):
+        pool.latencies.extend([0.001] * 50)
+
+    async def scenario(rpc, pool):
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unretrieved.append(context))
+        for _ in range(5):
+            for endpoint in pool.endpoints:
+                endpoint.breaker.results.clear()
+                endpoint.used_at = 0.0
+            await rpc.call("eth_chainId", [])
+        gc.collect()
+        await asyncio.sleep(0)
+
+    run_pool(nodes, ["bad", "good"], scenario, prepare)
+    assert not unretrieved
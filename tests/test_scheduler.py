@@ -0,0 +1,94 @@
+import asyncio
+
+import bot
+
+
+class FakeMessage:
+    def __init__(self):
+        self.edits = []
+
+    async def edit_text(self, text, **kwargs):
+        self.edits.append(text)
+
+
+def test_round_robin_between_chats_and_per_user_limit():
+    async def scenario():
+        scheduler = bot.AnalysisScheduler(max_concurrent=1, max_queued=10, max_per_user=2)
+        running = scheduler.submit(chat_id=1, user_id=1)
+        a1, a2 = scheduler.submit(1, 1), scheduler.submit(1, 2)
+        b1 = scheduler.submit(2, 3)
+        positions = [ticket.position for ticket in (running, a1, a2, b1)]
+        try:
+            scheduler.submit(1, 1)
+        except bot.UserLimitReached:
+            limited = True
+        running.release()
+        return positions, limited, a1.granted.done(), b1.position
+
+    positions, limited, granted, b1_position = asyncio.run(scenario())
+    # Le chat 2 passe avant la deuxième demande du chat 1
+    assert positions == [0, 1, 3, 2]
+    assert limited
+    assert granted
+    assert b1_position == 1
+
+
+def test_queue_position_shown_to_users_is_updated():
+    async def scenario():
+        scheduler = bot.AnalysisScheduler(max_concurrent=1, max_queued=10, max_per_user=5)
+        running = scheduler.submit(1, 1)
+        ahead = scheduler.submit(2, 2)
+        ticket = scheduler.submit(3, 3)
+        message = FakeMessage()
+        waiter = asyncio.create_task(bot.wait_in_queue(ticket, message, interval=0.01))
+
+        await asyncio.sleep(0.05)
+        running.release()  # ahead démarre, ticket passe en position 1
+        await asyncio.sleep(0.05)
+        ahead.release()
+        await asyncio.wait_for(waiter, 1)
+        return message.edits, ticket.granted.done()
+
+    edits, granted = asyncio.run(scenario())
+    assert edits == [bot.queue_message(1)]
+    assert granted
+
+
+class CountingAnalyzer:
+    """Analyseur qui compte les détections de chaînes"""
+
+    def __init__(self):
+        self.detections = 0
+        self.release = asyncio.Event()
+
+    async def detect_chains(self, address):
+        self.detections += 1
+        return ["base"]
+
+    async def stream_analysis(self, address, chains):
+        yield ("partiel", None)
+        await self.release.wait()
+        yield ("final", None)
+
+
+def test_sharing_is_checked_by_address_without_chain_detection():
+    address = "0x" + "ab" * 20
+
+    async def scenario():
+        analyzer = CountingAnalyzer()
+        registry = bot.AnalysisRegistry(analyzer)
+        before = registry.is_shared(address)
+        stream = registry.stream(address)
+        await stream.__anext__()
+        during = registry.is_shared(address.upper().replace("0X", "0x"))
+        detections = analyzer.detections
+        analyzer.release.set()
+        async for _ in stream:
+            pass
+        return before, during, detections, registry.is_shared(address)
+
+    before, during, detections, after = asyncio.run(scenario())
+    assert not before
+    assert during and after
+    # Seule l'analyse elle-même a détecté les chaînes
+    assert detections == 1
@@ -0,0 +1,46 @@
+import asyncio
+
+import bot
+
+ADDRESS = "0x" + "ab" * 20
+NAME = f"{ADDRESS}:base"
+
+
+class TimingOutAnalyzer:
+    """Analyseur dont une section dépasse son délai"""
+
+    def __init__(self):
+        self.runs = 0
+        self.cache = bot.TokenCache(path=None)
+
+    async def detect_chains(self, address):
+        return ["base"]
+
+    async def stream_analysis(self, address, chains):
+        self.runs += 1
+
+        async def build():
+            return bot.ReportSection("Section", complete=False).line(bot.TIMED_OUT_MESSAGE)
+
+        text = await bot.TokenAnalyzer._render_section(self, address, "base", "token", build())
+        yield (text, None)
+
+
+async def _collect(registry):
+    return [text async for text, _ in registry.stream(ADDRESS)]
+
+
+def test_reports_with_timed_out_sections_are_not_reused():
+    backend = bot.LocalBackend()
+    registry = bot.AnalysisRegistry(TimingOutAnalyzer(), backend=backend)
+
+    async def scenario():
+        first = await _collect(registry)
+        second = await _collect(registry)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert registry.analyzer.runs == 2
+    assert asyncio.run(backend.get(f"analysis:done:{NAME}")) is None
+    assert asyncio.run(registry.analyzer.cache.get("section", f"base:{ADDRESS}:token:HTML")) is None
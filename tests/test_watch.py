@@ -0,0 +1,109 @@
+import asyncio
+
+import bot
+
+TOKEN = "0x" + "77" * 20
+DEPLOYER = "0x" + "d0" * 20
+FUNDER = "0x" + "f1" * 20
+
+
+class FakeAnalyzer:
+    """Analyseur qui note chaque recherche demandée par collect_facts"""
+
+    def __init__(self):
+        self.lookups = []
+
+    async def detect_creation_platform(self, address, chain):
+        self.lookups.append("platform")
+        return {"name": "Clanker"}
+
+    async def get_contract_creation_tx(self, address, chain):
+        self.lookups.append("creation")
+        return {"deployer": DEPLOYER}
+
+    async def get_deployer_tokens(self, deployer, address, chain, limit):
+        self.lookups.append("deployer_tokens")
+        return [{"address": "0x" + "01" * 20}] * 3
+
+    async def get_funding_address(self, deployer, chain):
+        self.lookups.append("funder")
+        return FUNDER
+
+
+def _collect(*filters):
+    subscriptions = bot.WatchSubscriptions(path=None)
+    for chat_id, watch_filter in enumerate(filters):
+        subscriptions.add(chat_id, watch_filter)
+    analyzer = FakeAnalyzer()
+    watcher = bot.TokenWatcher(analyzer, subscriptions, notify=None, rpc=object())
+    facts = asyncio.run(watcher.collect_facts(TOKEN))
+    return facts, sorted(analyzer.lookups), subscriptions.recipients(facts)
+
+
+def test_platform_only_subscriptions_skip_deployer_and_funder_lookups():
+    facts, lookups, recipients = _collect({"type": "platform", "value": "clanker"})
+    assert lookups == ["platform"]
+    assert recipients == [0]
+
+
+def test_collect_facts_fetches_what_the_active_filters_need():
+    facts, lookups, recipients = _collect({"type": "funder", "value": FUNDER})
+    assert lookups == ["creation", "funder"]
+    assert recipients == [0]
+
+    facts, lookups, recipients = _collect({"type": "deployer", "value": 3}, {"type": "funder", "value": DEPLOYER})
+    assert lookups == ["creation", "deployer_tokens", "funder"]
+    assert recipients == [0]
+
+    facts, lookups, recipients = _collect({"type": "all"})
+    assert lookups == []
+    assert recipients == [0]
+
+
+class FlakyRPC:
+    """Noeud qui signale un premier mint de TOKEN au bloc 11 ; le premier batch eth_getCode échoue"""
+
+    def __init__(self, failure):
+        self.failure = failure
+        self.batches = 0
+
+    async def call(self, method, params, min_block=None):
+        if method == "eth_blockNumber":
+            return hex(11)
+        return [{"address": TOKEN, "blockNumber": hex(11), "topics": [bot.TRANSFER_TOPIC, bot.ZERO_TOPIC, "0x0"]}]
+
+    async def batch(self, calls, min_block=None):
+        self.batches += 1
+        if self.batches == 1:
+            if self.failure == "batch":
+                raise bot.RPCError("HTTP 502")
+            return [bot.RPCError("header not found")]
+        return ["0x"]
+
+
+def _poll_with(failure):
+    subscriptions = bot.WatchSubscriptions(path=None)
+    subscriptions.add(1, {"type": "all"})
+    watcher = bot.TokenWatcher(FakeAnalyzer(), subscriptions, notify=None, rpc=FlakyRPC(failure))
+    watcher.next_block = 10
+
+    async def scenario():
+        try:
+            await watcher.poll_once()
+        except bot.RPCError:
+            pass
+        after_failure = watcher.next_block
+        found = await watcher.poll_once()
+        return after_failure, found
+
+    after_failure, found = asyncio.run(scenario())
+    return watcher, after_failure, found
+
+
+def test_failed_get_code_batch_is_retried_on_the_next_poll():
+    for failure in ("batch", "item"):
+        watcher, after_failure, found = _poll_with(failure)
+        assert after_failure == 10
+        assert found == 1
+        assert watcher.queue.get_nowait() == TOKEN
+        assert watcher.next_block == 12